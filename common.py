@@ -28,6 +28,7 @@ import scipy as sp
 import numpy.random
 import scipy.linalg as sla
 import numpy.linalg as nla
+import scipy.sparse.linalg as ssl
 import scipy.stats as ss
 
 
@@ -1,4 +1,5 @@
 from common import *
+from tools.localization import LocTable
 
 @DA_Config
 def EnKF(upd_a,N,infl=1.0,rot=False,**kwargs):
@@ -19,23 +20,41 @@ def EnKF(upd_a,N,infl=1.0,rot=False,**kwargs):
     stats.assess(0,E=E)
 
     # Loop
-    for k,kObs,t,dt in progbar(chrono.forecast_range):
-      E = f(E,t-dt,dt)
-      E = add_noise(E, dt, f.noise, kwargs)
+    tckr = chrono.forecast_range
+    E    = stats.resume(tckr,E=E)
+    for k,kObs,t,dt in progbar(tckr):
+      with stats.timed('forecast',k):
+        E = f(E,t-dt,dt)
+      with stats.timed('noise',k):
+        E = add_noise(E, dt, f.noise, kwargs)
 
       # Analysis update
       if kObs is not None:
         stats.assess(k,kObs,'f',E=E)
-        E = EnKF_analysis(E,h(E,t),h.noise,yy[kObs],upd_a,stats,kObs)
-        E = post_process(E,infl,rot)
+        with stats.timed('analysis',k):
+          E = EnKF_analysis(E,h(E,t),h.noise,yy[kObs],upd_a,stats,kObs)
+        with stats.timed('post',k):
+          E = post_process(E,infl,rot)
 
       stats.assess(k,kObs,E=E)
+      stats.checkpoint(k,kObs,E=E)
   return assimilator
 
 
 def EnKF_analysis(E,hE,hnoise,y,upd_a,stats,kObs):
+    """
+    The EnKF analysis update (see EnKF_analysis_trHK),
+    storing the relative influence of the obs in stats.trHK[kObs].
+    """
+    E, trHK = EnKF_analysis_trHK(E,hE,hnoise,y,upd_a)
+    # Diagnostic: relative influence of observations
+    stats.trHK[kObs] = trHK/hnoise.m
+    return E
+
+def EnKF_analysis_trHK(E,hE,hnoise,y,upd_a):
     """
     The EnKF analysis update.
+    Returns E and trHK (the un-normalized trace of KH).
     
     'upd_a' selects between the different versions.
 
@@ -55,11 +74,10 @@ def EnKF_analysis(E,hE,hnoise,y,upd_a,stats,kObs):
 
     if 'PertObs' in upd_a:
         # Uses perturbed observations (burgers'98)
-        C  = Y.T @ Y + R.full*(N-1)
         D  = center(hnoise.sample(N))
-        YC = mrdiv(Y, C)
+        YC = mrdiv_obs(Y, Y, R, N-1) # = mrdiv(Y, Y.T@Y + R.full*(N-1))
         KG = A.T @ YC
-        HK = Y.T @ YC
+        trHK = np.sum(Y*YC) # = trace(Y.T @ YC)
         dE = (KG @ ( y + D - hE ).T).T
         E  = E + dE
     elif 'Sqrt' in upd_a:
@@ -73,13 +91,14 @@ def EnKF_analysis(E,hE,hnoise,y,upd_a,stats,kObs):
         if 'explicit' in upd_a:
           # Not recommended due to numerical costs and instability.
           # Implementation using inv (in ens space)
-          Pw = inv(Y @ R.inv @ Y.T + (N-1)*eye(N))
-          T  = sqrtm(Pw) * sqrt(N-1)
-          HK = R.inv @ Y.T @ Pw @ Y
+          YRi  = R.solve(Y)
+          Pw   = inv(YRi @ Y.T + (N-1)*eye(N))
+          T    = sqrtm(Pw) * sqrt(N-1)
+          trHK = np.sum(YRi * (Pw @ Y)) # = trace(R.inv @ Y.T @ Pw @ Y)
           #KG = R.inv @ Y.T @ Pw @ A
         elif 'svd' in upd_a:
           # Implementation using svd of Y R^{-1/2}.
-          V,s,_ = svd0(Y @ R.sym_sqrt_inv.T)
+          V,s,_ = svd0(R.whiten(Y))
           d     = pad0(s**2,N) + (N-1)
           Pw    = ( V * d**(-1.0) ) @ V.T
           T     = ( V * d**(-0.5) ) @ V.T * sqrt(N-1) 
@@ -87,7 +106,7 @@ def EnKF_analysis(E,hE,hnoise,y,upd_a,stats,kObs):
         elif 'sS' in upd_a:
           # Same as 'svd', but with slightly different notation
           # (sometimes used by Sakov) using the normalization sqrt(N-1).
-          S     = Y @ R.sym_sqrt_inv.T / sqrt(N-1)
+          S     = R.whiten(Y) / sqrt(N-1)
           V,s,_ = svd0(S)
           d     = pad0(s**2,N) + 1
           Pw    = ( V * d**(-1.0) )@V.T / (N-1) # = G/(N-1)
@@ -95,11 +114,12 @@ def EnKF_analysis(E,hE,hnoise,y,upd_a,stats,kObs):
           trHK  = np.sum(  (s**2 + 1)**(-1.0)*s**2 ) # see docs/trHK.jpg
         else: # 'eig' in upd_a:
           # Implementation using eig. val. decomp.
-          d,V   = eigh(Y @ R.inv @ Y.T + (N-1)*eye(N))
+          YRi   = R.solve(Y)
+          d,V   = eigh(YRi @ Y.T + (N-1)*eye(N))
           T     = V@diag(d**(-0.5))@V.T * sqrt(N-1)
           Pw    = V@diag(d**(-1.0))@V.T
-          HK    = R.inv @ Y.T @ (V@ diag(d**(-1)) @V.T) @ Y
-        w = dy @ R.inv @ Y.T @ Pw
+          trHK  = np.sum(YRi * (Pw @ Y)) # = trace(R.inv @ Y.T @ Pw @ Y)
+        w = R.solve(dy) @ Y.T @ Pw
         E = mu + w@A + T@A
     elif 'Serial' in upd_a:
         # Observations assimilator one-at-a-time.
@@ -108,8 +128,8 @@ def EnKF_analysis(E,hE,hnoise,y,upd_a,stats,kObs):
         # although it does yield the same mean/cov.
         # See DAPPER/Misc/batch_vs_serial.py for more details.
         inds = serial_inds(upd_a, y, R, A)
-        z = dy@ R.sym_sqrt_inv.T / sqrt(N-1)
-        S = Y @ R.sym_sqrt_inv.T / sqrt(N-1)
+        z = R.whiten(dy) / sqrt(N-1)
+        S = R.whiten(Y)  / sqrt(N-1)
         T = eye(N)
         for j in inds:
           # Possibility: re-compute Sj by non-lin h.
@@ -120,24 +140,40 @@ def EnKF_analysis(E,hE,hnoise,y,upd_a,stats,kObs):
           S -= Tj @ S
         GS   = S.T @ T
         E    = mu + z@GS@A + T@A
-        trHK = trace(R.sym_sqrt_inv.T@GS@Y)/sqrt(N-1) # Correct?
+        trHK = np.sum(GS * R.whiten(Y).T)/sqrt(N-1) # = trace(R.sym_sqrt_inv.T@GS@Y). Correct?
     elif 'DEnKF' is upd_a:
         # Uses "Deterministic EnKF" (sakov'08)
-        C  = Y.T @ Y + R.full*(N-1)
-        YC = mrdiv(Y, C)
+        YC = mrdiv_obs(Y, Y, R, N-1) # = mrdiv(Y, Y.T@Y + R.full*(N-1))
         KG = A.T @ YC
-        HK = Y.T @ YC
+        trHK = np.sum(Y*YC) # = trace(Y.T @ YC)
         E  = E + KG@dy - 0.5*(KG@Y.T).T
     else:
       raise KeyError("No analysis update method found: '" + upd_a + "'.") 
 
-    # Diagnostic: relative influence of observations
-    if 'trHK' in locals(): stats.trHK[kObs] = trHK     /hnoise.m
-    elif 'HK' in locals(): stats.trHK[kObs] = trace(HK)/hnoise.m
+    return E, trHK
 
-    return E
 
 
+def mrdiv_obs(B,Y,R,c=1.0):
+  """
+  B @ inv(Y.T@Y + c*R.full), where R is a (p-by-p) CovMat, and Y is N-by-p
+  (or a stack of such, as are B and the output).
+
+  If N<p and R is invertible, the ensemble-space (Woodbury) formulation
+    B@inv(c*R) - B@inv(c*R)@Y.T @ inv(I + Y@inv(c*R)@Y.T) @ Y@inv(c*R)
+  is used, which only requires N-by-N solves (and R.solve, which is cheap
+  if R is diagonal or otherwise structured). Else, the obs-space one.
+  """
+  N, p = Y.shape[-2:]
+  if N < p and R.rk == R.m:
+    BRi = R.solve(B)/c
+    YRi = R.solve(Y)/c
+    G   = YRi @ _T(Y) + eye(N)
+    return BRi - (BRi @ _T(Y)) @ nla.solve(G, YRi)
+  else:
+    C   = _T(Y) @ Y + c*R.full
+    return _T(nla.solve(C, _T(B))) # C is symmetric
+
 
 def post_process(E,infl,rot):
   """
@@ -265,42 +301,63 @@ def EnKS(upd_a,N,tLag,infl=1.0,rot=False,**kwargs):
 
   The only difference to the EnKF is the management of the lag and the reshapings.
 
+  Only the ensembles within the lag window are stored (in a ring buffer);
+  they are assessed (as smoothed, 'u') once they fall out of the window.
+
   Settings for reproducing literature benchmarks may be found in
   mods/Lorenz95/raanes2016.py
   """
   def assimilator(stats,twin,xx,yy):
     f,h,chrono,X0 = twin.f, twin.h, twin.t, twin.X0
+    K = chrono.K
+
+    # kkLag[k]: start of the lag window of k, i.e. 1st ind with tt >= tt[k]-tLag.
+    # It's non-decreasing, so the states before it will not be updated anymore.
+    kkLag = np.searchsorted(chrono.tt, chrono.tt - tLag)
+    B     = np.max(arange(K+1) - kkLag) + 1 # Length of ring buffer
 
-    E    = zeros((chrono.K+1,N,f.m))
-    E[0] = X0.sample(N)
+    E     = zeros((B,N,f.m))
+    E[0]  = X0.sample(N)
+    kDone = 0 # Assessed (as smoothed) are the states of k < kDone
+
+    def release(k1):
+      "Assess the states of kDone,...,k1-1, which have left the lag window."
+      nonlocal kDone
+      for k in range(kDone,k1):
+        stats.assess(k,None,'u',E=E[k%B])
+      kDone = max(kDone,k1)
 
     for k,kObs,t,dt in progbar(chrono.forecast_range):
-      E[k] = f(E[k-1],t-dt,dt)
-      E[k] = add_noise(E[k], dt, f.noise, kwargs)
+      with stats.timed('forecast',k):
+        Ek     = f(E[(k-1)%B],t-dt,dt)
+      release(kkLag[k])
+      E[k%B]   = Ek
+      with stats.timed('noise',k):
+        E[k%B] = add_noise(E[k%B], dt, f.noise, kwargs)
 
       if kObs is not None:
-        stats.assess(k,kObs,'f',E=E[k])
+        stats.assess(k,kObs,'f',E=E[k%B])
 
-        kLag     = find_1st_ind(chrono.tt >= t-tLag)
-        kkLag    = range(kLag, k+1)
-        ELag     = E[kkLag]
+        with stats.timed('analysis',k):
+          kkLB     = arange(kkLag[k], k+1) % B
+          ELag     = E[kkLB]
 
-        hE       = h(E[k],t)
-        y        = yy[kObs]
+          hE       = h(E[k%B],t)
+          y        = yy[kObs]
 
-        ELag     = reshape_to(ELag)
-        ELag     = EnKF_analysis(ELag,hE,h.noise,y,upd_a,stats,kObs)
-        E[kkLag] = reshape_fr(ELag,f.m)
-        E[k]     = post_process(E[k],infl,rot)
-        stats.assess(k,kObs,'a',E=E[k])
+          ELag     = reshape_to(ELag)
+          ELag     = EnKF_analysis(ELag,hE,h.noise,y,upd_a,stats,kObs)
+          E[kkLB]  = reshape_fr(ELag,f.m)
+        with stats.timed('post',k):
+          E[k%B]   = post_process(E[k%B],infl,rot)
+        stats.assess(k,kObs,'a',E=E[k%B])
 
-    for k in progbar(range(chrono.K+1),desc='Assessing'):
-      stats.assess(k,None,'u',E=E[k])
+    release(K+1)
   return assimilator
 
 
 @DA_Config
-def EnRTS(upd_a,N,cntr,infl=1.0,rot=False,**kwargs):
+def EnRTS(upd_a,N,cntr,infl=1.0,rot=False,stride=None,**kwargs):
   """
   EnRTS (Rauch-Tung-Striebel) smoother.
 
@@ -309,43 +366,110 @@ def EnRTS(upd_a,N,cntr,infl=1.0,rot=False,**kwargs):
 
   Settings for reproducing literature benchmarks may be found in
   mods/Lorenz95/raanes2016.py
+
+  By default, all of the filter and forecast ensembles (2K) are stored.
+  If stride: only every stride-th filter ensemble (and the RNG state)
+  is stored during the forward pass; the others are recomputed,
+  one segment at a time, during the backward pass (see recompute_segment).
+  This stores K/stride + 2*stride ensembles, i.e. the fewest for stride≈sqrt(K/2),
+  at the cost of (nearly) one extra forward pass, timed in stats.t_recompute.
   """
   def assimilator(stats,twin,xx,yy):
     f,h,chrono,X0 = twin.f, twin.h, twin.t, twin.X0
+    K = chrono.K
+
+    def cycle(E,k,kObs,t,dt,recompute=False):
+      "Forecast (and analysis), from k-1 to k. Returns Ef[k], E[k]."
+      timed, assess = quiet_stats(stats,recompute)
+      with timed('forecast',k):
+        E  = f(E,t-dt,dt)
+      with timed('noise',k):
+        E  = add_noise(E, dt, f.noise, kwargs)
+      Ef = E.copy()
 
-    E    = zeros((chrono.K+1,N,f.m))
-    Ef   = E.copy()
-    E[0] = X0.sample(N)
+      if kObs is not None:
+        assess(k,kObs,'f',E=E)
+        with timed('analysis',k):
+          hE = h(E,t)
+          y  = yy[kObs]
+          E  = EnKF_analysis(E,hE,h.noise,y,upd_a,stats,kObs)
+        with timed('post',k):
+          E  = post_process(E,infl,rot)
+        assess(k,kObs,'a',E=E)
+      return Ef, E
+
+    Ek = X0.sample(N)
+    if stride:
+      ckpts = {0: (Ek, np.random.get_state())}
+    else:
+      E    = zeros((K+1,N,f.m))
+      Ef   = E.copy()
+      E[0] = Ek
 
     # Forward pass
     for k,kObs,t,dt in progbar(chrono.forecast_range):
-      E[k]  = f(E[k-1],t-dt,dt)
-      E[k]  = add_noise(E[k], dt, f.noise, kwargs)
-      Ef[k] = E[k]
-
-      if kObs is not None:
-        stats.assess(k,kObs,'f',E=E[k])
-        hE   = h(E[k],t)
-        y    = yy[kObs]
-        E[k] = EnKF_analysis(E[k],hE,h.noise,y,upd_a,stats,kObs)
-        E[k] = post_process(E[k],infl,rot)
-        stats.assess(k,kObs,'a',E=E[k])
-
-    # Backward pass
-    for k in progbar(range(chrono.K)[::-1]):
-      A  = anom(E[k])[0]
-      Af = anom(Ef[k+1])[0]
-
-      J = tinv(Af) @ A
-      J *= cntr
+      Efk, Ek = cycle(Ek,k,kObs,t,dt)
+      if not stride:
+        Ef[k], E[k] = Efk, Ek
+      elif k%stride == 0:
+        ckpts[k] = (Ek, np.random.get_state())
+
+    # Backward pass (assessed in descending order)
+    stats.restart_series('u',descending=True)
+    stats.assess(K,E=Ek)
+    k0 = K if stride else 0 # Start (k) of the current segment
+    for k in progbar(range(K)[::-1]):
+      if k < k0:
+        k1, k0   = k0, k - k%stride
+        with stats.timed('recompute',k):
+          E, Ef  = recompute_segment(cycle, chrono, ckpts[k0], k0, k1)
+        E[k1-k0] = Ek # Smoothed
+      with stats.timed('smoother',k):
+        A  = anom(E[k-k0])[0]
+        Af = anom(Ef[k+1-k0])[0]
+
+        J = tinv(Af) @ A
+        J *= cntr
       
-      E[k] += ( E[k+1] - Ef[k+1] ) @ J
-
-    for k in progbar(range(chrono.K+1),desc='Assessing'):
-      stats.assess(k,E=E[k])
+        E[k-k0] += ( E[k+1-k0] - Ef[k+1-k0] ) @ J
+      Ek = E[k-k0]
+      stats.assess(k,E=Ek)
   return assimilator
 
 
+def quiet_stats(stats,quiet):
+  """
+  Return stats.timed and stats.assess,
+  or (if quiet, e.g. when recomputing) no-op substitutes.
+  """
+  if quiet:
+    return (lambda phase,k: contextlib.nullcontext()), (lambda *args,**kwargs: None)
+  return stats.timed, stats.assess
+
+def recompute_segment(cycle,chrono,ckpt,k0,k1):
+  """
+  Recompute the filter (and forecast) states of k0,...,k1,
+  from the checkpoint (state at k0 and the RNG state following it),
+  using cycle(state,k,kObs,t,dt,recompute=True) -> (forecast,filter).
+  Used by smoothers to avoid storing all of the states (see EnRTS).
+  The RNG state is restored afterwards.
+  Returns the lists of filter and forecast states (index: k-k0).
+  """
+  x0, rng = ckpt
+  xa, xf  = [x0], [None]
+  state   = np.random.get_state()
+  np.random.set_state(rng)
+  tckr    = chrono.forecast_range
+  tckr.skip_to(k0+1)
+  for _ in range(k1-k0):
+    k,kObs,t,dt = next(tckr)
+    x_f, x_a    = cycle(xa[-1],k,kObs,t,dt,recompute=True)
+    xf.append(x_f)
+    xa.append(x_a)
+  np.random.set_state(state)
+  return xa, xf
+
+
 
 
 def serial_inds(upd_a, y, cvR, A):
@@ -363,7 +487,7 @@ def serial_inds(upd_a, y, cvR, A):
   return inds
 
 @DA_Config
-def SL_EAKF(loc_rad,N,taper='GC',ordr='rand',infl=1.0,rot=False,**kwargs):
+def SL_EAKF(loc_rad,N,taper='GC',ordr='rand',h_every=None,infl=1.0,rot=False,**kwargs):
   """
   Serial, covariance-localized EAKF.
 
@@ -373,6 +497,14 @@ def SL_EAKF(loc_rad,N,taper='GC',ordr='rand',infl=1.0,rot=False,**kwargs):
   Used without localization, this should be equivalent
   (full ensemble equality) to the EnKF 'Serial'.
   See DAPPER/Misc/batch_vs_serial.py for some details.
+
+  The observed ensemble is updated jointly with the state,
+  i.e. by the (localized, using h.loc_f(...,'y2y',...)) regression
+  on the observed ensemble of each obs, as in Anderson (2003):
+  "A local least squares framework for ensemble filtering".
+  Thus, h is only evaluated once per cycle, unless h_every,
+  in which case h is re-evaluated (non-linearly) after every h_every obs.
+  h_every=1 avoids the joint update altogether.
   """
   def assimilator(stats,twin,xx,yy):
     f,h,chrono,X0 = twin.f, twin.h, twin.t, twin.X0
@@ -380,68 +512,88 @@ def SL_EAKF(loc_rad,N,taper='GC',ordr='rand',infl=1.0,rot=False,**kwargs):
     n = N-1
 
     R    = h.noise
-    Rm12 = h.noise.C.sym_sqrt_inv
 
     E = X0.sample(N)
     stats.assess(0,E=E)
 
-    for k,kObs,t,dt in progbar(chrono.forecast_range):
-      E = f(E,t-dt,dt)
-      E = add_noise(E, dt, f.noise, kwargs)
+    tckr = chrono.forecast_range
+    E    = stats.resume(tckr,E=E)
+    for k,kObs,t,dt in progbar(tckr):
+      with stats.timed('forecast',k):
+        E = f(E,t-dt,dt)
+      with stats.timed('noise',k):
+        E = add_noise(E, dt, f.noise, kwargs)
 
       if kObs is not None:
         stats.assess(k,kObs,'f',E=E)
-        y    = yy[kObs]
-        inds = serial_inds(ordr, y, R, anom(E)[0])
+        with stats.timed('analysis',k):
+          y    = yy[kObs]
+          mu   = mean(E,0)
+          A    = E-mu
+          inds = serial_inds(ordr, y, R, A)
             
-        locf_at = h.loc_f(loc_rad, 'y2x', t, taper)
-        for i,j in enumerate(inds):
-          hE = h(E,t)
-          hx = mean(hE,0)
-          Y  = (hE - hx).T
-          mu = mean(E ,0)
-          A  = E-mu
-
-          # Update j-th component of observed ensemble
-          Yj    = Rm12[j,:] @ Y
-          dyj   = Rm12[j,:] @ (y - hx)
-          #
-          skk   = Yj@Yj
-          su    = 1/( 1/skk + 1/n )
-          alpha = (n/(n+skk))**(0.5)
-          #
-          dy2   = su*dyj/n # (mean is absorbed in dyj)
-          Y2    = alpha*Yj
-
-          if skk<1e-9: continue
-
-          # Update state (regression), with localization
-          # Localize
-          local, coeffs = locf_at(j)
-          if len(local) == 0: continue
-          Regression    = (A[:,local]*coeffs).T @ Yj/np.sum(Yj**2)
-          mu[ local]   += Regression*dy2
-          A[:,local]   += np.outer(Y2 - Yj, Regression)
-
-          # Without localization:
-          #Regression = A.T @ Yj/np.sum(Yj**2)
-          #mu        += Regression*dy2
-          #A         += np.outer(Y2 - Yj, Regression)
+          locf_at = h.loc_f(loc_rad, 'y2x', t, taper)
+          if h_every != 1:
+            locf_yy = h.loc_f(loc_rad, 'y2y', t, taper)
+          for i,j in enumerate(inds):
+            if i % (h_every or len(inds)) == 0:
+              hE = h(mu+A,t)
+              hx = mean(hE,0)
+              YR = R.C.whiten(hE - hx)
+              dy = R.C.whiten(y  - hx)
+
+            # Update j-th component of observed ensemble
+            Yj    = YR[:,j].copy()
+            dyj   = dy[j]
+            #
+            skk   = Yj@Yj
+            su    = 1/( 1/skk + 1/n )
+            alpha = (n/(n+skk))**(0.5)
+            #
+            dy2   = su*dyj/n # (mean is absorbed in dyj)
+            Y2    = alpha*Yj
+
+            if skk<1e-9: continue
+
+            # Update state (regression), with localization
+            # Localize
+            local, coeffs = locf_at(j)
+            if len(local):
+              Regression    = (A[:,local]*coeffs).T @ Yj/np.sum(Yj**2)
+              mu[ local]   += Regression*dy2
+              A[:,local]   += np.outer(Y2 - Yj, Regression)
+
+            # Without localization:
+            #Regression = A.T @ Yj/np.sum(Yj**2)
+            #mu        += Regression*dy2
+            #A         += np.outer(Y2 - Yj, Regression)
+
+            # Update the observed ensemble likewise (joint regression)
+            if h_every != 1:
+              local, coeffs = locf_yy(j)
+              Regression    = (YR[:,local]*coeffs).T @ Yj/np.sum(Yj**2)
+              dy[ local]   -= Regression*dy2
+              YR[:,local]  += np.outer(Y2 - Yj, Regression)
 
           E = mu + A
 
-        E = post_process(E,infl,rot)
+        with stats.timed('post',k):
+          E = post_process(E,infl,rot)
 
       stats.assess(k,kObs,E=E)
+      stats.checkpoint(k,kObs,E=E)
   return assimilator
 
 
 
 @DA_Config
-def LETKF(loc_rad,N,taper='GC',approx=False,infl=1.0,rot=False,**kwargs):
+def LETKF(loc_rad,N,taper='GC',approx=False,nproc=None,infl=1.0,rot=False,**kwargs):
   """
   Same as EnKF (sqrt), but with localization.
 
+  If nproc: the local analyses are done (in tiles of the state)
+  on a (persistent) pool of nproc worker processes. See tile_map().
+
   Settings for reproducing literature benchmarks may be found in
   mods/Lorenz95/sak08.py
 
@@ -450,76 +602,151 @@ def LETKF(loc_rad,N,taper='GC',approx=False,infl=1.0,rot=False,**kwargs):
   """
   def assimilator(stats,twin,xx,yy):
     f,h,chrono,X0 = twin.f, twin.h, twin.t, twin.X0
-    Rm12 = h.noise.C.sym_sqrt_inv
 
     E = X0.sample(N)
     stats.assess(0,E=E)
 
-    for k,kObs,t,dt in progbar(chrono.forecast_range):
-      E = f(E,t-dt,dt)
-      E = add_noise(E, dt, f.noise, kwargs)
+    tckr = chrono.forecast_range
+    E    = stats.resume(tckr,E=E)
+    for k,kObs,t,dt in progbar(tckr):
+      with stats.timed('forecast',k):
+        E = f(E,t-dt,dt)
+      with stats.timed('noise',k):
+        E = add_noise(E, dt, f.noise, kwargs)
 
       if kObs is not None:
         stats.assess(k,kObs,'f',E=E)
-        mu = mean(E,0)
-        A  = E - mu
-
-        hE = h(E,t)
-        hx = mean(hE,0)
-        YR = (hE-hx)  @ Rm12.T
-        yR = (yy[kObs] - hx) @ Rm12.T
-
-        locf_at = h.loc_f(loc_rad, 'x2y', t, taper)
-        for i in range(f.m):
-          # Localize
-          local, coeffs = locf_at(i)
-          if len(local) == 0: continue
-          iY  = YR[:,local] * sqrt(coeffs)
-          idy = yR[local]   * sqrt(coeffs)
-
-          # Do analysis
-          if approx:
-            # Approximate alternative, derived by pretending that Y_loc = H @ A_i,
-            # even though the local cropping of Y happens after application of H.
-            # Anyways, with an explicit H, one can apply Woodbury
-            # to go to state space (dim==1), before reverting to HA_i = Y_loc.
-            n   = N-1
-            B   = A[:,i]@A[:,i] / n
-            AY  = A[:,i]@iY
-            BmR = AY@AY.T
-            T2  = (1 + BmR/(B*n**2))**(-1)
-            AT  = sqrt(T2) * A[:,i]
-            P   = T2 * B
-            dmu = P*(AY/(n*B))@idy
-          else:
-            # Non-Approximate
-            if len(local) < N:
-              # SVD version
-              V,sd,_ = svd0(iY)
-              d      = pad0(sd**2,N) + (N-1)
-              Pw     = (V * d**(-1.0)) @ V.T
-              T      = (V * d**(-0.5)) @ V.T * sqrt(N-1)
-            else:
-              # EVD version
-              d,V   = eigh(iY @ iY.T + (N-1)*eye(N))
-              T     = V@diag(d**(-0.5))@V.T * sqrt(N-1)
-              Pw    = V@diag(d**(-1.0))@V.T
-            AT  = T@A[:,i]
-            dmu = idy@iY.T@Pw@A[:,i]
-
-          E[:,i] = mu[i] + dmu + AT
+        with stats.timed('analysis',k):
+          locf_at = h.loc_f(loc_rad, 'x2y', t, taper)
+          E, trHK = LETKF_analysis(E,h(E,t),h.noise,yy[kObs],locf_at,approx,nproc)
 
-        E = post_process(E,infl,rot)
+        with stats.timed('post',k):
+          E = post_process(E,infl,rot)
 
-        if 'sd' in locals():
-          stats.trHK[kObs] = (sd**(-1.0) * sd**2).sum()/h.noise.m
-        #else:
-          # nevermind
+        if trHK is not None:
+          stats.trHK[kObs] = trHK
 
       stats.assess(k,kObs,E=E)
+      stats.checkpoint(k,kObs,E=E)
   return assimilator
 
 
+def LETKF_analysis(E,hE,hnoise,y,locf_at,approx=False,nproc=None):
+  """
+  The LETKF analysis update: a local ETKF for each state component i,
+  with the obs (and their weights) selected by locf_at(i). See LETKF().
+  Returns E, and trHK (normalized) or None.
+  """
+  R    = hnoise.C
+  N,m  = E.shape
+
+  mu = mean(E,0)
+  A  = E - mu
+
+  hx = mean(hE,0)
+  YR = R.whiten(hE-hx)
+  yR = R.whiten(y - hx)
+
+  if nproc:
+    E, res = local_analyses_in_parallel(_LETKF_tile,
+        E,mu,A,YR,yR,locf_at,nproc,approx=approx)
+    i_sd, iY_sd = max(res, key=lambda r: r[0])
+  else:
+    i_sd, iY_sd = LETKF_local_analyses(E,mu,A,YR,yR,locf_at,arange(m),approx)
+
+  if i_sd >= 0:
+    sd = svd0(iY_sd)[1]
+    return E, (sd**(-1.0) * sd**2).sum()/hnoise.m
+  return E, None
+
+def LETKF_local_analyses(E,mu,A,YR,yR,locf_at,ii,approx=False):
+  """
+  The local analyses of LETKF_analysis() for the state components ii,
+  written into E[:,ii].
+  The components are grouped by their number of local obs,
+  and the local analyses of each group are done in batches
+  (see LETKF_local_batch), rather than one-by-one.
+
+  Returns i_sd, iY_sd: the last component with p < N (-1 if none),
+  and its iY (whose svals yield trHK).
+  """
+  N    = len(E)
+  locs = {i: locf_at(i) for i in ii}
+  nobs = array([len(locs[i][0]) for i in ii])
+
+  i_sd, iY_sd = -1, None
+  for p in np.unique(nobs):
+    if p == 0: continue
+    ip = ii[nobs==p]
+    # Batch size: limit memory to ca. 2**22 floats per array
+    for ib in np.array_split(ip, int(ceil(len(ip)*N*max(N,p) / 2**22))):
+      local  = array([locs[i][0] for i in ib])     # (G,p)
+      sqc    = sqrt([locs[i][1] for i in ib])      # (G,p)
+      iY     = YR[:,local].transpose(1,0,2) * sqc[:,None,:] # (G,N,p)
+      idy    = yR[local] * sqc                     # (G,p)
+      dmu,AT  = LETKF_local_batch(A[:,ib].T,iY,idy,approx)
+      E[:,ib] = mu[ib] + dmu + AT.T
+      if p < N and not approx and ib[-1] > i_sd:
+        i_sd, iY_sd = ib[-1], iY[-1]
+  return i_sd, iY_sd
+
+def _LETKF_tile(ws,i0,i1,approx=False):
+  locf_at = LocTable(ws.indptr,ws.inds,ws.coeffs)
+  return LETKF_local_analyses(ws.E,ws.mu,ws.A,ws.YR,ws.yR,locf_at,arange(i0,i1),approx)
+
+def local_analyses_in_parallel(tile_fun,E,mu,A,YR,yR,locf_at,nproc,**kwargs):
+  """
+  Do the local analyses tile_fun(ws,i0,i1,**kwargs)
+  for contiguous tiles (i0:i1) of the state components,
+  on a (persistent) pool of nproc worker processes (see tile_map),
+  with E, mu, A, YR, yR and the localization table in shared memory.
+
+  Returns E (the analysis, written by the workers), and the tile_fun results.
+  """
+  N,m   = E.shape
+  table = LocTable.from_locf(locf_at,m)
+  # More tiles than processes, for load balancing
+  tiles = [(ii[0],ii[-1]+1) for ii in np.array_split(arange(m),min(m,4*nproc))]
+  res, ws = tile_map(tile_fun, dict(E=E,mu=mu,A=A,YR=YR,yR=yR,
+    indptr=table.indptr,inds=table.inds,coeffs=table.coeffs), tiles, nproc, **kwargs)
+  E[:] = ws.E
+  return E, res
+
+def LETKF_local_batch(A,iY,idy,approx=False):
+  """
+  The local analyses of LETKF_analysis(), for a batch of G state components
+  with the same number (p) of local obs, using (numpy's) stacked linear algebra.
+  Input: A (G,N): the anomalies of the components, and the localized
+  (and whitened) obs anomalies iY (G,N,p) and innovations idy (G,p).
+  Returns dmu (G,) and AT (G,N).
+  """
+  G,N,p = iY.shape
+  if approx:
+    # Approximate alternative, derived by pretending that Y_loc = H @ A_i,
+    # even though the local cropping of Y happens after application of H.
+    # Anyways, with an explicit H, one can apply Woodbury
+    # to go to state space (dim==1), before reverting to HA_i = Y_loc.
+    n   = N-1
+    B   = (A**2).sum(1) / n
+    AY  = np.einsum('gn,gnp->gp',A,iY)
+    BmR = (AY**2).sum(1)
+    T2  = (1 + BmR/(B*n**2))**(-1)
+    AT  = sqrt(T2)[:,None] * A
+    P   = T2 * B
+    dmu = P*np.einsum('gp,gp->g',AY/(n*B)[:,None],idy)
+    return dmu, AT
+
+  # Non-Approximate. Via the EVD (for any p) of
+  # iY@iY.T + (N-1)*I = V@diag(d)@V.T, without forming T or Pw.
+  d,V = nla.eigh(iY @ iY.transpose(0,2,1) + (N-1)*eye(N))
+  VA  = np.einsum('gnk,gn->gk',V,A)                          # V.T @ A_i
+  Vw  = np.einsum('gnk,gnp,gp->gk',V,iY,idy,optimize=True)   # V.T @ iY @ idy
+  AT  = np.einsum('gnk,gk->gn',V,VA*d**(-0.5)) * sqrt(N-1)   # T @ A_i
+  dmu = (Vw * VA / d).sum(1)                                 # idy@iY.T@Pw@A_i
+  return dmu, AT
+
+
+
 
 # Notes on optimizers for the 'dual' EnKF-N:
 # ----------------------------------------
@@ -605,127 +832,151 @@ def EnKF_N(N,dual=True,Hess=False,g=0,nu=1.0,infl=1.0,rot=False,**kwargs):
   """
   def assimilator(stats,twin,xx,yy):
     # Unpack
-    f,h,chrono,X0,R  = twin.f, twin.h, twin.t, twin.X0, twin.h.noise.C
-
-    # EnKF-N constants
-    N1         = N-1      # Abbrev
-    eN_        = (N+1)/N  # Effect of unknown mean
-    cL_        = (N+g)/N1 # Coeff in front of log term
-    prior_mode = eN_/cL_  # Mode of l1 (un-corrected)
+    f,h,chrono,X0 = twin.f, twin.h, twin.t, twin.X0
 
     # Init
     E = X0.sample(N)
     stats.assess(0,E=E)
+    infls = None # for nu='adapt'
 
     # Loop
-    for k,kObs,t,dt in progbar(chrono.forecast_range):
+    tckr     = chrono.forecast_range
+    E, infls = stats.resume(tckr,E=E,infls=infls)
+    for k,kObs,t,dt in progbar(tckr):
       # Forecast
-      E = f(E,t-dt,dt)
-      E = add_noise(E, dt, f.noise, kwargs)
+      with stats.timed('forecast',k):
+        E = f(E,t-dt,dt)
+      with stats.timed('noise',k):
+        E = add_noise(E, dt, f.noise, kwargs)
 
       # Analysis
       if kObs is not None:
         stats.assess(k,kObs,'f',E=E)
-        hE = h(E,t)
-        y  = yy[kObs]
-
-        mu = mean(E,0)
-        A  = E - mu
-
-        hx = mean(hE,0)
-        Y  = hE-hx
-        dy = y - hx
-
-        V,s,UT = svd0  (Y @ R.sym_sqrt_inv.T)
-        du     = UT @ (dy @ R.sym_sqrt_inv.T)
-        dgn_N  = lambda l: pad0( (l*s)**2, N ) + N1
-
-        # As a func of I-KH ("prior's weight"), adjust l1's mode towards 1.
-        # Note: I-HK = mean( dgn_N(1.0)**(-1) )/N ≈ 1/(1 + HBH/R).
-        I_KH  = mean( dgn_N(1.0)**(-1) )*N1 # Normalize by f.m ?
-        #I_KH = 1/(1 + (s**2).sum()/N1)     # Alternative: use tr(HBH/R).
-        mc    = sqrt(prior_mode**I_KH)      # "mode correction".
-
-        # Certainty (nu) estimation
-        if nu is 'adapt':
-          L = 40
-          # Memorize inflation values
-          if kObs==0: infls = 1+sqrt(0.082)*randn(L) # Init st. nu becomes 1
-          else:       infls = roll_n_sub(infls,stats.infl[kObs-1],0) # FIFO
-          weights  = arange(L,0,-1) / (L*(L+1)/2) # 1,2,...L normalized
-          infl_var = weights@(infls - weights@infls)**2
-          nu_ = 0.75-0.1*log(infl_var) # Empirisism based on L95 experiments
-          nu_ = max(0.64,nu_)
-        else:
-          nu_ = nu
-
-        # Apply adjustments
-        eN = eN_*nu_/mc
-        cL = cL_*nu_*mc
-
-        if dual:
-            # Make dual cost function (in terms of l1)
-            pad_rk = lambda arr: pad0( arr, min(N,h.m) )
-            dgn_rk = lambda l: pad_rk((l*s)**2) + N1
-            J      = lambda l:          np.sum(du**2/dgn_rk(l)) \
-                     +    eN/l**2 \
-                     +    cL*log(l**2)
-            # Derivatives (not required with minimize_scalar):
-            Jp     = lambda l: -2*l   * np.sum(pad_rk(s**2) * du**2/dgn_rk(l)**2) \
-                     + -2*eN/l**3 \
-                     +  2*cL/l
-            Jpp    = lambda l: 8*l**2 * np.sum(pad_rk(s**4) * du**2/dgn_rk(l)**3) \
-                     +  6*eN/l**4 \
-                     + -2*cL/l**2
-            # Find inflation factor (optimize)
-            l1 = Newton_m(Jp,Jpp,1.0)
-            #l1 = fmin_bfgs(J, x0=[1], gtol=1e-4, disp=0)
-            #l1 = minimize_scalar(J, bracket=(sqrt(prior_mode), 1e2), tol=1e-4).x
-        else:
-            # Primal form, in a fully linearized version.
-            za     = lambda w: N1*cL/(eN + w@w) # zeta_a
-            J      = lambda w: .5*np.sum(( (dy-w@Y)@R.sym_sqrt_inv.T)**2 ) + \
-                               .5*N1*cL*log(eN + w@w)
-            # Derivatives (not required with fmin_bfgs):
-            Jp     = lambda w: -Y@R.inv@(dy-w@Y) + N1*cL*w/(eN + w@w)
-            #Jpp   = lambda w:  Y@R.inv@Y.T + za(w)*(eye(N) - 2*np.outer(w,w)/(eN + w@w))
-            #Jpp   = lambda w:  Y@R.inv@Y.T + za(w)*eye(N) # approx: no radial-angular cross-deriv
-            nvrs   = lambda w: (V * (pad0(s**2,N) + za(w))**-1.0) @ V.T # inverse of Jpp-approx
-            # Find w (optimize)
-            wa     = Newton_m(Jp,nvrs,zeros(N),is_inverted=True)
-            #wa    = Newton_m(Jp,Jpp ,zeros(N))
-            #wa    = fmin_bfgs(J,zeros(N),Jp,disp=0)
-            l1     = sqrt(N1/za(wa))
-
-        # Uncomment to revert to ETKF
-        #l1 = 1.0
-
-        # Explicitly inflate prior => formulae look different from Boc15.
-        A *= l1
-        Y *= l1
-
-        # Compute sqrt update
-        Pw      = (V * dgn_N(l1)**(-1.0)) @ V.T
-        w       = dy@R.inv@Y.T@Pw
-        # For the anomalies:
-        if not Hess:
-          # Regular ETKF (i.e. sym sqrt) update (with inflation)
-          T     = (V * dgn_N(l1)**(-0.5)) @ V.T * sqrt(N1)
-          #     = (Y@R.inv@Y.T/N1 + eye(N))**(-0.5)
-        else:
-          # Also include angular-radial co-dependence.
-          Hw    = Y@R.inv@Y.T/N1 + eye(N) - 2*np.outer(w,w)/(eN + w@w)
-          T     = funm_psd(Hw, lambda x: x**-.5) # is there a sqrtm Woodbury?
-          
-        E = mu + w@A + T@A
-        E = post_process(E,infl,rot)
+        with stats.timed('analysis',k):
+          # Certainty (nu) estimation
+          if nu is 'adapt':
+            infls, nu_ = EnKF_N_adapt_nu(infls,stats.infl[kObs-1])
+          else:
+            nu_ = nu
+          E, l1, trHK = EnKF_N_analysis(E,h(E,t),h.noise,yy[kObs],nu_,g,dual,Hess)
+        with stats.timed('post',k):
+          E = post_process(E,infl,rot)
 
         stats.infl[kObs] = l1
-        stats.trHK[kObs] = (((l1*s)**2 + N1)**(-1.0)*s**2).sum()/h.noise.m
+        stats.trHK[kObs] = trHK/h.noise.m
 
       stats.assess(k,kObs,E=E)
+      stats.checkpoint(k,kObs,E=E,infls=infls)
   return assimilator
 
+def EnKF_N_analysis(E,hE,hnoise,y,nu,g=0,dual=True,Hess=False):
+  """
+  The EnKF-N analysis update, for a given (numeric) nu. See EnKF_N().
+  Returns E, the inflation factor (l1), and trHK (un-normalized).
+  """
+  R   = hnoise.C
+  N,m = E.shape
+
+  # EnKF-N constants
+  N1         = N-1      # Abbrev
+  eN_        = (N+1)/N  # Effect of unknown mean
+  cL_        = (N+g)/N1 # Coeff in front of log term
+  prior_mode = eN_/cL_  # Mode of l1 (un-corrected)
+
+  mu = mean(E,0)
+  A  = E - mu
+
+  hx = mean(hE,0)
+  Y  = hE-hx
+  dy = y - hx
+
+  V,s,UT = svd0  (R.whiten(Y))
+  du     = UT @ R.whiten(dy)
+  dgn_N  = lambda l: pad0( (l*s)**2, N ) + N1
+
+  # As a func of I-KH ("prior's weight"), adjust l1's mode towards 1.
+  # Note: I-HK = mean( dgn_N(1.0)**(-1) )/N ≈ 1/(1 + HBH/R).
+  I_KH  = mean( dgn_N(1.0)**(-1) )*N1 # Normalize by f.m ?
+  #I_KH = 1/(1 + (s**2).sum()/N1)     # Alternative: use tr(HBH/R).
+  mc    = sqrt(prior_mode**I_KH)      # "mode correction".
+
+  # Apply adjustments
+  eN = eN_*nu/mc
+  cL = cL_*nu*mc
+
+  if dual:
+      # Make dual cost function (in terms of l1)
+      pad_rk = lambda arr: pad0( arr, min(N,hnoise.m) )
+      dgn_rk = lambda l: pad_rk((l*s)**2) + N1
+      J      = lambda l:          np.sum(du**2/dgn_rk(l)) \
+               +    eN/l**2 \
+               +    cL*log(l**2)
+      # Derivatives (not required with minimize_scalar):
+      Jp     = lambda l: -2*l   * np.sum(pad_rk(s**2) * du**2/dgn_rk(l)**2) \
+               + -2*eN/l**3 \
+               +  2*cL/l
+      Jpp    = lambda l: 8*l**2 * np.sum(pad_rk(s**4) * du**2/dgn_rk(l)**3) \
+               +  6*eN/l**4 \
+               + -2*cL/l**2
+      # Find inflation factor (optimize)
+      l1 = Newton_m(Jp,Jpp,1.0)
+      #l1 = fmin_bfgs(J, x0=[1], gtol=1e-4, disp=0)
+      #l1 = minimize_scalar(J, bracket=(sqrt(prior_mode), 1e2), tol=1e-4).x
+  else:
+      # Primal form, in a fully linearized version.
+      za     = lambda w: N1*cL/(eN + w@w) # zeta_a
+      J      = lambda w: .5*np.sum(R.whiten(dy-w@Y)**2) + \
+                         .5*N1*cL*log(eN + w@w)
+      # Derivatives (not required with fmin_bfgs):
+      Jp     = lambda w: -R.solve(Y)@(dy-w@Y) + N1*cL*w/(eN + w@w)
+      #Jpp   = lambda w:  Y@R.inv@Y.T + za(w)*(eye(N) - 2*np.outer(w,w)/(eN + w@w))
+      #Jpp   = lambda w:  Y@R.inv@Y.T + za(w)*eye(N) # approx: no radial-angular cross-deriv
+      nvrs   = lambda w: (V * (pad0(s**2,N) + za(w))**-1.0) @ V.T # inverse of Jpp-approx
+      # Find w (optimize)
+      wa     = Newton_m(Jp,nvrs,zeros(N),is_inverted=True)
+      #wa    = Newton_m(Jp,Jpp ,zeros(N))
+      #wa    = fmin_bfgs(J,zeros(N),Jp,disp=0)
+      l1     = sqrt(N1/za(wa))
+
+  # Uncomment to revert to ETKF
+  #l1 = 1.0
+
+  # Explicitly inflate prior => formulae look different from Boc15.
+  A *= l1
+  Y *= l1
+
+  # Compute sqrt update
+  Pw      = (V * dgn_N(l1)**(-1.0)) @ V.T
+  w       = R.solve(dy)@Y.T@Pw
+  # For the anomalies:
+  if not Hess:
+    # Regular ETKF (i.e. sym sqrt) update (with inflation)
+    T     = (V * dgn_N(l1)**(-0.5)) @ V.T * sqrt(N1)
+    #     = (Y@R.inv@Y.T/N1 + eye(N))**(-0.5)
+  else:
+    # Also include angular-radial co-dependence.
+    Hw    = R.solve(Y)@Y.T/N1 + eye(N) - 2*np.outer(w,w)/(eN + w@w)
+    T     = funm_psd(Hw, lambda x: x**-.5) # is there a sqrtm Woodbury?
+
+  E = mu + w@A + T@A
+  trHK = (((l1*s)**2 + N1)**(-1.0)*s**2).sum()
+  return E, l1, trHK
+
+def EnKF_N_adapt_nu(infls,l1_prev,L=40):
+  """
+  Certainty (nu) estimation for EnKF_N(nu='adapt'),
+  based on the (memorized) past L inflation values.
+  Returns infls (updated FIFO) and nu.
+  """
+  if infls is None: infls = 1+sqrt(0.082)*randn(L) # Init st. nu becomes 1
+  else:             infls = roll_n_sub(infls,l1_prev,0) # FIFO
+  weights  = arange(L,0,-1) / (L*(L+1)/2) # 1,2,...L normalized
+  infl_var = weights@(infls - weights@infls)**2
+  nu_ = 0.75-0.1*log(infl_var) # Empirisism based on L95 experiments
+  nu_ = max(0.64,nu_)
+  return infls, nu_
+
+
 # It is necessary to have a prior mode lower than 1:
 #   This sets up "tension" (negative feedback) in the inflation cycle:
 #   the prior pulls downwards, while the likelihood tends to pull upwards.
@@ -733,6 +984,290 @@ def EnKF_N(N,dual=True,Hess=False,g=0,nu=1.0,infl=1.0,rot=False,**kwargs):
 # Mode correction obviously becomes necessary, however, when R-->infty,
 # because then there should be no ensemble update (and also no inflation!).
 
+
+
+###########################################
+# Batched repetitions
+###########################################
+def assimilate_repeats(config,setup,xx,yy,nRepeat):
+  """
+  Assimilate nRepeat independent repetitions of config (EnKF or EnKF_N),
+  carrying their ensembles as one (nRepeat,N,m) array.
+  This removes most of the python overhead (per time step),
+  which dominates for small models (e.g. Lorenz63/84/95).
+  The assessments are also batched (assess_ens_batch).
+  Speedup (vs. repeating config.assimilate()) measured for Lorenz63.sak12,
+  T=100, EnKF('Sqrt',N=10), nRepeat=10: about 6x.
+
+  - xx,yy: shared by all repetitions (2D),
+           or one per repetition (3D, stacked along axis 0).
+  The models (f,h) are called with the flattened (nRepeat*N,m) ensemble.
+
+  Returns a list of nRepeat Stats. The repetitions are statistically
+  (but not sample-wise) equivalent to repeating config.assimilate().
+  """
+  name = config.da_method.__name__
+  if name not in ['EnKF','EnKF_N']:
+    raise NotImplementedError("Batched repetitions of " + name)
+
+  prm  = _settings(config)
+  if name == 'EnKF_N' and (not prm('dual') or prm('Hess') or prm('nu')=='adapt'):
+    raise NotImplementedError("Batched EnKF_N only supports dual=True, "+\
+        "Hess=False, and numeric nu.")
+
+  f,h,chrono,X0 = setup.f, setup.h, setup.t, setup.X0
+  N, R          = config.N, h.noise
+  if f.noise.C is not 0 and getattr(config,'fnoise_treatm','Stoch')!='Stoch':
+    raise NotImplementedError("Batched repetitions only support 'Stoch' noise.")
+
+  if xx.ndim == 2:
+    xx = np.broadcast_to(xx, (nRepeat,)+xx.shape)
+    yy = np.broadcast_to(yy, (nRepeat,)+yy.shape)
+  assert len(xx) == len(yy) == nRepeat
+
+  # If config.store_dir: store each repetition in its own sub-dir
+  cfgs  = [config.update_settings(store_dir=os.path.join(config.store_dir,str(r)))
+      if config.store_dir else config for r in range(nRepeat)]
+  stats = [Stats(cfgs[r],setup,xx[r],yy[r]) for r in range(nRepeat)]
+  flat  = lambda E: E.reshape((nRepeat*N,-1))
+  stck  = lambda E: E.reshape((nRepeat,N,-1))
+
+  timed = lambda phase,k: timed_batch(stats,phase,k)
+
+  # Init
+  E = stck(X0.sample(nRepeat*N))
+  assess_ens_batch(stats,0,E=E)
+
+  # Loop. As in assimilate(), failures return the stats in their current state.
+  try:
+    for k,kObs,t,dt in progbar(chrono.forecast_range,name+' x'+str(nRepeat)):
+      with timed('forecast',k):
+        E = stck(f(flat(E),t-dt,dt))
+      with timed('noise',k):
+        if f.noise.C is not 0:
+          E += sqrt(dt)*stck(f.noise.sample(nRepeat*N))
+
+      if kObs is not None:
+        assess_ens_batch(stats,k,kObs,'f',E=E)
+        with timed('analysis',k):
+          hE = stck(h(flat(E),t))
+          y  = yy[:,kObs]
+          if name == 'EnKF':
+            E, trHK = EnKF_analysis_batch(E,hE,R,y,prm('upd_a'))
+          else:
+            E, trHK, l1 = EnKF_N_analysis_batch(E,hE,R,y,prm('g'),prm('nu'))
+            for r in range(nRepeat): stats[r].infl[kObs] = l1[r]
+          for r in range(nRepeat): stats[r].trHK[kObs] = trHK[r]/R.m
+        with timed('post',k):
+          E = post_process_batch(E,prm('infl'),prm('rot'))
+
+      assess_ens_batch(stats,k,kObs,E=E)
+  except (AssimFailedError,ValueError) as err:
+    for s in stats: s.assess_wait(reraise=False)
+    print_assim_failure(err)
+
+  for s in stats:
+    s.assess_wait()
+    s.store_meta()
+  return stats
+
+
+def _settings(config):
+  "Getter of config settings, with defaults from the signature of its da_method."
+  dflts = inspect.signature(config.da_method).parameters
+  return lambda key: getattr(config, key, dflts[key].default)
+
+# Batched linear algebra. Arrays are stacked along axis 0.
+def _T(A): return A.swapaxes(-1,-2)
+
+def _sym_fun(V,d):
+  "Return V @ diag(d) @ V.T (batched)."
+  return (V * d[:,None,:]) @ _T(V)
+
+def EnKF_analysis_batch(E,hE,hnoise,y,upd_a):
+  """
+  Batched version of EnKF_analysis(), for E of shape (nRepeat,N,m).
+  Supports upd_a: 'Sqrt' (by eigh), 'PertObs', 'DEnKF'.
+  Returns E and trHK (un-normalized).
+  """
+  R     = hnoise.C
+  nR,N,m = E.shape
+
+  mu = mean(E,1,keepdims=True)
+  A  = E - mu
+  hx = mean(hE,1,keepdims=True)
+  Y  = hE - hx
+  dy = y[:,None,:] - hx
+
+  if 'PertObs' in upd_a or 'DEnKF' == upd_a:
+    YC = mrdiv_obs(Y, Y, R, N-1)
+    KG = _T(A) @ YC
+    if 'PertObs' in upd_a:
+      D  = hnoise.sample(nR*N).reshape((nR,N,-1))
+      D  = (D - mean(D,1,keepdims=True))*sqrt(N/(N-1)) # center()
+      E  = E + (y[:,None,:] + D - hE) @ _T(KG)
+    else:
+      E  = E + dy @ _T(KG) - 0.5*(Y @ _T(KG))
+    trHK = np.sum(Y*YC, axis=(1,2)) # = trace(Y.T @ YC)
+  elif 'Sqrt' in upd_a:
+    YRi  = R.solve(Y)
+    d,V  = nla.eigh(YRi @ _T(Y) + (N-1)*eye(N))
+    T    = _sym_fun(V,d**(-0.5)) * sqrt(N-1)
+    Pw   = _sym_fun(V,d**(-1.0))
+    w    = dy @ _T(YRi) @ Pw
+    E    = mu + w@A + T@A
+    trHK = np.sum( (d-(N-1))/d, 1) # = trace(R.inv@Y.T@Pw@Y)
+  else:
+    raise KeyError("No batched analysis update method found: '" + upd_a + "'.") 
+  return E, trHK
+
+def EnKF_N_analysis_batch(E,hE,hnoise,y,g,nu):
+  """
+  Batched version of the (dual, Hess=False) EnKF_N analysis,
+  for E of shape (nRepeat,N,m).
+  Returns E, trHK (un-normalized), and the inflation factors (l1).
+  """
+  R      = hnoise.C
+  nR,N,m = E.shape
+  N1     = N-1
+
+  # EnKF-N constants
+  eN_        = (N+1)/N
+  cL_        = (N+g)/N1
+  prior_mode = eN_/cL_
+
+  mu = mean(E,1,keepdims=True)
+  A  = E - mu
+  hx = mean(hE,1,keepdims=True)
+  YR = R.whiten(hE - hx)
+  dR = R.whiten(y[:,None,:] - hx)
+
+  V,s,UT = nla.svd(YR, full_matrices=(N>hnoise.m)) # as svd0()
+  du     = (dR @ _T(UT))[:,0]
+  pad_N  = lambda arr: np.pad(arr, ((0,0),(0,N-arr.shape[1])), 'constant')
+  dgn_N  = lambda l: pad_N( (l[:,None]*s)**2 ) + N1
+  dgn_rk = lambda l:        (l[:,None]*s)**2   + N1
+
+  # Mode correction
+  I_KH = mean( dgn_N(ones(nR))**(-1), 1 )*N1
+  mc   = sqrt(prior_mode**I_KH)
+  eN   = eN_*nu/mc
+  cL   = cL_*nu*mc
+
+  # Derivatives of the dual cost function (in terms of l1)
+  Jp  = lambda l: -2*l   * np.sum(s**2 * du**2/dgn_rk(l)**2, 1) \
+                + -2*eN/l**3 + 2*cL/l
+  Jpp = lambda l: 8*l**2 * np.sum(s**4 * du**2/dgn_rk(l)**3, 1) \
+                +  6*eN/l**4 - 2*cL/l**2
+  l1  = Newton_m_batch(Jp,Jpp,ones(nR))
+
+  # Compute sqrt update (with explicit inflation)
+  A  *= l1[:,None,None]
+  YR *= l1[:,None,None]
+  Pw  = _sym_fun(V,dgn_N(l1)**(-1.0))
+  T   = _sym_fun(V,dgn_N(l1)**(-0.5)) * sqrt(N1)
+  w   = dR @ _T(YR) @ Pw
+  E   = mu + w@A + T@A
+
+  trHK = np.sum( ((l1[:,None]*s)**2 + N1)**(-1.0)*s**2, 1)
+  return E, trHK, l1
+
+def Newton_m_batch(fun,deriv,x0,xtol=1e-4,ytol=1e-7,itermax=10**2):
+  """
+  Newton_m() for independent scalar problems, vectorized.
+  Each element stops (as in Newton_m) by its own criteria.
+  """
+  x0  = x0.copy()
+  Jx  = fun(x0)
+  dx  = np.full_like(x0,np.inf)
+  itr = 0
+  act = (ytol<abs(Jx)) & (xtol<abs(dx))
+  while act.any() and itr<itermax:
+    dx      = np.where(act, Jx/deriv(x0), 0)
+    x0     -= dx
+    Jx      = np.where(act, fun(x0), Jx)
+    act    &= (ytol<abs(Jx)) & (xtol<abs(dx))
+    itr    += 1
+  return x0
+
+def post_process_batch(E,infl,rot):
+  "Batched version of post_process()."
+  if infl!=1.0 or rot:
+    nR,N,m = E.shape
+    mu = mean(E,1,keepdims=True)
+    A  = infl*(E - mu)
+    if rot:
+      A = np.array([genOG_1(N,rot) for _ in range(nR)]) @ A
+    E = mu + A
+  return E
+
+
+
+###########################################
+# Streaming
+###########################################
+def stream(config,twin,obs_iter,E=None,moments=True):
+  """
+  Online (streaming) assimilation with config (EnKF, EnKF_N, or LETKF).
+
+  For each y from obs_iter: forecast the ensemble through one obs cycle
+  (dkObs steps of dt), assimilate y, and yield the analysis.
+  Thus obs can be fed as they arrive (and obs_iter may be endless).
+  Memory does not grow with the number of cycles: no Stats are kept,
+  and only dt and dkObs are used from twin.t (not K or T).
+
+  - E: initial ensemble. Default: twin.X0.sample(N).
+  - moments: yield Bunch(kObs,t,mu,spread,trHK) (and infl for EnKF_N).
+             If False, yield the ensemble (E) instead of mu, spread.
+  Example:
+  >>> for a in stream(config,setup,iter(yy)):
+  >>>   print(a.t, a.mu)
+  """
+  name = config.da_method.__name__
+  if name not in ['EnKF','EnKF_N','LETKF']:
+    raise NotImplementedError("Streaming with " + name)
+  prm = _settings(config)
+
+  f,h       = twin.f, twin.h
+  dt, dkObs = twin.t.dt, twin.t.dkObs
+
+  if E is None:
+    E = twin.X0.sample(config.N)
+  infls = l1 = None # For EnKF_N(nu='adapt')
+
+  for kObs,y in enumerate(obs_iter):
+    # Forecast
+    for k in kObs*dkObs + arange(1,dkObs+1):
+      t, t_ = k*dt, (k-1)*dt # as in Chronology.tt
+      E = f(E,t_,t-t_)
+      E = add_noise(E, t-t_, f.noise, vars(config))
+
+    # Analysis
+    a  = Bunch(kObs=kObs,t=t)
+    hE = h(E,t)
+    if name == 'EnKF':
+      E, trHK = EnKF_analysis_trHK(E,hE,h.noise,y,prm('upd_a'))
+      a.trHK  = trHK/h.noise.m
+    elif name == 'EnKF_N':
+      nu = prm('nu')
+      if nu == 'adapt':
+        infls, nu = EnKF_N_adapt_nu(infls,l1)
+      E, l1, trHK = EnKF_N_analysis(E,hE,h.noise,y,nu,
+          prm('g'),prm('dual'),prm('Hess'))
+      a.infl = l1
+      a.trHK = trHK/h.noise.m
+    else:
+      locf_at   = h.loc_f(prm('loc_rad'), 'x2y', t, prm('taper'))
+      E, a.trHK = LETKF_analysis(E,hE,h.noise,y,locf_at,prm('approx'))
+    E = post_process(E,prm('infl'),prm('rot'))
+
+    if moments:
+      a.mu     = mean(E,0)
+      a.spread = np.std(E,0,ddof=1)
+    else:
+      a.E      = E
+    yield a
+
 @DA_Config
 def iEnKS(upd_a,N,Lag=1,iMax=10,nu=1.0,bundle=False,infl=1.0,rot=False,**kwargs):
   """
@@ -817,34 +1352,36 @@ def iEnKS(upd_a,N,Lag=1,iMax=10,nu=1.0,bundle=False,infl=1.0,rot=False,**kwargs)
             E = xf + w @ Af + T @ Af                # Current estimate of E[kObs-Lag]
             for kDAW in DAW:                        # Loop Lag cycles
               for k,t,dt in chrono.obs_range(kDAW): # Loop dkObs steps (1 cycle)
-                E = f(E,t-dt,dt)                    # Forecast 1 dt step (1 dkObs)
+                with stats.timed('forecast',k):
+                  E = f(E,t-dt,dt)                    # Forecast 1 dt step (1 dkObs)
             if iteration==0:
               stats.assess(k,kObs,'f',E=E)
 
             # Analysis of y[kObs] (already assim'd [:kObs])
-            y    = yy[kObs]
-            Y,hx = anom(h(E,t))
-            # "Uncondition" the observation anomalies
-            # (and yet this linearization of h improves with iterations)
-            Y  = Tinv @ Y
-            # Transform obs space
-            Y  = Y        @ R.sym_sqrt_inv.T
-            dy = (y - hx) @ R.sym_sqrt_inv.T
-            # Prepare analysis: do SVD
-            V,s,UT = svd0(Y)
-            za     = zeta_a(s,w)
-            # Gauss-Newton ingredients
-            grad = -Y@dy + w*za
-            Pw   = (V * (pad0(s**2,N) + za)**-1.0) @ V.T
-            # Linearization improvement
-            T    = (V * (pad0(s**2,N) + za)**-0.5) @ V.T * sqrt(N1)
-            Tinv = (V * (pad0(s**2,N) + za)**+0.5) @ V.T / sqrt(N1)
-            # Gauss-Newton step
-            dw   = Pw@grad
-            w   -= dw
-            # Stopping condition
-            if np.linalg.norm(dw) < N*1e-4:
-              break
+            with stats.timed('analysis',k):
+              y    = yy[kObs]
+              Y,hx = anom(h(E,t))
+              # "Uncondition" the observation anomalies
+              # (and yet this linearization of h improves with iterations)
+              Y  = Tinv @ Y
+              # Transform obs space
+              Y  = R.whiten(Y)
+              dy = R.whiten(y - hx)
+              # Prepare analysis: do SVD
+              V,s,UT = svd0(Y)
+              za     = zeta_a(s,w)
+              # Gauss-Newton ingredients
+              grad = -Y@dy + w*za
+              Pw   = (V * (pad0(s**2,N) + za)**-1.0) @ V.T
+              # Linearization improvement
+              T    = (V * (pad0(s**2,N) + za)**-0.5) @ V.T * sqrt(N1)
+              Tinv = (V * (pad0(s**2,N) + za)**+0.5) @ V.T / sqrt(N1)
+              # Gauss-Newton step
+              dw   = Pw@grad
+              w   -= dw
+              # Stopping condition
+              if np.linalg.norm(dw) < N*1e-4:
+                break
 
         # Analysis 'a' stats for E[kObs].
         stats.assess(k,kObs,'a',E=E)
@@ -854,19 +1391,22 @@ def iEnKS(upd_a,N,Lag=1,iMax=10,nu=1.0,bundle=False,infl=1.0,rot=False,**kwargs)
 
         # Final (smoothed) estimate of E[kObs-Lag]
         E = xf + w @ Af + T @ Af
-        E = post_process(E,infl,rot)
+        with stats.timed('post',k):
+          E = post_process(E,infl,rot)
 
         # Forecast smoothed ensemble by shift (1*dkObs)
         if DAW_0 >= 0:
           for k,t,dt in chrono.obs_range(DAW_0):
             stats.assess(k-1,None,'u',E=E)
-            E = f(E,t-dt,dt)
+            with stats.timed('forecast',k):
+              E = f(E,t-dt,dt)
 
     # Assess the last (Lag-1) obs ranges
     for kDAW in arange(DAW[0]+1,KObs+1):
       for k,t,dt in chrono.obs_range(kDAW):
         stats.assess(k-1,None,'u',E=E)
-        E = f(E,t-dt,dt)
+        with stats.timed('forecast',k):
+          E = f(E,t-dt,dt)
     stats.assess(chrono.K,None,'u',E=E)
 
   return assimilator
@@ -936,8 +1476,7 @@ def BnKF(N,infl=1.0,rot=False,**kwargs):
     # Unpack
     f,h,chrono,X0  = twin.f, twin.h, twin.t, twin.X0
 
-    Rm12 = h.noise.C.sym_sqrt_inv
-    Ri   = h.noise.C.inv
+    R    = h.noise.C
 
     # constants
     nu = N-1
@@ -953,83 +1492,87 @@ def BnKF(N,infl=1.0,rot=False,**kwargs):
     stats.assess(0,E=E)
 
     for k,kObs,t,dt in progbar(chrono.forecast_range):
-      E = f(E,t-dt,dt)
-      E = add_noise(E, dt, f.noise, kwargs)
+      with stats.timed('forecast',k):
+        E = f(E,t-dt,dt)
+      with stats.timed('noise',k):
+        E = add_noise(E, dt, f.noise, kwargs)
 
       if kObs is not None:
         stats.assess(k,kObs,'f',E=E)
-        hE = h(E,t)
-        y  = yy[kObs]
-
-        mu = mean(E,0)
-        A  = E - mu
-
-        hx = mean(hE,0)
-        Y  = hE-hx
-        dy = y - hx
-
-        #  V,s,U_T = svd0( Y @ Rm12.T )
-
-        #  # Compute ETKF (sym sqrt) update
-        #  l1      = 1.0
-        #  dgn     = lambda l: pad0( (l*s)**2, N ) + (N-1)
-        #  Pw      = (V * dgn(l1)**(-1.0)) @ V.T
-        #  w       = dy@Ri@Y.T@Pw
-        #  T       = (V * dgn(l1)**(-0.5)) @ V.T * sqrt(N-1)
-
-        #  E = mu + w@A + T@A
+        with stats.timed('analysis',k):
+          hE = h(E,t)
+          y  = yy[kObs]
 
-        # Prepare
-        V,s,_  = svd0( Y @ Rm12.T ) 
-        target = invm( Y@Ri@Y.T/nu + eye(N) ) # = nu*Pwn
+          mu = mean(E,0)
+          A  = E - mu
 
-        dC = np.zeros((N,N))
-        def resulting_Pw(rr):
+          hx = mean(hE,0)
+          Y  = hE-hx
+          dy = y - hx
+
+          #  V,s,U_T = svd0( Y @ Rm12.T )
+
+          #  # Compute ETKF (sym sqrt) update
+          #  l1      = 1.0
+          #  dgn     = lambda l: pad0( (l*s)**2, N ) + (N-1)
+          #  Pw      = (V * dgn(l1)**(-1.0)) @ V.T
+          #  w       = dy@Ri@Y.T@Pw
+          #  T       = (V * dgn(l1)**(-0.5)) @ V.T * sqrt(N-1)
+
+          #  E = mu + w@A + T@A
+
+          # Prepare
+          V,s,_  = svd0( R.whiten(Y) )
+          target = invm( R.solve(Y)@Y.T/nu + eye(N) ) # = nu*Pwn
+
+          dC = np.zeros((N,N))
+          def resulting_Pw(rr):
+            for n in arange(N):
+              dn      = y-hE[n]
+              an      = nu*rr[n]/bb[n]
+              #xn    += A@Y.T @ invm( Y@Y.T + an*R ) @ (y-xn+noise)
+              #Pwn    = invm( Y.T @ Ri @ Y/an + eye(N))/an
+              dgn     = pad0(s**2,N) + an
+              Pwn     = ( V * dgn**(-1.0) ) @ V.T
+              dC[:,n] = IN[:,n] + Pwn@Y@R.solve(dn)
+            Ca = dC @ PiC @ dC.T
+            return Ca
+
+          def inpT(logr):
+            assert len(logr)==(N-1)
+            rr = np.hstack([exp(logr), N])
+            rr*= np.sum(1/rr)
+            return rr
+
+          def r2(x):
+            rr = inpT(x[:-1])
+            Ca = resulting_Pw(rr)
+            diff = diag(  target - (Ca + x[-1]*Pi1)  )
+            return diff
+
+          x0  = np.hstack([log(N*ones(N-1)), 1])
+          sol = opt.root(r2, x0, method='lm', options={'maxiter':1000})
+          rr_ = inpT(sol.x[:-1])
+
+          #print(inpT(sol.x[:-1]))
+          #print(r2(sol.x))
+
+          # Get PertObs-EnKF
+          #D   = center(h.noise.sample(N))
+          #rr_ = N*ones(N)
+          
           for n in arange(N):
-            dn      = y-hE[n]
-            an      = nu*rr[n]/bb[n]
-            #xn    += A@Y.T @ invm( Y@Y.T + an*R ) @ (y-xn+noise)
-            #Pwn    = invm( Y.T @ Ri @ Y/an + eye(N))/an
+            dn      = y-hE[n] # + D[n]
+            an      = nu*rr_[n]/bb[n]
+            dg0     = pad0(s**2,N) + nu
             dgn     = pad0(s**2,N) + an
             Pwn     = ( V * dgn**(-1.0) ) @ V.T
-            dC[:,n] = IN[:,n] + Pwn@Y@Ri@dn
-          Ca = dC @ PiC @ dC.T
-          return Ca
-
-        def inpT(logr):
-          assert len(logr)==(N-1)
-          rr = np.hstack([exp(logr), N])
-          rr*= np.sum(1/rr)
-          return rr
-
-        def r2(x):
-          rr = inpT(x[:-1])
-          Ca = resulting_Pw(rr)
-          diff = diag(  target - (Ca + x[-1]*Pi1)  )
-          return diff
-
-        x0  = np.hstack([log(N*ones(N-1)), 1])
-        sol = opt.root(r2, x0, method='lm', options={'maxiter':1000})
-        rr_ = inpT(sol.x[:-1])
-
-        #print(inpT(sol.x[:-1]))
-        #print(r2(sol.x))
-
-        # Get PertObs-EnKF
-        #D   = center(h.noise.sample(N))
-        #rr_ = N*ones(N)
-          
-        for n in arange(N):
-          dn      = y-hE[n] # + D[n]
-          an      = nu*rr_[n]/bb[n]
-          dg0     = pad0(s**2,N) + nu
-          dgn     = pad0(s**2,N) + an
-          Pwn     = ( V * dgn**(-1.0) ) @ V.T
-          E[n]   += A.T@Pwn@Y@Ri@dn
-          bb[n]   = mean(dg0/dgn*rr_[n])
-        bb *= np.sum(1/bb)
-
-        E = post_process(E,infl,rot)
+            E[n]   += A.T@Pwn@Y@R.solve(dn)
+            bb[n]   = mean(dg0/dgn*rr_[n])
+          bb *= np.sum(1/bb)
+
+        with stats.timed('post',k):
+          E = post_process(E,infl,rot)
       stats.assess(k,kObs,E=E,w=1/bb) # TODO
   return assimilator
 
@@ -1070,7 +1613,7 @@ def PartFilt(N,NER=1.0,resampl='Sys',reg=0,nuj=True,qroot=1.0,wroot=1.0,**kwargs
 
   def assimilator(stats,twin,xx,yy):
     f,h,chrono,X0 = twin.f, twin.h, twin.t, twin.X0
-    m, Rm12       = f.m, h.noise.C.sym_sqrt_inv
+    m, R          = f.m, h.noise.C
 
     E = X0.sample(N)
     w = 1/N*ones(N)
@@ -1080,34 +1623,41 @@ def PartFilt(N,NER=1.0,resampl='Sys',reg=0,nuj=True,qroot=1.0,wroot=1.0,**kwargs
     stats.innovs = np.full((chrono.KObs+1,N,h.m),nan)
     stats.assess(0,E=E,w=1/N)
 
-    for k,kObs,t,dt in progbar(chrono.forecast_range):
-      E = f(E,t-dt,dt)
-      if f.noise.C is not 0:
-        D  = randn((N,m))
-        E += sqrt(dt*qroot)*(D@f.noise.C.Right)
+    tckr = chrono.forecast_range
+    E, w = stats.resume(tckr,E=E,w=w)
+    for k,kObs,t,dt in progbar(tckr):
+      with stats.timed('forecast',k):
+        E = f(E,t-dt,dt)
+      with stats.timed('noise',k):
+        if f.noise.C is not 0:
+          D  = randn((N,m))
+          E += sqrt(dt*qroot)*f.noise.C.colour(D)
 
-        if qroot != 1.0:
-          # Evaluate p/q (for each col of D) when q:=p**(1/qroot).
-          w *= exp(-0.5*np.sum(D**2, axis=1) * (1 - 1/qroot))
-          w /= w.sum()
+          if qroot != 1.0:
+            # Evaluate p/q (for each col of D) when q:=p**(1/qroot).
+            w *= exp(-0.5*np.sum(D**2, axis=1) * (1 - 1/qroot))
+            w /= w.sum()
 
       if kObs is not None:
         stats.assess(k,kObs,'f',E=E,w=w)
 
-        innovs = (yy[kObs] - h(E,t)) @ Rm12.T
-        w      = reweight(w,uni_innovs=innovs)
+        with stats.timed('analysis',k):
+          innovs = R.whiten(yy[kObs] - h(E,t))
+          w      = reweight(w,uni_innovs=innovs)
 
         stats.assess(k,kObs,'a',E=E,w=w)
-        if trigger_resampling(w,NER,stats,kObs):
-          C12    = reg*bandw(N,m)*raw_C12(E,w)
-          #C12  *= sqrt(rroot) # Re-include?
-          idx,w  = resample(w, resampl, wroot=wroot)
-          E,chi2 = regularize(C12,E,idx,nuj)
-          #if rroot != 1.0:
-            # Compensate for rroot
-            #w *= exp(-0.5*chi2*(1 - 1/rroot))
-            #w /= w.sum()
+        with stats.timed('resample',k):
+          if trigger_resampling(w,NER,stats,kObs):
+            C12    = reg*bandw(N,m)*raw_C12(E,w)
+            #C12  *= sqrt(rroot) # Re-include?
+            idx,w  = resample(w, resampl, wroot=wroot)
+            E,chi2 = regularize(C12,E,idx,nuj)
+            #if rroot != 1.0:
+              # Compensate for rroot
+              #w *= exp(-0.5*chi2*(1 - 1/rroot))
+              #w /= w.sum()
       stats.assess(k,kObs,'u',E=E,w=w)
+      stats.checkpoint(k,kObs,E=E,w=w)
   return assimilator
 
 
@@ -1131,7 +1681,7 @@ def OptPF(N,Qs,NER=1.0,resampl='Sys',reg=0,nuj=True,wroot=1.0,**kwargs):
   """
   def assimilator(stats,twin,xx,yy):
     f,h,chrono,X0 = twin.f, twin.h, twin.t, twin.X0
-    m, R          = f.m, h.noise.C.full
+    m, R          = f.m, h.noise.C
 
     E = X0.sample(N)
     w = 1/N*ones(N)
@@ -1140,42 +1690,50 @@ def OptPF(N,Qs,NER=1.0,resampl='Sys',reg=0,nuj=True,wroot=1.0,**kwargs):
     stats.resmpl = zeros(chrono.KObs+1,dtype=bool)
     stats.assess(0,E=E,w=1/N)
 
-    for k,kObs,t,dt in progbar(chrono.forecast_range):
-      E = f(E,t-dt,dt)
-      if f.noise.C is not 0:
-        E += sqrt(dt)*(randn((N,m))@f.noise.C.Right)
+    tckr = chrono.forecast_range
+    E, w = stats.resume(tckr,E=E,w=w)
+    for k,kObs,t,dt in progbar(tckr):
+      with stats.timed('forecast',k):
+        E = f(E,t-dt,dt)
+      with stats.timed('noise',k):
+        if f.noise.C is not 0:
+          E += sqrt(dt)*f.noise.C.colour(randn((N,m)))
 
       if kObs is not None:
         stats.assess(k,kObs,'f',E=E,w=w)
-        y = yy[kObs]
-
-        hE = h(E,t)
-        innovs = y - hE
-
-        # EnKF-ish update
-        s   = Qs*bandw(N,m)
-        As  = s*raw_C12(E,w)
-        Ys  = s*raw_C12(hE,w)
-        C   = Ys.T@Ys + R
-        KG  = As.T@mrdiv(Ys,C)
-        E  += sample_quickly_with(As)[0]
-        D   = h.noise.sample(N)
-        dE  = KG @ (y-h(E,t)+D).T
-        E   = E + dE.T
-
-        # Importance weighting
-        chi2   = innovs*mldiv(C,innovs.T).T
-        logL   = -0.5 * np.sum(chi2, axis=1)
-        w      = reweight(w,logL=logL)
+        with stats.timed('analysis',k):
+          y = yy[kObs]
+
+          hE = h(E,t)
+          innovs = y - hE
+
+          # EnKF-ish update
+          s   = Qs*bandw(N,m)
+          As  = s*raw_C12(E,w)
+          Ys  = s*raw_C12(hE,w)
+          # With C = Ys.T@Ys + R: YsC = Ys@inv(C), IC = innovs@inv(C).
+          YsC,IC = np.split(mrdiv_obs(np.vstack([Ys,innovs]),Ys,R), [len(Ys)])
+          KG  = As.T@YsC
+          E  += sample_quickly_with(As)[0]
+          D   = h.noise.sample(N)
+          dE  = KG @ (y-h(E,t)+D).T
+          E   = E + dE.T
+
+          # Importance weighting
+          chi2   = innovs*IC
+          logL   = -0.5 * np.sum(chi2, axis=1)
+          w      = reweight(w,logL=logL)
         
         # Resampling
         stats.assess(k,kObs,'a',E=E,w=w)
-        if trigger_resampling(w,NER,stats,kObs):
-          C12    = reg*bandw(N,m)*raw_C12(E,w)
-          idx,w  = resample(w, resampl, wroot=wroot)
-          E,_    = regularize(C12,E,idx,nuj)
+        with stats.timed('resample',k):
+          if trigger_resampling(w,NER,stats,kObs):
+            C12    = reg*bandw(N,m)*raw_C12(E,w)
+            idx,w  = resample(w, resampl, wroot=wroot)
+            E,_    = regularize(C12,E,idx,nuj)
 
       stats.assess(k,kObs,'u',E=E,w=w)
+      stats.checkpoint(k,kObs,E=E,w=w)
   return assimilator
 
 @DA_Config
@@ -1195,7 +1753,7 @@ def PFxN_EnKF(N,Qs,xN,re_use=True,NER=1.0,resampl='Sys',wroot_max=5,**kwargs):
   """
   def assimilator(stats,twin,xx,yy):
     f,h,chrono,X0 = twin.f, twin.h, twin.t, twin.X0
-    m, Rm12, Ri   = f.m, h.noise.C.sym_sqrt_inv, h.noise.C.inv
+    m, R          = f.m, h.noise.C
 
     E = X0.sample(N)
     w = 1/N*ones(N)
@@ -1208,89 +1766,93 @@ def PFxN_EnKF(N,Qs,xN,re_use=True,NER=1.0,resampl='Sys',wroot_max=5,**kwargs):
     stats.assess(0,E=E,w=1/N)
 
     for k,kObs,t,dt in progbar(chrono.forecast_range):
-      E = f(E,t-dt,dt)
-      if f.noise.C is not 0:
-        E += sqrt(dt)*(randn((N,m))@f.noise.C.Right)
+      with stats.timed('forecast',k):
+        E = f(E,t-dt,dt)
+      with stats.timed('noise',k):
+        if f.noise.C is not 0:
+          E += sqrt(dt)*f.noise.C.colour(randn((N,m)))
 
       if kObs is not None:
         stats.assess(k,kObs,'f',E=E,w=w)
-        y  = yy[kObs]
-        hE = h(E,t)
-        wD = w.copy()
+        with stats.timed('analysis',k):
+          y  = yy[kObs]
+          hE = h(E,t)
+          wD = w.copy()
 
-        # Importance weighting
-        innovs = (y - hE) @ Rm12.T
-        w      = reweight(w,uni_innovs=innovs)
+          # Importance weighting
+          innovs = R.whiten(y - hE)
+          w      = reweight(w,uni_innovs=innovs)
         
         # Resampling
         stats.assess(k,kObs,'a',E=E,w=w)
-        if trigger_resampling(w,NER,stats,kObs):
-          # Weighted covariance factors
-          Aw = raw_C12(E,wD)
-          Yw = raw_C12(hE,wD)
-
-          # EnKF-without-pertubations update
-          if N>m:
-            C       = Yw.T @ Yw + h.noise.C.full
-            KG      = mrdiv(Aw.T@Yw,C)
-            cntrs   = E + (y-hE)@KG.T
-            Pa      = Aw.T@Aw - KG@Yw.T@Aw
-            P_cholU = funm_psd(Pa, sqrt)
-            if DD is None or not re_use:
-              DD    = randn((N*xN,m))
-              chi2  = np.sum(DD**2, axis=1) * m/N
-              log_q = -0.5 * chi2
-          else:
-            V,sig,UT = svd0( Yw @ Rm12.T )
-            dgn      = pad0( sig**2, N ) + 1
-            Pw       = (V * dgn**(-1.0)) @ V.T
-            cntrs    = E + (y-hE)@Ri@Yw.T@Pw@Aw
-            P_cholU  = (V*dgn**(-0.5)).T @ Aw
-            # Generate N·xN random numbers from NormDist(0,1), and compute
-            # log(q(x))
-            if DD is None or not re_use:
-              rnk   = min(m,N-1)
-              DD    = randn((N*xN,N))
-              chi2  = np.sum(DD**2, axis=1) * rnk/N
-              log_q = -0.5 * chi2
-            #NB: the DoF_linalg/DoF_stoch correction is only correct "on average".
-            # It is inexact "in proportion" to V@V.T-Id, where V,s,UT = tsvd(Aw).
-            # Anyways, we're computing the tsvd of Aw below, so might as well
-            # compute q(x) instead of q(xi).
-
-          # Duplicate
-          ED  = cntrs.repeat(xN,0)
-          wD  = wD.repeat(xN) / xN
-
-          # Sample q
-          AD = DD@P_cholU
-          ED = ED + AD
-
-          # log(prior_kernel(x))
-          s         = Qs*bandw(N,m)
-          innovs_pf = AD @ tinv(s*Aw)
-          # NB: Correct: innovs_pf = (ED-E_orig) @ tinv(s*Aw)
-          #     But it seems to make no difference on well-tuned performance !
-          log_pf    = -0.5 * np.sum(innovs_pf**2, axis=1)
-
-          # log(likelihood(x))
-          innovs = (y - h(ED,t)) @ Rm12.T
-          log_L  = -0.5 * np.sum(innovs**2, axis=1)
-
-          # Update weights
-          log_tot = log_L + log_pf - log_q
-          wD      = reweight(wD,logL=log_tot)
-
-          # Resample and reduce
-          wroot = 1.0
-          while wroot < wroot_max:
-            idx,w  = resample(wD, resampl, wroot=wroot, N=N)
-            dups   = sum(mask_unique_of_sorted(idx))
-            if dups == 0:
-              E = ED[idx]
-              break
+        with stats.timed('resample',k):
+          if trigger_resampling(w,NER,stats,kObs):
+            # Weighted covariance factors
+            Aw = raw_C12(E,wD)
+            Yw = raw_C12(hE,wD)
+
+            # EnKF-without-pertubations update
+            if N>m:
+              C       = Yw.T @ Yw + h.noise.C.full
+              KG      = mrdiv(Aw.T@Yw,C)
+              cntrs   = E + (y-hE)@KG.T
+              Pa      = Aw.T@Aw - KG@Yw.T@Aw
+              P_cholU = funm_psd(Pa, sqrt)
+              if DD is None or not re_use:
+                DD    = randn((N*xN,m))
+                chi2  = np.sum(DD**2, axis=1) * m/N
+                log_q = -0.5 * chi2
             else:
-              wroot += 0.1
+              V,sig,UT = svd0( R.whiten(Yw) )
+              dgn      = pad0( sig**2, N ) + 1
+              Pw       = (V * dgn**(-1.0)) @ V.T
+              cntrs    = E + R.solve(y-hE)@Yw.T@Pw@Aw
+              P_cholU  = (V*dgn**(-0.5)).T @ Aw
+              # Generate N·xN random numbers from NormDist(0,1), and compute
+              # log(q(x))
+              if DD is None or not re_use:
+                rnk   = min(m,N-1)
+                DD    = randn((N*xN,N))
+                chi2  = np.sum(DD**2, axis=1) * rnk/N
+                log_q = -0.5 * chi2
+              #NB: the DoF_linalg/DoF_stoch correction is only correct "on average".
+              # It is inexact "in proportion" to V@V.T-Id, where V,s,UT = tsvd(Aw).
+              # Anyways, we're computing the tsvd of Aw below, so might as well
+              # compute q(x) instead of q(xi).
+
+            # Duplicate
+            ED  = cntrs.repeat(xN,0)
+            wD  = wD.repeat(xN) / xN
+
+            # Sample q
+            AD = DD@P_cholU
+            ED = ED + AD
+
+            # log(prior_kernel(x))
+            s         = Qs*bandw(N,m)
+            innovs_pf = AD @ tinv(s*Aw)
+            # NB: Correct: innovs_pf = (ED-E_orig) @ tinv(s*Aw)
+            #     But it seems to make no difference on well-tuned performance !
+            log_pf    = -0.5 * np.sum(innovs_pf**2, axis=1)
+
+            # log(likelihood(x))
+            innovs = R.whiten(y - h(ED,t))
+            log_L  = -0.5 * np.sum(innovs**2, axis=1)
+
+            # Update weights
+            log_tot = log_L + log_pf - log_q
+            wD      = reweight(wD,logL=log_tot)
+
+            # Resample and reduce
+            wroot = 1.0
+            while wroot < wroot_max:
+              idx,w  = resample(wD, resampl, wroot=wroot, N=N)
+              dups   = sum(mask_unique_of_sorted(idx))
+              if dups == 0:
+                E = ED[idx]
+                break
+              else:
+                wroot += 0.1
       stats.assess(k,kObs,'u',E=E,w=w)
   return assimilator
 
@@ -1306,7 +1868,7 @@ def PFxN(N,Qs,xN,re_use=True,NER=1.0,resampl='Sys',wroot_max=5,**kwargs):
   """
   def assimilator(stats,twin,xx,yy):
     f,h,chrono,X0 = twin.f, twin.h, twin.t, twin.X0
-    m, Rm12       = f.m, h.noise.C.sym_sqrt_inv
+    m, R          = f.m, h.noise.C
 
     DD = None
     E  = X0.sample(N)
@@ -1317,47 +1879,51 @@ def PFxN(N,Qs,xN,re_use=True,NER=1.0,resampl='Sys',wroot_max=5,**kwargs):
     stats.assess(0,E=E,w=1/N)
 
     for k,kObs,t,dt in progbar(chrono.forecast_range):
-      E = f(E,t-dt,dt)
-      if f.noise.C is not 0:
-        E += sqrt(dt)*(randn((N,m))@f.noise.C.Right)
+      with stats.timed('forecast',k):
+        E = f(E,t-dt,dt)
+      with stats.timed('noise',k):
+        if f.noise.C is not 0:
+          E += sqrt(dt)*f.noise.C.colour(randn((N,m)))
 
       if kObs is not None:
         stats.assess(k,kObs,'f',E=E,w=w)
-        y  = yy[kObs]
-        wD = w.copy()
+        with stats.timed('analysis',k):
+          y  = yy[kObs]
+          wD = w.copy()
 
-        innovs = (y - h(E,t)) @ Rm12.T
-        w      = reweight(w,uni_innovs=innovs)
+          innovs = R.whiten(y - h(E,t))
+          w      = reweight(w,uni_innovs=innovs)
 
         stats.assess(k,kObs,'a',E=E,w=w)
-        if trigger_resampling(w,NER,stats,kObs):
-          # Compute kernel colouring matrix
-          cholR = Qs*bandw(N,m)*raw_C12(E,wD)
-          cholR = chol_reduce(cholR)
-
-          # Generate N·xN random numbers from NormDist(0,1)
-          if DD is None or not re_use:
-            DD = randn((N*xN,m))
-
-          # Duplicate and jitter
-          ED  = E.repeat(xN,0)
-          wD  = wD.repeat(xN) / xN
-          ED += DD[:,:len(cholR)]@cholR
-
-          # Update weights
-          innovs = (y - h(ED,t)) @ Rm12.T
-          wD     = reweight(wD,uni_innovs=innovs)
-
-          # Resample and reduce
-          wroot = 1.0
-          while wroot < wroot_max:
-            idx,w = resample(wD, resampl, wroot=wroot, N=N)
-            dups  = sum(mask_unique_of_sorted(idx))
-            if dups == 0:
-              E = ED[idx]
-              break
-            else:
-              wroot += 0.1
+        with stats.timed('resample',k):
+          if trigger_resampling(w,NER,stats,kObs):
+            # Compute kernel colouring matrix
+            cholR = Qs*bandw(N,m)*raw_C12(E,wD)
+            cholR = chol_reduce(cholR)
+
+            # Generate N·xN random numbers from NormDist(0,1)
+            if DD is None or not re_use:
+              DD = randn((N*xN,m))
+
+            # Duplicate and jitter
+            ED  = E.repeat(xN,0)
+            wD  = wD.repeat(xN) / xN
+            ED += DD[:,:len(cholR)]@cholR
+
+            # Update weights
+            innovs = R.whiten(y - h(ED,t))
+            wD     = reweight(wD,uni_innovs=innovs)
+
+            # Resample and reduce
+            wroot = 1.0
+            while wroot < wroot_max:
+              idx,w = resample(wD, resampl, wroot=wroot, N=N)
+              dups  = sum(mask_unique_of_sorted(idx))
+              if dups == 0:
+                E = ED[idx]
+                break
+              else:
+                wroot += 0.1
       stats.assess(k,kObs,'u',E=E,w=w)
   return assimilator
 
@@ -1601,15 +2167,19 @@ def EnCheat(upd_a,N,infl=1.0,rot=False,**kwargs):
     stats.assess(0,E=E)
 
     for k,kObs,t,dt in progbar(chrono.forecast_range):
-      E = f(E,t-dt,dt)
-      E = add_noise(E, dt, f.noise, kwargs)
+      with stats.timed('forecast',k):
+        E = f(E,t-dt,dt)
+      with stats.timed('noise',k):
+        E = add_noise(E, dt, f.noise, kwargs)
 
       if kObs is not None:
         # Standard EnKF analysis
-        hE = h(E,t)
-        y  = yy[kObs]
-        E  = EnKF_analysis(E,hE,h.noise,y,upd_a,stats,kObs)
-        E  = post_process(E,infl,rot)
+        with stats.timed('analysis',k):
+          hE = h(E,t)
+          y  = yy[kObs]
+          E  = EnKF_analysis(E,hE,h.noise,y,upd_a,stats,kObs)
+        with stats.timed('post',k):
+          E  = post_process(E,infl,rot)
 
         # Cheating (only used for stats)
         w,res,_,_ = sla.lstsq(E.T, xx[k])
@@ -1680,11 +2250,13 @@ def OptInterp(**kwargs):
 
     for k,kObs,t,dt in progbar(chrono.forecast_range):
       # Forecast
-      mu = f(mu,t-dt,dt)
+      with stats.timed('forecast',k):
+        mu = f(mu,t-dt,dt)
       if kObs is not None:
         stats.assess(k,kObs,'f',mu=muC,Cov=PC)
         # Analysis
-        mu = muC + KG@(yy[kObs] - h(muC,t))
+        with stats.timed('analysis',k):
+          mu = muC + KG@(yy[kObs] - h(muC,t))
       stats.assess(k,kObs,mu=mu,Cov=2*PC*WaveC(k,kObs))
   return assimilator
 
@@ -1718,22 +2290,24 @@ def Var3D(infl=1.0,**kwargs):
 
     for k,kObs,t,dt in progbar(chrono.forecast_range):
       # Forecast
-      mu = f(mu,t-dt,dt)
-      P  = 2*PC*WaveC(k)
+      with stats.timed('forecast',k):
+        mu = f(mu,t-dt,dt)
+        P  = 2*PC*WaveC(k)
 
       if kObs is not None:
         stats.assess(k,kObs,'f',mu=mu,Cov=P)
         # Analysis
-        P *= infl
-        H  = h.jacob(mu,t)
-        KG = mrdiv(P@H.T, H@P@H.T + h.noise.C.full)
-        KH = KG@H
-        mu = mu + KG@(yy[kObs] - h(mu,t))
-
-        # Re-calibrate wave_crest with new W0 = Pa/(2*PC).
-        # Note: obs innovations are not used to estimate P!
-        Pa    = (eye(f.m) - KH) @ P
-        WaveC = wave_crest(trace(Pa)/trace(2*PC),CorrL)
+        with stats.timed('analysis',k):
+          P *= infl
+          H  = h.jacob(mu,t)
+          KG = mrdiv(P@H.T, H@P@H.T + h.noise.C.full)
+          KH = KG@H
+          mu = mu + KG@(yy[kObs] - h(mu,t))
+
+          # Re-calibrate wave_crest with new W0 = Pa/(2*PC).
+          # Note: obs innovations are not used to estimate P!
+          Pa    = (eye(f.m) - KH) @ P
+          WaveC = wave_crest(trace(Pa)/trace(2*PC),CorrL)
 
       stats.assess(k,kObs,mu=mu,Cov=2*PC*WaveC(k,kObs))
   return assimilator
@@ -1766,11 +2340,13 @@ def Var3D_Lag(infl=1.0,**kwargs):
 
     for k,kObs,t,dt in progbar(chrono.forecast_range):
       # Forecast
-      mu = f(mu,t-dt,dt)
+      with stats.timed('forecast',k):
+        mu = f(mu,t-dt,dt)
       if kObs is not None:
         stats.assess(k,kObs,'f',mu=mu,Cov=PC)
         # Analysis
-        mu = mu + KG@(yy[kObs] - h(mu,t))
+        with stats.timed('analysis',k):
+          mu = mu + KG@(yy[kObs] - h(mu,t))
       stats.assess(k,kObs,mu=mu,Cov=PC)
   return assimilator
 
@@ -1826,56 +2402,76 @@ def wave_crest(W0,L):
 
 # TODO: Clean up
 @DA_Config
-def ExtRTS(infl=1.0,**kwargs):
+def ExtRTS(infl=1.0,stride=None,**kwargs):
   """
+  The extended Rauch-Tung-Striebel (or "two-pass") smoother.
+
+  If stride: the filter states are recomputed in the backward pass
+  (rather than stored), as described for EnRTS.
   """
   def assimilator(stats,twin,xx,yy):
     f,h,chrono,X0 = twin.f, twin.h, twin.t, twin.X0
+    K  = chrono.K
 
     R  = h.noise.C.full
     Q  = 0 if f.noise.C==0 else f.noise.C.full
 
-    mu    = zeros((chrono.K+1,f.m))
-    P     = zeros((chrono.K+1,f.m,f.m))
-
-    # Forecasted values
-    muf   = zeros((chrono.K+1,f.m))
-    Pf    = zeros((chrono.K+1,f.m,f.m))
-    Ff    = zeros((chrono.K+1,f.m,f.m))
-
-    mu[0] = X0.mu
-    P [0] = X0.C.full
+    def cycle(x,k,kObs,t,dt,recompute=False):
+      "Forecast (and analysis), from k-1 to k. Returns (muf,Pf,F)[k], (mu,P)[k]."
+      timed, assess = quiet_stats(stats,recompute)
+      mu, P = x
+      with timed('forecast',k):
+        F  = f.jacob(mu,t-dt,dt) 
+        mu = f(mu,t-dt,dt)
+        P  = infl**(dt)*FPFT(F,P) + dt*Q
+      xf = (mu, P, F) # Forecast (and Jacobian)
 
-    stats.assess(0,mu=mu[0],Cov=P[0])
+      if kObs is not None:
+        assess(k,kObs,'f',mu=mu,Cov=P)
+        with timed('analysis',k):
+          H  = h.jacob(mu,t)
+          KG = mrdiv(P @ H.T, H@P@H.T + R)
+          y  = yy[kObs]
+          mu = mu + KG@(y - h(mu,t))
+          P  = P - KG@(H@P) # = (I-KH)@P, in O(m^2 p)
+        assess(k,kObs,'a',mu=mu,Cov=P)
+      return xf, (mu, P)
+
+    x = (X0.mu, X0.C.full)
+    stats.assess(0,mu=x[0],Cov=x[1])
+    if stride:
+      ckpts = {0: (x, np.random.get_state())}
+    else:
+      xa = [x] + [None]*K # Filter      states (mu,P)
+      xf = [None]*(K+1)   # Forecasted states (mu,P,F)
 
     # Forward pass
     for k,kObs,t,dt in progbar(chrono.forecast_range, 'ExtRTS->'):
-      mu[k]  = f(mu[k-1],t-dt,dt)
-      F      = f.jacob(mu[k-1],t-dt,dt) 
-      P [k]  = infl**(dt)*(F@P[k-1]@F.T) + dt*Q
-
-      # Store forecast and Jacobian
-      muf[k] = mu[k]
-      Pf [k] = P [k]
-      Ff [k] = F
-
-      if kObs is not None:
-        stats.assess(k,kObs,'f',mu=mu[k],Cov=P[k])
-        H     = h.jacob(mu[k],t)
-        KG    = mrdiv(P[k] @ H.T, H@P[k]@H.T + R)
-        y     = yy[kObs]
-        mu[k] = mu[k] + KG@(y - h(mu[k],t))
-        KH    = KG@H
-        P[k]  = (eye(f.m) - KH) @ P[k]
-        stats.assess(k,kObs,'a',mu=mu[k],Cov=P[k])
-
-    # Backward pass
-    for k in progbar(range(chrono.K)[::-1],'ExtRTS<-'):
-      J     = mrdiv(P[k]@Ff[k+1].T, Pf[k+1])
-      mu[k] = mu[k]  + J @ (mu[k+1]  - muf[k+1])
-      P[k]  = P[k] + J @ (P[k+1] - Pf[k+1]) @ J.T
-    for k in progbar(range(chrono.K+1),desc='Assess'):
-      stats.assess(k,mu=mu[k],Cov=P[k])
+      x_f, x = cycle(x,k,kObs,t,dt)
+      if not stride:
+        xf[k], xa[k] = x_f, x
+      elif k%stride == 0:
+        ckpts[k] = (x, np.random.get_state())
+
+    # Backward pass (assessed in descending order)
+    stats.restart_series('u',descending=True)
+    stats.assess(K,mu=x[0],Cov=x[1])
+    k0 = K if stride else 0 # Start (k) of the current segment
+    for k in progbar(range(K)[::-1],'ExtRTS<-'):
+      if k < k0:
+        k1, k0    = k0, k - k%stride
+        with stats.timed('recompute',k):
+          xa, xf  = recompute_segment(cycle, chrono, ckpts[k0], k0, k1)
+        xa[k1-k0] = x # Smoothed
+      with stats.timed('smoother',k):
+        mu , P     = xa[k-k0]
+        muf, Pf, F = xf[k+1-k0]
+        J  = mrdiv(PFT(P,F), Pf)
+        mu = mu + J @ (x[0] - muf)
+        P  = P  + J @ (x[1] - Pf) @ J.T
+        x  = (mu, P)
+      xa[k-k0] = None # Free
+      stats.assess(k,mu=mu,Cov=P)
 
   return assimilator
 
@@ -1906,27 +2502,31 @@ def ExtKF(infl=1.0,**kwargs):
 
     stats.assess(0,mu=mu,Cov=P)
 
-    for k,kObs,t,dt in progbar(chrono.forecast_range):
+    tckr  = chrono.forecast_range
+    mu, P = stats.resume(tckr,mu=mu,P=P)
+    for k,kObs,t,dt in progbar(tckr):
       
-      mu = f(mu,t-dt,dt)
-      F  = f.jacob(mu,t-dt,dt) 
-      P  = infl**(dt)*(F@P@F.T) + dt*Q
+      with stats.timed('forecast',k):
+        mu = f(mu,t-dt,dt)
+        F  = f.jacob(mu,t-dt,dt) 
+        P  = infl**(dt)*FPFT(F,P) + dt*Q
 
       # Of academic interest? Higher-order linearization:
       # mu_i += 0.5 * (Hessian[f_i] * P).sum()
 
       if kObs is not None:
         stats.assess(k,kObs,'f',mu=mu,Cov=P)
-        H  = h.jacob(mu,t)
-        KG = mrdiv(P @ H.T, H@P@H.T + R)
-        y  = yy[kObs]
-        mu = mu + KG@(y - h(mu,t))
-        KH = KG@H
-        P  = (eye(f.m) - KH) @ P
+        with stats.timed('analysis',k):
+          H  = h.jacob(mu,t)
+          KG = mrdiv(P @ H.T, H@P@H.T + R)
+          y  = yy[kObs]
+          mu = mu + KG@(y - h(mu,t))
+          P  = P - KG@(H@P) # = (I-KH)@P, in O(m^2 p)
 
-        stats.trHK[kObs] = trace(KH)/f.m
+        stats.trHK[kObs] = trace(H@KG)/f.m # = trace(KH)
 
       stats.assess(k,kObs,mu=mu,Cov=P)
+      stats.checkpoint(k,kObs,mu=mu,P=P)
   return assimilator
 
 
@@ -1934,7 +2534,7 @@ def ExtKF(infl=1.0,**kwargs):
 
 
 @DA_Config
-def LNETF(loc_rad,N,taper='GC',infl=1.0,Rs=1.0,rot=False,**kwargs):
+def LNETF(loc_rad,N,taper='GC',infl=1.0,Rs=1.0,nproc=None,rot=False,**kwargs):
   """
   The Nonlinear-Ensemble-Transform-Filter (localized).
 
@@ -1946,51 +2546,74 @@ def LNETF(loc_rad,N,taper='GC',infl=1.0,Rs=1.0,rot=False,**kwargs):
   Settings for reproducing literature benchmarks may be found in
   mods/Lorenz95/tod15.py
   mods/Lorenz95/wiljes2017.py
+
+  If nproc: the local analyses are done in parallel, as for the LETKF.
   """
   def assimilator(stats,twin,xx,yy):
     f,h,chrono,X0 = twin.f, twin.h, twin.t, twin.X0
-    Rm12 = h.noise.C.sym_sqrt_inv
+    R       = h.noise.C
+    laplace = 'laplace' in str(type(h.noise)).lower()
 
     E = X0.sample(N)
     stats.assess(0,E=E)
 
-    for k,kObs,t,dt in progbar(chrono.forecast_range):
-      E = f(E,t-dt,dt)
-      E = add_noise(E, dt, f.noise, kwargs)
+    tckr = chrono.forecast_range
+    E    = stats.resume(tckr,E=E)
+    for k,kObs,t,dt in progbar(tckr):
+      with stats.timed('forecast',k):
+        E = f(E,t-dt,dt)
+      with stats.timed('noise',k):
+        E = add_noise(E, dt, f.noise, kwargs)
 
       if kObs is not None:
         stats.assess(k,kObs,'f',E=E)
-        mu = mean(E,0)
-        A  = E - mu
-
-        hE = h(E,t)
-        hx = mean(hE,0)
-        YR = (hE-hx)  @ Rm12.T
-        yR = (yy[kObs] - hx) @ Rm12.T
-
-        locf_at = h.loc_f(loc_rad, 'x2y', t, taper)
-        for i in range(f.m):
-          # Localize
-          local, coeffs = locf_at(i)
-          if len(local) == 0: continue
-          iY  = YR[:,local] * sqrt(coeffs)
-          idy = yR[local]   * sqrt(coeffs)
-
-          # NETF:
-          # This "paragraph" is the only difference to the LETKF.
-          innovs = (idy-iY)/Rs
-          if 'laplace' in str(type(h.noise)).lower():
-            w    = laplace_lklhd(innovs)
-          else: # assume Gaussian
-            w    = reweight(ones(N),uni_innovs=innovs)
-          dmu    = w@A[:,i]
-          AT     = sqrt(N)*funm_psd(diag(w) - np.outer(w,w), sqrt)@A[:,i]
-
-          E[:,i] = mu[i] + dmu + AT
-        E = post_process(E,infl,rot)
+        with stats.timed('analysis',k):
+          mu = mean(E,0)
+          A  = E - mu
+
+          hE = h(E,t)
+          hx = mean(hE,0)
+          YR = R.whiten(hE-hx)
+          yR = R.whiten(yy[kObs] - hx)
+
+          locf_at = h.loc_f(loc_rad, 'x2y', t, taper)
+          if nproc:
+            E, _ = local_analyses_in_parallel(_LNETF_tile,
+                E,mu,A,YR,yR,locf_at,nproc,Rs=Rs,laplace=laplace)
+          else:
+            LNETF_local_analyses(E,mu,A,YR,yR,locf_at,arange(f.m),Rs,laplace)
+        with stats.timed('post',k):
+          E = post_process(E,infl,rot)
       stats.assess(k,kObs,E=E)
+      stats.checkpoint(k,kObs,E=E)
   return assimilator
 
+def LNETF_local_analyses(E,mu,A,YR,yR,locf_at,ii,Rs=1.0,laplace=False):
+  "The local analyses of LNETF for the state components ii, written into E[:,ii]."
+  N = len(E)
+  for i in ii:
+    # Localize
+    local, coeffs = locf_at(i)
+    if len(local) == 0: continue
+    iY  = YR[:,local] * sqrt(coeffs)
+    idy = yR[local]   * sqrt(coeffs)
+
+    # NETF:
+    # This "paragraph" is the only difference to the LETKF.
+    innovs = (idy-iY)/Rs
+    if laplace:
+      w    = laplace_lklhd(innovs)
+    else: # assume Gaussian
+      w    = reweight(ones(N),uni_innovs=innovs)
+    dmu    = w@A[:,i]
+    AT     = sqrt(N)*funm_psd(diag(w) - np.outer(w,w), sqrt)@A[:,i]
+
+    E[:,i] = mu[i] + dmu + AT
+
+def _LNETF_tile(ws,i0,i1,**kwargs):
+  locf_at = LocTable(ws.indptr,ws.inds,ws.coeffs)
+  LNETF_local_analyses(ws.E,ws.mu,ws.A,ws.YR,ws.yR,locf_at,arange(i0,i1),**kwargs)
+
 def laplace_lklhd(xx):
   """
   Compute likelihood of xx wrt. the sampling distribution
@@ -0,0 +1,84 @@
+# Test the consistency of the CovMat kinds, i.e. that the (matrix-free)
+# products and properties agree with those of the dense (full) matrix.
+
+from common import *
+
+m   = 12
+rng = np.random.RandomState(3)
+d   = rng.rand(m) + 0.1
+
+def assert_consistent(C,F):
+  "Check C against its (dense) full matrix F."
+  assert np.allclose(C.full, F)
+  assert np.allclose(C.diag, diag(F))
+  w = eigh(F,eigvals_only=True)[::-1]
+  w = w[w>1e-8*w[0]]
+  assert C.rk == len(w)
+  assert np.allclose(C.ews, w)
+  # Right and colour (D @ Right)
+  X = C.colour(eye(C.len_Right))
+  assert np.allclose(X.T @ X, F)
+  assert np.allclose(C.Right.T @ C.Right, F)
+  assert np.allclose(C.sym_sqrt @ C.sym_sqrt, F)
+  if C.rk == m:
+    A = rng.randn(4,m)
+    assert np.allclose(C.solve(A), A @ inv(F))
+    assert np.allclose(C.whiten(A), A @ funm_psd(inv(F),sqrt))
+    assert np.allclose(C.whiten(A[0]), C.whiten(A)[0])
+
+def test_CovMat_diag():
+  d0       = d.copy(); d0[[2,5]] = 0 # Rank deficient
+  for data, kind in [(d,'diag'), (3*ones(m),'diag'), (d0,'diag'), (d,'full_or_diag')]:
+    C = CovMat(data,kind)
+    assert C.is_diag
+    assert_consistent(C, diag(data))
+  for F in [diag(d), 4*eye(m), diag(d0)]:
+    C = CovMat(F,'full')
+    assert C.is_diag and C.kind == 'full'
+    assert_consistent(C, F)
+
+def test_CovMat_dense():
+  E = rng.randn(20,m)
+  A = E - mean(E,0)
+  F = A.T @ A / 19
+  for C in [CovMat(F,'full'), CovMat(E,'E'), CovMat(A,'A'),
+      CovMat(A.T/sqrt(19),'Left'), CovMat(A/sqrt(19),'Right')]:
+    assert not C.is_diag
+    assert_consistent(C, F)
+  # Rank deficient
+  assert_consistent(CovMat(E[:5],'E'), CovMat(E[:5],'E').full)
+
+def test_CovMat_diag_sampling():
+  # The diagonal treatment of a 'full' does not change the samples,
+  # i.e. they are still coloured by the eigenvectors of eigh.
+  F    = diag(d)
+  w,V  = eigh(F)
+  seed(1); X0 = randn((5,m)) @ (V[:,::-1] * sqrt(w[::-1])).T
+  seed(1); X1 = GaussRV(C=F).sample(5)
+  assert np.array_equal(X0, X1)
+
+def test_CovMat_structured():
+  c     = exp(-np.minimum(arange(m),m-arange(m))**2/4)
+  band  = sp.sparse.diags([0.3*ones(m-1), 2*ones(m), 0.3*ones(m-1)], [-1,0,1])
+  P     = rng.permutation(m)
+  spd   = band.toarray()[P][:,P] # Not banded
+  LR    = rng.randn(3,m)
+  cases = [
+      (lambda: CovMat(c,'circulant')        , sla.circulant(c)),
+      (lambda: CovMat(band,'sparse')        , band.toarray()),
+      (lambda: CovMat(sp.sparse.csr_matrix(spd),'sparse'), spd),
+      (lambda: CovMat((LR,d),'Right+diag')  , LR.T@LR + diag(d)),
+      (lambda: CovMat((LR.T,d),'Left+diag') , LR.T@LR + diag(d)),
+      ]
+  for new,F in cases:
+    # The products (and rank) do not form the dense matrices
+    # (except colour for non-banded sparse, which needs a sqrt).
+    C = new()
+    C.solve(rng.randn(4,m)); C.rk
+    if C._is_structured:
+      C.colour(rng.randn(4,C.len_Right))
+    assert '_C' not in vars(C) and '_V' not in vars(C)
+    assert_consistent(new(),F)
+  # Rank-deficient circulant
+  c0 = np.fft.irfft(np.r_[1,1,0,0,1,1,1], m)
+  assert_consistent(CovMat(c0,'circulant'), sla.circulant(c0))
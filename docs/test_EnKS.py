@@ -0,0 +1,32 @@
+# Test the (ring-buffer) EnKS against storing the full ensemble time series.
+
+from common import *
+from da_methods import EnKF_analysis_trHK, add_noise, post_process, reshape_to, reshape_fr
+
+def EnKS_full(setup,yy,upd_a,N,tLag,infl=1.0,rot=False):
+  "Reference: the EnKS with storage of all of the ensembles. Returns their means."
+  f,h,chrono,X0 = setup.f, setup.h, setup.t, setup.X0
+  E    = zeros((chrono.K+1,N,f.m))
+  E[0] = X0.sample(N)
+  for k,kObs,t,dt in chrono.forecast_range:
+    E[k] = f(E[k-1],t-dt,dt)
+    E[k] = add_noise(E[k], dt, f.noise, {})
+    if kObs is not None:
+      kLag     = find_1st_ind(chrono.tt >= t-tLag)
+      kkLag    = range(kLag, k+1)
+      ELag     = reshape_to(E[kkLag])
+      ELag, _  = EnKF_analysis_trHK(ELag,h(E[k],t),h.noise,yy[kObs],upd_a)
+      E[kkLag] = reshape_fr(ELag,f.m)
+      E[k]     = post_process(E[k],infl,rot)
+  return array([ones(N)/N @ Ek for Ek in E]) # As in Stats.assess_ens
+
+def test_EnKS_ring_buffer():
+  from mods.Lorenz63.sak12 import setup
+  setup.t.T = 8
+  seed(1)
+  xx,yy = simulate(setup)
+  for upd_a, rot in [('Sqrt',True), ('PertObs',False)]:
+    for tLag in [0, 0.3, 1.0]:
+      seed(5); mu0 = EnKS_full(setup,yy,upd_a,10,tLag,1.02,rot)
+      seed(5); s   = EnKS(upd_a,N=10,tLag=tLag,infl=1.02,rot=rot,store_u=True).assimilate(setup,xx,yy)
+      assert np.array_equal(mu0, s.mu.u), (upd_a,tLag)
@@ -0,0 +1,32 @@
+# Test ExtKF and ExtRTS on Lorenz95 with m > m_sparse,
+# with the matrix-free (LinearOperator) Jacobian of dfdx_sparse.
+
+from common import *
+
+def setup_L95(m):
+  from mods.Lorenz95 import core
+  from mods.Lorenz95.core import step, dfdx_sparse, typical_init_params
+  assert m > core.m_sparse
+  t = Chronology(0.05,dkObs=1,T=2,BurnIn=0.5)
+  f = {'m': m, 'model': step, 'jacob': dfdx_sparse, 'noise': 0}
+  h = {'m': m, 'model': Id_op(), 'jacob': Id_mat(m), 'noise': 1}
+  return TwinSetup(f,h,t,GaussRV(*typical_init_params(m)))
+
+def test_dfdx_dense():
+  from mods.Lorenz95.core import dfdx, dfdx_sparse
+  x = randn(200)
+  F = dfdx(x,0,0.05)
+  assert isinstance(F,np.ndarray)
+  assert np.allclose(F, dfdx_sparse(x,0,0.05) @ eye(200))
+
+def test_ExtKF_ExtRTS():
+  setup = setup_L95(200)
+  assert isinstance(setup.f.jacob(setup.X0.mu,0,0.05), ssl.LinearOperator)
+  xx,yy = simulate(setup)
+  for config in [ExtKF(infl=1.05), ExtRTS(infl=1.05)]:
+    stats = config.assimilate(setup,xx,yy)
+    rmse  = stats.average_in_time()['rmse_a'].val
+    assert np.isfinite(rmse) and rmse < 1
+
+if __name__ == '__main__':
+  test_ExtKF_ExtRTS()
@@ -0,0 +1,77 @@
+# Test the batched (and parallel) local analyses of the LETKF
+# against the per-component loop (as done before batching).
+
+from common import *
+from mods.Lorenz95.sak08 import setup
+
+def LETKF_analysis_loop(E,hE,hnoise,y,locf_at,approx=False):
+  "Reference: one local analysis at a time."
+  R    = hnoise.C
+  N,m  = E.shape
+  E    = E.copy()
+  mu   = mean(E,0)
+  A    = E - mu
+  hx   = mean(hE,0)
+  YR   = R.whiten(hE-hx)
+  yR   = R.whiten(y - hx)
+  for i in range(m):
+    local, coeffs = locf_at(i)
+    if len(local) == 0: continue
+    iY  = YR[:,local] * sqrt(coeffs)
+    idy = yR[local]   * sqrt(coeffs)
+    if approx:
+      n   = N-1
+      B   = A[:,i]@A[:,i] / n
+      AY  = A[:,i]@iY
+      BmR = AY@AY.T
+      T2  = (1 + BmR/(B*n**2))**(-1)
+      AT  = sqrt(T2) * A[:,i]
+      P   = T2 * B
+      dmu = P*(AY/(n*B))@idy
+    else:
+      d,V = eigh(iY @ iY.T + (N-1)*eye(N))
+      T   = V@diag(d**(-0.5))@V.T * sqrt(N-1)
+      Pw  = V@diag(d**(-1.0))@V.T
+      AT  = T@A[:,i]
+      dmu = idy@iY.T@Pw@A[:,i]
+    E[:,i] = mu[i] + dmu + AT
+  return E
+
+def analysis_inputs(N):
+  seed(3)
+  f,h,t = setup.f, setup.h, 1.0
+  E     = 1 + 2*randn((N,f.m))
+  y     = h(zeros(f.m),t) + h.noise.sample(1)[0]
+  return E, h(E,t), h.noise, y, h.loc_f(4, 'x2y', t, 'GC')
+
+def test_LETKF_batch():
+  for N in [10,30]: # Local p < N, and p >= N
+    E,hE,R,y,locf_at = analysis_inputs(N)
+    for approx in [False,True]:
+      E0 = LETKF_analysis_loop(E,hE,R,y,locf_at,approx)
+      E1 = LETKF_analysis(E.copy(),hE,R,y,locf_at,approx)[0]
+      assert np.allclose(E0, E1, rtol=0, atol=1e-13), (N,approx)
+
+def test_LETKF_nproc():
+  try:
+    for N in [10,30]:
+      E,hE,R,y,locf_at = analysis_inputs(N)
+      E1,trHK1 = LETKF_analysis(E.copy(),hE,R,y,locf_at)
+      E2,trHK2 = LETKF_analysis(E.copy(),hE,R,y,locf_at,nproc=2)
+      assert np.allclose(E1, E2, rtol=0, atol=1e-13)
+      assert trHK1 == trHK2
+  finally:
+    close_tile_pool()
+
+def test_LNETF_nproc():
+  setup.t.T = 25
+  seed(1)
+  xx,yy = simulate(setup)
+  try:
+    ss = []
+    for nproc in [None,2]:
+      seed(5)
+      ss.append(LNETF(4,N=10,Rs=4.0,nproc=nproc).assimilate(setup,xx,yy))
+    assert np.allclose(ss[0].mu.a, ss[1].mu.a, rtol=0, atol=1e-12)
+  finally:
+    close_tile_pool()
@@ -0,0 +1,32 @@
+# Test the (vectorized) LorenzXY dxdt and the (sparse) dfdx.
+
+from common import *
+import mods.LorenzXY.core as core
+from mods.LorenzXY.core import nX, J, m, h, F, b, c, iiX, iiY
+
+def dxdt_loop(x):
+  "Reference: coupling by a loop over the X's."
+  s = lambda x,n: np.roll(x,-n,axis=-1)
+  X = x[:,:nX]
+  Y = x[:,nX:]
+  d = np.zeros_like(x)
+  d[:,:nX] = np.multiply(s(X,1)-s(X,-2),s(X,-1)) - X + F
+  for i in range(nX):
+    d[:,i] += -h*c/b * np.sum(Y[:,iiY[i]],1)
+  d[:,nX:] = -c*b*np.multiply(s(Y,2)-s(Y,-1),s(Y,1)) - c*Y + h*c/b * X[:,iiX]
+  return d
+
+def test_dxdt():
+  E = randn((5,m))
+  assert np.allclose(core.dxdt(E), dxdt_loop(E), rtol=1e-13)
+  assert np.allclose(core.dxdt(E[0]), dxdt_loop(E[:1])[0], rtol=1e-13)
+
+def test_dfdx():
+  x, dt, eps = randn(m), 0.005, 1e-6
+  M = core.dfdx(x,0,dt)
+  assert sp.sparse.issparse(M)
+  M = M.toarray()
+  # Finite differences of x + dt*dxdt (which is quadratic in x)
+  step = lambda x: x + dt*core.dxdt(x)
+  FD   = array([step(x+eps*e) - step(x-eps*e) for e in eye(m)]).T / (2*eps)
+  assert np.allclose(M, FD, rtol=0, atol=1e-8)
@@ -0,0 +1,36 @@
+# Test the (tile_map) ensemble stepping of the QG model against
+# the serial loop of step_1, using a stub of the compiled (fortran) model.
+# The module is imported in a tmp dir, so as not to write the
+# parameter file or the sample file (data/samples/QG_samples.npz) of DAPPER.
+
+from common import *
+import types
+
+def stub_step(t,psi,prm_filename):
+  "Stands in for fortran.step: some (nonlinear) in-place update of psi."
+  for _ in range(4):
+    psi += 0.01*(np.roll(psi,1,0)*np.roll(psi,-1,1) - psi) + 0.001
+
+def test_step_ens(tmp_path,monkeypatch):
+  root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+  monkeypatch.syspath_prepend(root)
+  monkeypatch.chdir(str(tmp_path))
+  os.makedirs('mods/QG/f90')
+  os.makedirs('data/samples')
+  np.savez('data/samples/QG_samples.npz', sample=zeros((1,1)))
+
+  stub = types.ModuleType('mods.QG.f90.py_mod')
+  stub.interface_mod = Bunch(step=stub_step)
+  monkeypatch.setitem(sys.modules, 'mods.QG.f90.py_mod', stub)
+  monkeypatch.delitem(sys.modules, 'mods.QG.core', raising=False)
+  import mods.QG.core as core
+  close_tile_pool() # The workers must be forked with the stub
+  try:
+    E  = np.random.RandomState(0).randn(7,core.m)
+    E1 = core.step(E, 0.0, core.dt)
+    E0 = array([core.step_1(x, 0.0, core.dt) for x in E])
+    assert np.array_equal(E1, E0)
+    assert not np.array_equal(E1, E)
+  finally:
+    close_tile_pool()
+    del sys.modules['mods.QG.core']
@@ -0,0 +1,37 @@
+# Test the checkpoint-and-recompute backward pass (stride) of the RTS smoothers
+# against full storage (stride=None).
+
+from common import *
+
+def smoothed(config,setup,xx,yy,**kwargs):
+  seed(5)
+  s = config.update_settings(store_u=True,**kwargs).assimilate(setup,xx,yy)
+  return s.mu.u, s.rmse.u
+
+def assert_stride_invariant(configs,setup):
+  seed(1)
+  xx,yy = simulate(setup)
+  for config in configs:
+    mu0, rmse0 = smoothed(config,setup,xx,yy)
+    assert np.all(np.isfinite(mu0)), config
+    for stride in [3,7]:
+      mu1, rmse1 = smoothed(config,setup,xx,yy,stride=stride)
+      assert np.array_equal(mu0, mu1), (config,stride)
+      assert np.array_equal(rmse0, rmse1)
+
+def test_RTS_stride():
+  from mods.Lorenz63.sak12 import setup
+  setup.t.T = 8
+  assert_stride_invariant([EnRTS('Sqrt',N=10,cntr=0.99,rot=True),
+    EnRTS('PertObs',N=10,cntr=0.99)], setup)
+
+def test_RTS_stride_with_model_noise():
+  # Without model noise, the (Ext) RTS gain is ill-conditioned for Lorenz63.
+  from mods.Lorenz63.sak12 import setup
+  setup.t.T = 8
+  noise0 = setup.f.noise
+  try:
+    setup.f.noise = GaussRV(C=0.1*eye(3))
+    assert_stride_invariant([ExtRTS(), EnRTS('PertObs',N=10,cntr=0.99)], setup)
+  finally:
+    setup.f.noise = noise0
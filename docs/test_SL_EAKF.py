@@ -0,0 +1,18 @@
+# Test the joint state-obs update of SL_EAKF against re-evaluating h for every obs.
+
+from common import *
+
+def test_SL_EAKF_joint_update():
+  # Direct obs: the obs-obs and state-obs localization coincide at the obs,
+  # so that the joint update is exact (to rounding).
+  from mods.Lorenz95.sak08 import setup
+  setup.t.T = 25
+  seed(1)
+  xx,yy = simulate(setup)
+  ss = []
+  for h_every in [None, 1, 5]:
+    seed(5)
+    ss.append(SL_EAKF(4,N=10,infl=1.04,h_every=h_every).assimilate(setup,xx,yy))
+  assert ss[0].average_in_time()['rmse_a'].val < 0.5
+  for s in ss[1:]:
+    assert np.allclose(ss[0].mu.a, s.mu.a, rtol=0, atol=1e-10)
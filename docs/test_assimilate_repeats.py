@@ -0,0 +1,37 @@
+# Test the batched repetitions (assimilate_repeats) against the individual assessments.
+
+from common import *
+
+def test_assess_ens_batch():
+  from mods.Lorenz63.sak12 import setup
+  setup.t.T = 8
+  seed(1)
+  xx,yy  = simulate(setup)
+  config = EnKF('Sqrt',N=10,store_u=True)
+  nR,N,m = 3, config.N, setup.f.m
+  ss0    = [Stats(config,setup,xx,yy) for r in range(nR)]
+  ss1    = [Stats(config,setup,xx,yy) for r in range(nR)]
+  for k,kObs,_,_ in [(0,None,0,0)] + list(setup.t.forecast_range)[:30]:
+    E = xx[k] + randn((nR,N,m))
+    for f_a_u in (['f',None] if kObs is not None else [None]):
+      for s,Er in zip(ss0,E): s.assess(k,kObs,f_a_u,E=Er)
+      assess_ens_batch(ss1,k,kObs,f_a_u,E)
+  for s0,s1 in zip(ss0,ss1):
+    for name in ['mu','var','mad','skew','kurt','err','rmv','rmse','logp_m','rh','svals','umisf']:
+      for sub in 'fau':
+        a0 = getattr(getattr(s0,name),sub)
+        a1 = getattr(getattr(s1,name),sub)
+        if name=='umisf': # The sign of the singular vectors is arbitrary
+          a0, a1 = abs(a0), abs(a1)
+        assert np.allclose(a0, a1, rtol=1e-10, atol=1e-12, equal_nan=True), (name,sub)
+
+def test_assimilate_repeats():
+  from mods.Lorenz63.sak12 import setup
+  setup.t.T = 8
+  seed(1)
+  xx,yy = simulate(setup)
+  ss    = assimilate_repeats(EnKF('Sqrt',N=10,infl=1.02),setup,xx,yy,4)
+  rmses = [s.average_in_time()['rmse_a'].val for s in ss]
+  assert np.all(np.isfinite(rmses))
+  assert np.mean(rmses) < 1
+  assert ss[0].t_assess.sum() > 0
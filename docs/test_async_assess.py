@@ -0,0 +1,19 @@
+# Test the asynchronous assessment (async_assess) against the synchronous one.
+
+from common import *
+
+def test_async_assess():
+  from mods.Lorenz63.sak12 import setup
+  setup.t.T = 8
+  seed(1)
+  xx,yy = simulate(setup)
+  keys  = ['rmse_a','rmse_f','rmv_a','logp_m_a','skew_f','kurt_a','rmse_u']
+  for config in [EnKF('Sqrt',N=10,infl=1.02), ExtKF(infl=1.05), EnKS('Sqrt',N=10,tLag=0.5)]:
+    config = config.update_settings(store_u=True)
+    seed(5); a0 = config.assimilate(setup,xx,yy).average_in_time()
+    seed(5); s1 = config.update_settings(async_assess=4).assimilate(setup,xx,yy)
+    assert not hasattr(s1,'_async') # The worker has been stopped
+    a1 = s1.average_in_time()
+    for key in keys:
+      assert np.isclose(a0[key].val , a1[key].val , rtol=1e-12, equal_nan=True), key
+      assert np.isclose(a0[key].conf, a1[key].conf, rtol=1e-12, equal_nan=True), key
@@ -0,0 +1,29 @@
+# Test average_each_field on the averages of different methods
+# (which need not have the same fields).
+
+from common import *
+
+def test_mixed_methods():
+  from mods.Lorenz63.sak12 import setup
+  setup.t.T = 8
+  cfgs  = List_of_Configs(EnKF('Sqrt',N=10), EnKF_N(N=10),
+      PartFilt(N=100,reg=2.4,NER=0.3), ExtKF(infl=1.05))
+  xx,yy = simulate(setup)
+  avrgs = np.empty((2,len(cfgs)),dict)
+  for i in range(2):
+    for j,config in enumerate(cfgs):
+      avrgs[i,j] = config.assimilate(setup,xx,yy).average_in_time()
+
+  # Average over repetitions (per method)
+  aa = average_each_field(avrgs,axis=0)
+  assert len(aa) == len(cfgs)
+  for a in aa:
+    assert 't_post' in a and 't_forecast' in a
+  print_averages(cfgs,aa,statkeys=['rmse_a','t_post'])
+
+  # Average over methods
+  aa = average_each_field(avrgs)
+  assert 'rmse_a' in aa[0]
+
+if __name__ == '__main__':
+  test_mixed_methods()
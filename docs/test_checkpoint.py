@@ -0,0 +1,48 @@
+# Test checkpointing: crash, resume, and cleanup.
+
+from common import *
+import stats as stats_module
+
+class Crash(Exception): pass
+
+def run(config,setup,xx,yy,sd,crash_at=None):
+  seed(sd)
+  if crash_at is None:
+    return config.assimilate(setup,xx,yy).average_in_time()['rmse_a'].val
+  assess = Stats.assess
+  def crashing(self,k,*args,**kwargs):
+    if k==crash_at: raise Crash
+    return assess(self,k,*args,**kwargs)
+  Stats.assess = crashing
+  try:
+    config.assimilate(setup,xx,yy)
+  except Crash:
+    pass
+  finally:
+    Stats.assess = assess
+
+def test_crash_resume_cleanup(tmp_path):
+  stats_module.CKPT_DIR = str(tmp_path)
+  from mods.Lorenz63.sak12 import setup
+  setup.t.T = 8
+  seed(1)
+  xx,yy  = simulate(setup)
+  config = EnKF('PertObs',N=10,infl=1.02,checkpoint=2)
+  listdir = lambda: [f for f in os.listdir(str(tmp_path)) if f.endswith('.pkl')]
+
+  ref = run(config,setup,xx,yy,3)
+  assert listdir() == [] # Removed on completion
+
+  run(config,setup,xx,yy,3,crash_at=setup.t.K//2)
+  assert len(listdir()) == 1
+
+  # Another seed must not resume the checkpoint (of seed 3)
+  other = run(config,setup,xx,yy,4)
+  assert len(listdir()) == 1
+  seed(4)
+  assert other == EnKF('PertObs',N=10,infl=1.02).assimilate(setup,xx,yy)\
+      .average_in_time()['rmse_a'].val
+
+  # The same seed resumes, and yields the uninterrupted result
+  assert run(config,setup,xx,yy,3) == ref
+  assert listdir() == []
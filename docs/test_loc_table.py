@@ -0,0 +1,57 @@
+# Test the localization tables (loc_table) against inds_and_coeffs.
+
+from common import *
+from tools.localization import loc_table, inds_and_coeffs, unravel
+import tools.localization as loc
+
+def assert_table_matches(cIJ, dIJ, shape, radius, tag, cutoff=None):
+  table = loc_table(cIJ, dIJ, shape, radius, cutoff=cutoff, tag=tag)
+  assert len(table) == cIJ.shape[1]
+  for i in range(cIJ.shape[1]):
+    inds0, coeffs0 = inds_and_coeffs(cIJ[:,i], dIJ, shape, radius, cutoff=cutoff, tag=tag)
+    inds1, coeffs1 = table(i)
+    assert np.array_equal(inds0, inds1), (tag,i)
+    assert np.allclose(coeffs0, coeffs1, rtol=1e-12, atol=0), (tag,i)
+
+def test_loc_table_1d():
+  m   = 40
+  dIJ = unravel(arange(m), m)
+  oIJ = unravel(arange(0,m,3), m)
+  for tag in ['GC','Step','Cubic','Quadro','Gauss','Exp']:
+    for cIJ, domain in [(dIJ,oIJ), (oIJ,dIJ), (oIJ,oIJ)]:
+      assert_table_matches(cIJ, domain, m, 3.3, tag)
+  # Infinite support (all pairs)
+  assert_table_matches(dIJ, oIJ, m, 3.3, 'Gauss', cutoff=0)
+
+def test_loc_table_2d():
+  shape = (12,10)
+  dIJ   = unravel(arange(np.prod(shape)), shape)
+  oIJ   = unravel(arange(0,np.prod(shape),7), shape)
+  for tag in ['GC','Step','Gauss']:
+    assert_table_matches(dIJ, oIJ, shape, 2.1, tag)
+
+def test_loc_table_memo():
+  m     = 40
+  dIJ   = unravel(arange(m), m)
+  table = loc_table(dIJ, dIJ, m, 2.0)
+  assert loc_table(dIJ.copy(), dIJ, m, 2.0) is table # Keyed on values
+  assert loc_table(dIJ, dIJ, m, 2.5) is not table
+  for r in range(loc.TABLES_MAXSIZE):
+    loc_table(dIJ, dIJ, m, 10+r)
+  assert len(loc._tables) == loc.TABLES_MAXSIZE # LRU eviction
+  assert loc_table(dIJ, dIJ, m, 2.0) is not table
+
+def test_neighbours():
+  "The KD-tree search against all (periodic) pairs."
+  from tools.localization import neighbours, _all_pairs
+  for shape, nd, nc in [((40,),40,14), ((12,10),120,20), ((6,5,4),120,9)]:
+    shape = np.atleast_1d(shape)
+    dIJ   = unravel(arange(nd), shape)
+    cIJ   = unravel(arange(0,nd,nd//nc), shape)
+    for dmax in [1.0, 2.5, 4.2]:
+      rows0, cols0, dists0 = _all_pairs(cIJ, dIJ, shape)
+      near  = dists0 <= dmax
+      rows1, cols1, dists1 = neighbours(cIJ, dIJ, shape, dmax)
+      assert np.array_equal(rows0[near], rows1)
+      assert np.array_equal(cols0[near], cols1)
+      assert np.allclose(dists0[near], dists1, rtol=1e-12)
@@ -0,0 +1,30 @@
+# Test mrdiv_obs (the obs- or ensemble-space solve of PertObs/DEnKF/OptPF)
+# against the direct (obs-space) solve.
+
+from common import *
+from da_methods import mrdiv_obs
+
+p   = 30
+rng = np.random.RandomState(3)
+d   = rng.rand(p) + 0.5
+
+def direct(B,Y,R,c):
+  return B @ inv(Y.T@Y + c*R.full)
+
+def test_mrdiv_obs():
+  band = sp.sparse.diags([0.3*ones(p-1), 2*ones(p), 0.3*ones(p-1)], [-1,0,1])
+  d0   = d.copy(); d0[3] = 0 # Singular R: obs-space solve
+  for R in [CovMat(d,'diag'), CovMat(2*eye(p)), CovMat(randcov(p)+eye(p)),
+      CovMat(band,'sparse'), CovMat((rng.randn(4,p),d),'Right+diag'),
+      CovMat(d0,'diag')]:
+    for N in [10, 40]: # Ensemble-space (Woodbury) if N<p and R invertible
+      Y = rng.randn(N,p)
+      B = rng.randn(N,p)
+      for c in [1.0, N-1]:
+        assert np.allclose(mrdiv_obs(B,Y,R,c), direct(B,Y,R,c), rtol=1e-8, atol=1e-10), (R.kind,N)
+    # Stacked (as in assimilate_repeats)
+    Y = rng.randn(3,10,p)
+    B = rng.randn(3,10,p)
+    X = mrdiv_obs(B,Y,R,9)
+    for r in range(3):
+      assert np.allclose(X[r], direct(B[r],Y[r],R,9))
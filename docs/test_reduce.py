@@ -0,0 +1,33 @@
+# Test Stats with reduce (online averages) against the stored series.
+
+from common import *
+import pytest
+
+def averages(config,setup,xx,yy,**kwargs):
+  seed(5)
+  return config.update_settings(**kwargs).assimilate(setup,xx,yy).average_in_time()
+
+def assert_same(a0,a1,keys):
+  for key in keys:
+    assert np.isclose(a0[key].val , a1[key].val , rtol=1e-10, equal_nan=True), key
+    assert np.isclose(a0[key].conf, a1[key].conf, rtol=1e-6 , equal_nan=True), key
+
+def test_reduce():
+  from mods.Lorenz63.sak12 import setup
+  setup.t.T = 8
+  seed(1)
+  xx,yy = simulate(setup)
+  keys  = ['rmse_a','rmse_f','rmv_a','logp_m_a','skew_f','kurt_a']
+  for config in [EnKF('Sqrt',N=10,infl=1.02), ExtKF(infl=1.05)]:
+    assert_same(averages(config,setup,xx,yy),
+        averages(config,setup,xx,yy,reduce=True), keys)
+  # Smoothers (the backward pass of EnRTS is assessed in descending order)
+  for config in [EnKS('Sqrt',N=10,tLag=0.5), EnRTS('Sqrt',N=10,cntr=0.99)]:
+    assert_same(averages(config,setup,xx,yy,store_u=True),
+        averages(config,setup,xx,yy,store_u=True,reduce=True), keys+['rmse_u'])
+
+def test_reduce_smoother_requires_store_u():
+  from mods.Lorenz63.sak12 import setup
+  xx,yy = simulate(setup)
+  with pytest.raises(ValueError):
+    EnKS('Sqrt',N=10,tLag=0.5,reduce=True).assimilate(setup,xx,yy)
@@ -0,0 +1,45 @@
+# Test the on-disk cache of simulate().
+
+from common import *
+from tools.convenience import setup_hash, _hash_into
+import hashlib
+
+def test_sim_cache(tmp_path):
+  from mods.Lorenz63.sak12 import setup
+  setup.t.T = 8
+  cache = str(tmp_path)
+
+  seed(3); xx0,yy0 = simulate(setup);             x0 = randn()
+  seed(3); xx1,yy1 = simulate(setup,cache=cache); x1 = randn() # Store
+  seed(3); xx2,yy2 = simulate(setup,cache=cache); x2 = randn() # Load
+  assert len(os.listdir(cache)) == 1
+  for xx,yy in [(xx1,yy1),(xx2,yy2)]:
+    assert np.array_equal(xx,xx0) and np.array_equal(yy,yy0)
+  # The RNG continues as without caching
+  assert x0 == x1 == x2
+
+  # Another seed is another entry
+  seed(4); simulate(setup,cache=cache)
+  assert len(os.listdir(cache)) == 2
+
+def test_setup_hash():
+  from mods.Lorenz95.sak08 import setup
+  import mods.Lorenz95.core as core
+  seed(3); h0 = setup_hash(setup)
+  seed(3); assert setup_hash(setup) == h0
+  seed(4); assert setup_hash(setup) != h0
+  assert setup_hash(setup,rng_state=False) == setup_hash(setup,rng_state=False)
+  # Module-level parameters of the model
+  Force0 = core.Force
+  try:
+    h1 = setup_hash(setup,rng_state=False)
+    core.Force = Force0 + 1
+    assert setup_hash(setup,rng_state=False) != h1
+  finally:
+    core.Force = Force0
+  # Constants that are not plain data are hashed (stably, and distinctly)
+  def H(x):
+    sha = hashlib.sha1(); _hash_into(sha,x); return sha.hexdigest()
+  xs = [Ellipsis, slice(1,None,2), slice(1,None,3), {1,2}, frozenset('ab')]
+  assert [H(x) for x in xs] == [H(x) for x in xs]
+  assert len(set(H(x) for x in xs)) == len(xs)
@@ -0,0 +1,30 @@
+# Test the truncated spectral diagnostics (beyond Stats.comp_threshold_3):
+# leading_svd, and CovMat.leading_EVD (which uses the structure of the CovMat).
+
+from common import *
+
+m, n = 200, 10
+rng  = np.random.RandomState(3)
+d    = rng.rand(m) + 0.1
+c    = exp(-np.minimum(arange(m),m-arange(m))**2/20)
+band = sp.sparse.diags([0.3*ones(m-1), 2*ones(m), 0.3*ones(m-1)], [-1,0,1])
+
+def test_leading_svd():
+  A = rng.randn(30,m)
+  for B in [A, A.T, rng.randn(500,450)]:
+    U,s,VT = leading_svd(B,n)
+    s0     = svd(B,compute_uv=False)[:n]
+    assert np.allclose(s,s0)
+    assert np.allclose(B @ VT.T, U*s)
+
+def test_leading_EVD():
+  kinds = [CovMat(d,'diag'), CovMat(diag(d),'full'), CovMat(c,'circulant'),
+      CovMat(band,'sparse'), CovMat((rng.randn(5,m),d),'Right+diag'),
+      CovMat(rng.randn(30,m),'E')]
+  for C in kinds:
+    F      = C.full
+    w0     = eigh(F,eigvals_only=True)[::-1][:n]
+    w, VT  = C.leading_EVD(n)
+    VT     = VT.toarray() if sp.sparse.issparse(VT) else VT
+    assert np.allclose(w, w0)
+    assert np.allclose(F @ VT.T, VT.T * w)
@@ -0,0 +1,25 @@
+# Test Stats with store_dir (memmap'ed series) against the in-memory series.
+
+from common import *
+
+def test_store_dir(tmp_path):
+  from mods.Lorenz63.sak12 import setup
+  setup.t.T = 8
+  seed(1)
+  xx,yy  = simulate(setup)
+  config = EnKF('Sqrt',N=10,infl=1.02,store_u=True)
+  keys   = ['rmse_a','rmse_f','rmse_u','rmv_a','logp_m_a','skew_f','kurt_a']
+
+  seed(5); s0 = config.assimilate(setup,xx,yy)
+  seed(5); s1 = config.update_settings(store_dir=str(tmp_path)).assimilate(setup,xx,yy)
+  assert isinstance(s1.rmse.a, np.memmap)
+  s2 = load_stats(str(tmp_path))
+
+  a0 = s0.average_in_time()
+  for s in [s1,s2]:
+    assert np.array_equal(s.mu.f, s0.mu.f)
+    assert np.array_equal(s.rmse.u, s0.rmse.u, equal_nan=True)
+    a1 = s.average_in_time()
+    for key in keys:
+      assert a0[key].val  == a1[key].val , key
+      assert np.isclose(a0[key].conf, a1[key].conf, equal_nan=True), key
@@ -0,0 +1,17 @@
+# Test the streaming assimilation (stream) against assimilate().
+
+from common import *
+
+def test_stream_EnKF():
+  from mods.Lorenz63.sak12 import setup
+  setup.t.T = 8
+  seed(1)
+  xx,yy = simulate(setup)
+  for config in [EnKF('Sqrt',N=10,infl=1.02), EnKF('PertObs',N=10,infl=1.02)]:
+    seed(3)
+    stats = config.assimilate(setup,xx,yy)
+    seed(3)
+    for a in stream(config,setup,iter(yy)):
+      assert a.t == setup.t.ttObs[a.kObs]
+      assert np.allclose(a.mu, stats.mu.a[a.kObs])
+      assert np.isclose(a.trHK, stats.trHK[a.kObs])
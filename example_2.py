@@ -74,6 +74,10 @@ print_averages(cfgs,avrgs)
 
 # Note: if model is very large, you may want to
 # discard the stats objects, keeping only the avrgs.
+# This is what assimilate_in_parallel() does, running the
+# configs (for a list of seeds) on a pool of processes:
+#avrgs = assimilate_in_parallel(cfgs,setup,xx,yy,seeds=[sd0+2])
+#print_averages(cfgs,avrgs[0])
 
 ##############################
 # Plot
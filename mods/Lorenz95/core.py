@@ -23,15 +23,37 @@
 
 import numpy as np
 from scipy.linalg import circulant
-from tools.misc import rk4, integrate_TLM, is1d
+from scipy import sparse
+from tools.misc import rk4, rk4_inplace, integrate_TLM, is1d
 
 Force           = 8.0
 prevent_blow_up = False
+m_sparse        = 128 # Above this m, dfdx_sparse is faster than dfdx (with ExtKF)
 
 def dxdt(x):
-  a = x.ndim-1
-  s = lambda x,n: np.roll(x,-n,axis=a)
-  return np.multiply(s(x,1)-s(x,-2), s(x,-1)) - x + Force
+  x = np.asarray(x)
+  return dxdt_inplace(x, np.empty(x.shape, np.result_type(x,1.0)))
+
+def dxdt_inplace(x, out):
+  """
+  Write dxdt(x) into out (C-contiguous, not aliasing x).
+  The periodic shifts are done by slicing (rather than np.roll),
+  mostly on the flattened arrays (i.e. across rows, for ensembles),
+  after which the wrapped-around columns are fixed.
+  """
+  assert out.flags.c_contiguous
+  x      = np.ascontiguousarray(x)
+  xf, of = x.reshape(-1), out.reshape(-1)
+  # out[i] = (x[i+1] - x[i-2]) * x[i-1] - x[i] + Force
+  np.subtract(xf[3:], xf[:-3], out=of[2:-1])
+  np.subtract(x[...,1:3], x[...,-2:], out=out[...,:2])
+  np.subtract(x[...,0]  , x[...,-3] , out=out[...,-1])
+  of[1:] *= xf[:-1]
+  np.subtract(x[...,1], x[...,-2], out=out[...,0])
+  out[...,0] *= x[...,-1]
+  out -= x
+  out += Force
+  return out
 
 def step(x0, t, dt):
 
@@ -39,27 +61,39 @@ def step(x0, t, dt):
     #clip      = abs(x0)>30
     #x0[clip] *= 0.1
 
-  return rk4(lambda t,x: dxdt(x), x0, np.nan, dt)
+  return rk4_inplace(lambda t,x,out: dxdt_inplace(x,out), x0, np.nan, dt)
 
 
 def TLM(x):
   """Tangent linear model"""
+  return TLM_sparse(x).toarray()
+
+def TLM_sparse(x):
+  """Tangent linear model, as a sparse (CSR) matrix: 4 (periodic) diagonals."""
   assert is1d(x)
+  x    = np.ravel(x)
   m    = len(x)
-  TLM  = np.zeros((m,m))
   md   = lambda i: np.mod(i,m)
-  for i in range(m):
-    TLM[i,i]       = -1.0
-    TLM[i,   i-2 ] = -x[i-1]
-    TLM[i,md(i+1)] = +x[i-1]
-    TLM[i,   i-1 ] = x[md(i+1)]-x[i-2]
-  return TLM
+  ii   = np.arange(m)
+  rows = np.tile(ii,4)
+  cols = np.concatenate([ii, md(ii-2), md(ii+1), md(ii-1)])
+  vals = np.concatenate([-np.ones(m), -x[md(ii-1)], +x[md(ii-1)],
+                         x[md(ii+1)]-x[md(ii-2)]])
+  return sparse.csr_matrix((vals,(rows,cols)), shape=(m,m))
 
 def dfdx(x,t,dt):
   """Integral of TLM. Jacobian of step."""
   # method='analytic' is a substantial upgrade for Lor95 
   return integrate_TLM(TLM(x),dt,method='analytic')
 
+def dfdx_sparse(x,t,dt):
+  """
+  As dfdx, but matrix-free (a LinearOperator applying expm_multiply
+  with the sparse TLM). Opt-in, as f['jacob'], for m > m_sparse.
+  Only supported by methods that use FPFT/PFT (ExtKF, ExtRTS).
+  """
+  return integrate_TLM(TLM_sparse(x),dt,method='analytic')
+
 
 def typical_init_params(m):
   """
@@ -21,6 +21,7 @@
 # Also see mitchell2014 and Hanna Arnold's thesis.
 
 import numpy as np
+from scipy import sparse
 from scipy.linalg import circulant
 from tools.misc import rk4, is1d, atmost_2d
 
@@ -35,6 +36,10 @@ c = 10 # time scale ratio
 
 iiX = (np.arange(J*nX)/J).astype(int)
 iiY = np.arange(J*nX).reshape((nX,J))
+
+def shift(x,n):
+  return np.roll(x,-n,axis=-1)
+
 @atmost_2d
 def dxdt(x):
   # Split into X,Y
@@ -42,52 +47,72 @@ def dxdt(x):
   Y = x[:,nX:]
   assert Y.shape[1] == J*X.shape[1]
 
-  s = lambda x,n: np.roll(x,-n,axis=-1)
+  s = shift
 
   d = np.zeros_like(x)
   # dX/dt -- same as "uncoupled" Lorenz-95
   d[:,:nX] = np.multiply(s(X,1)-s(X,-2),s(X,-1)) - X + F
-  # Add in coupling from Y vars
-  for i in range(nX):
-    d[:,i] += -h*c/b * np.sum(Y[:,iiY[i]],1)
+  # Add in coupling from Y vars (those of X[i] are Y[:,iiY[i]])
+  d[:,:nX] += -h*c/b * np.sum(Y.reshape((-1,nX,J)),-1)
   # dY/dt
   d[:,nX:] = -c*b*np.multiply(s(Y,2)-s(Y,-1),s(Y,1)) - c*Y \
       + h*c/b * X[:,iiX]
   return d
 
+
+# Sparsity pattern (CSR) of dfdx, built once.
+# The entries of each row (variable) i are listed (in the order of the
+# values in dfdx) as: itself, its Lorenz-95 neighbours, and the other scale.
+_mX = lambda i: np.mod(i,nX)
+_mY = lambda i: nX + np.mod(i-nX,nX*J)
+_iX = np.arange(nX)
+_iY = np.arange(nX,m)
+def _dfdx_pattern():
+  rows = [_iX, _iX, _iX, _iX, np.repeat(_iX,J),
+          _iY, _iY, _iY, _iY, _iY]
+  cols = [_iX, _mX(_iX-2), _mX(_iX+1), _mX(_iX-1), nX+iiY.ravel(),
+          _iY, _mY(_iY-1), _mY(_iY+1), _mY(_iY+2), iiX]
+  rows  = np.concatenate(rows)
+  cols  = np.concatenate(cols)
+  order = np.lexsort((cols,rows))
+  rows, cols = rows[order], cols[order]
+  assert np.all(np.diff(rows*m+cols) > 0), "Duplicate entries (too small nX or J)"
+  indptr = np.concatenate([[0], np.cumsum(np.bincount(rows,minlength=m))])
+  return order, cols, indptr
+_dfdx_order, _dfdx_indices, _dfdx_indptr = _dfdx_pattern()
+
 def dfdx(x,t,dt):
   """
   Jacobian of x + dt*dxdt.
+  Returned as a scipy.sparse (CSR) matrix.
   """
   assert is1d(x)
-  F  = np.zeros((m,m))
-  # X
-  md = lambda i: np.mod(i,nX)
-  for i in range(nX):
-    # wrt. X
-    F[i,i]         = - dt + 1
-    F[i,md(i-2)]   = - dt * x[md(i-1)]
-    F[i,md(i+1)]   = + dt * x[md(i-1)]
-    F[i,md(i-1)]   =   dt *(x[md(i+1)]-x[md(i-2)])
-    # wrt. Y
-    F[i,nX+iiY[i]] = dt * -h*c/b
-  # Y
-  md = lambda i: nX + np.mod(i-nX,nX*J)
-  for i in range(nX,(J+1)*nX):
-    # wrt. Y
-    F[i,i]         = -dt*c + 1
-    F[i,md(i-1)]   = +dt*c*b * x[md(i+1)]
-    F[i,md(i+1)]   = -dt*c*b * (x[md(i+2)]-x[md(i-1)])
-    F[i,md(i+2)]   = -dt*c*b * x[md(i+1)]
-    # wrt. X
-    F[i,iiX[i-nX]] = dt * h*c/b
-  return F
+  x = np.ravel(x)
+  n = nX*J
+  vals = np.concatenate([
+    # X, wrt. X
+    np.full(nX, - dt + 1),
+    - dt * x[_mX(_iX-1)],
+    + dt * x[_mX(_iX-1)],
+      dt *(x[_mX(_iX+1)]-x[_mX(_iX-2)]),
+    # X, wrt. Y
+    np.full(n, dt * -h*c/b),
+    # Y, wrt. Y
+    np.full(n, -dt*c + 1),
+    +dt*c*b * x[_mY(_iY+1)],
+    -dt*c*b * (x[_mY(_iY+2)]-x[_mY(_iY-1)]),
+    -dt*c*b * x[_mY(_iY+1)],
+    # Y, wrt. X
+    np.full(n, dt * h*c/b),
+    ])
+  return sparse.csr_matrix((vals[_dfdx_order], _dfdx_indices, _dfdx_indptr), shape=(m,m))
 
 
 @atmost_2d
 def dxdt_trunc(x):
   "truncated dxdt: slow variables (X) only"
   assert x.shape[1] == nX
+  s = shift
   return np.multiply(s(x,1)-s(x,-2),s(x,-1)) - x + F
 
 def dxdt_det(x):
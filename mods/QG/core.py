@@ -49,6 +49,8 @@ prms2 = [
     ["outfname"     , "''"]  # Write to
     ]
 prms += prms2
+# NB: The ensemble is stepped on the (persistent) pool of tile_map.
+# After changing prms (and rewriting prm_filename), call close_tile_pool().
 
 # Used list for prms to keep ordering. But it's nice to have a dict too:
 prms_dict = {entry[0]: entry[1] for entry in prms}
@@ -109,17 +111,24 @@ def step_1(x0, t, dt_):
   return x
 
 
-from tools.utils import multiproc_map
+from tools.utils import tile_map, TILE_NPROC
+def _step_tile(ws, i0, i1, t, dt_):
+  "Step members i0:i1 of the (shared) ensemble, in place."
+  for n in range(i0,i1):
+    ws.E[n] = step_1(ws.E[n],t,dt_)
+
 def step(E, t, dt_):
   """Vector and 2D-array (ens) input, with multiproc for ens case."""
   if E.ndim==1:
     return step_1(E,t,dt_)
   if E.ndim==2:
-    # Parallelized:
-    E = np.array(multiproc_map(step_1, E, t=t, dt_=dt_))
-    # Non-parallelized:
-    #for n,x in enumerate(E): E[n] = step_1(x,t,dt_)
-    return E
+    # Parallelized, on the persistent pool of tile_map(),
+    # with the ensemble in shared memory (so it is not pickled),
+    # and with one tile (of consecutive members) per process.
+    N     = len(E)
+    tiles = [(nn[0],nn[-1]+1) for nn in np.array_split(arange(N),min(N,TILE_NPROC))]
+    _, ws = tile_map(_step_tile, dict(E=E), tiles, None, t=t, dt_=dt_)
+    return ws.E.copy()
 
 
 #########################
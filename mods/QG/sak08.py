@@ -46,26 +46,22 @@ def obs_inds(t):
 def hmod(E,t):
   return E[obs_inds(t)]
 
-from tools.localization import inds_and_coeffs, unravel
+from tools.localization import loc_table, unravel
 xIJ = unravel(arange(m), (ny,nx)) # 2-by-m
 def locf(radius,direction,t,tag=None):
   """
   Prepare function:
   inds, coeffs = locf_at(state_or_obs_index)
+  The tables are cached, and so only recomputed when obs_inds(t) changes.
   """
   yIJ = xIJ[:,obs_inds(t)] # 2-by-p
-  def ic(cntr, domain):
-    return inds_and_coeffs(cntr, domain, (ny,nx), radius, tag=tag)
   if direction is 'x2y':
-    # Could pre-compute ic() for all xIJ,
-    # but speed gain is not worth it.
-    def locf_at(ind):
-      return ic(xIJ[:,ind], yIJ)
+    return loc_table(xIJ, yIJ, (ny,nx), radius, tag=tag)
   elif direction is 'y2x':
-    def locf_at(ind):
-      return ic(yIJ[:,ind], xIJ)
+    return loc_table(yIJ, xIJ, (ny,nx), radius, tag=tag)
+  elif direction is 'y2y':
+    return loc_table(yIJ, yIJ, (ny,nx), radius, tag=tag)
   else: raise KeyError
-  return locf_at
 
 h = {
     'm'    : p,
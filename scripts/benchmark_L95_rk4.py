@@ -0,0 +1,30 @@
+# Micro-benchmark of the Lorenz95 step:
+# rk4() with np.roll-based dxdt (as before) vs. rk4_inplace() with dxdt_inplace().
+
+############################
+# Preamble
+############################
+from common import *
+import timeit
+import mods.Lorenz95.core as L95
+from tools.misc import rk4
+
+def dxdt_roll(x):
+  a = x.ndim-1
+  s = lambda x,n: np.roll(x,-n,axis=a)
+  return np.multiply(s(x,1)-s(x,-2), s(x,-1)) - x + L95.Force
+
+step_roll = lambda x0,t,dt: rk4(lambda t,x: dxdt_roll(x), x0, t, dt)
+
+############################
+# Benchmark
+############################
+dt = 0.05
+print('%6s %6s %12s %12s %8s' % ('N','m','roll (us)','inplace (us)','speedup'))
+for N,m in [(1,40),(20,40),(100,40),(1000,40),(100,400),(100,4000)]:
+  E = 5*randn((N,m))
+  assert np.array_equal(step_roll(E,nan,dt), L95.step(E,nan,dt))
+  n  = max(10, int(2e5/(N*m)))
+  t0 = timeit.timeit(lambda: step_roll(E,nan,dt), number=n)/n
+  t1 = timeit.timeit(lambda: L95.step(E,nan,dt) , number=n)/n
+  print('%6d %6d %12.1f %12.1f %8.2f' % (N,m,1e6*t0,1e6*t1,t0/t1))
@@ -1,5 +1,12 @@
 from common import *
 
+import hashlib, pickle, queue, threading
+from contextlib import contextmanager
+from time import perf_counter
+
+# Where to write checkpoints (see Stats.checkpoint)
+CKPT_DIR = 'data' + os.path.sep + 'checkpoints'
+
 class Stats(MLR_Print):
   """
   Contains and computes statistics of the DA methods.
@@ -7,6 +14,17 @@ class Stats(MLR_Print):
 
   # Adjust this to omit heavy computations
   comp_threshold_3 = 51
+  # Beyond comp_threshold_3, only the leading comp_trunc_k svals (and umisf)
+  # are computed, by Lanczos (see leading_svd). Set to 0 to omit them.
+  comp_trunc_k     = 20
+
+  # The phases of Stats.timed(). Allocated for every method,
+  # so that the averages of different methods have the same fields.
+  timed_phases = ['forecast','noise','analysis','resample',
+                  'smoother','recompute','post','assess']
+
+  # The da_methods whose (smoothed) results are the 'u' series
+  smoothers = ['EnKS','EnRTS','iEnKS','ExtRTS']
 
   # Used by MLR_Print
   excluded  = MLR_Print.excluded + ['setup','config','xx','yy']
@@ -25,6 +43,25 @@ class Stats(MLR_Print):
     self.xx     = xx
     self.yy     = yy
 
+    if config.reduce and config.liveplotting:
+      raise ValueError("LivePlot requires the stored series, i.e. reduce=False.")
+    if config.reduce and config.store_dir:
+      raise ValueError("Cannot use both reduce and store_dir.")
+    if config.reduce and not config.store_u and \
+        getattr(config.da_method,'__name__',None) in Stats.smoothers:
+      raise ValueError("With reduce, the smoothed ('u') stats of " +
+          config.da_method.__name__ + " require store_u=True.")
+    if config.checkpoint:
+      # The RNG state at the start of the run (e.g. set by seed) is part of
+      # the checkpoint key, so that runs with other seeds do not resume it.
+      from tools.convenience import _hash_into
+      sha = hashlib.sha1()
+      _hash_into(sha,np.random.get_state())
+      self._rng0 = sha.hexdigest()
+    if config.store_dir:
+      makedirs(config.store_dir, exist_ok=True)
+      np.save(os.path.join(config.store_dir,'xx.npy'), xx)
+
     m    = setup.f.m    ; assert m   ==xx.shape[1]
     K    = setup.t.K    ; assert K   ==xx.shape[0]-1
     p    = setup.h.m    ; assert p   ==yy.shape[1]
@@ -32,15 +69,15 @@ class Stats(MLR_Print):
 
     # time-series constructor alias
     fs = self.new_FAU_series 
-    self.mu     = fs(m) # Mean
-    self.var    = fs(m) # Variances
-    self.mad    = fs(m) # Mean abs deviations
-    self.err    = fs(m) # Error (mu-truth)
-    self.logp_m = fs(1) # Marginal, Gaussian Log score
-    self.skew   = fs(1) # Skewness
-    self.kurt   = fs(1) # Kurtosis
-    self.rmv    = fs(1) # Root-mean variance
-    self.rmse   = fs(1) # Root-mean square error
+    self.mu     = fs(m,'mu')     # Mean
+    self.var    = fs(m,'var')    # Variances
+    self.mad    = fs(m,'mad')    # Mean abs deviations
+    self.err    = fs(m,'err')    # Error (mu-truth)
+    self.logp_m = fs(1,'logp_m') # Marginal, Gaussian Log score
+    self.skew   = fs(1,'skew')   # Skewness
+    self.kurt   = fs(1,'kurt')   # Kurtosis
+    self.rmv    = fs(1,'rmv')    # Root-mean variance
+    self.rmse   = fs(1,'rmse')   # Root-mean square error
 
     if hasattr(config,'N'):
       # Ensemble-only init
@@ -48,21 +85,31 @@ class Stats(MLR_Print):
       self._is_ens = True
       N            = config.N
       m_Nm         = min(m,N)
-      self.w       = fs(N)           # Importance weights
-      self.rh      = fs(m,dtype=int) # Rank histogram
+      exact        = sqrt(m*N) <= Stats.comp_threshold_3
+      self.w       = fs(N,'w')            # Importance weights
+      self.rh      = fs(m,'rh',dtype=int) # Rank histogram
       #self.N      = N               # Use w.shape[1] instead
     else:
       # Linear-Gaussian assessment
       self._is_ens = False
       m_Nm         = m
+      exact        = m <= Stats.comp_threshold_3
+
+    if not exact and Stats.comp_trunc_k:
+      m_Nm = min(m_Nm, Stats.comp_trunc_k)
 
-    self.svals = fs(m_Nm) # Principal component (SVD) scores
-    self.umisf = fs(m_Nm) # Error in component directions
+    self.svals = fs(m_Nm,'svals') # Principal component (SVD) scores
+    self.umisf = fs(m_Nm,'umisf') # Error in component directions
 
     # Other. 
     self.trHK = np.full(KObs+1, nan)
     self.infl = np.full(KObs+1, nan)
 
+    # Timing (see timed())
+    for phase in Stats.timed_phases:
+      setattr(self, 't_' +phase, zeros(KObs+1))
+      setattr(self, '_n_'+phase, zeros(KObs+1,dtype=int))
+
 
   def assess(self,k,kObs=None,f_a_u=None,
       E=None,w=None,mu=None,Cov=None):
@@ -90,17 +137,7 @@ class Stats(MLR_Print):
         if mu is None:     rze("mu/Cov","mu","")
     
 
-    # Defaults for f_a_u
-    if f_a_u is None:
-      if kObs is None:
-        f_a_u = 'u'
-      else:
-        f_a_u = 'au'
-    elif f_a_u == 'fau':
-      if kObs is None:
-        f_a_u = 'u'
-
-    key = (k,kObs,f_a_u)
+    key = Stats._key(k,kObs,f_a_u)
 
     LP      = self.config.liveplotting
     store_u = self.config.store_u
@@ -119,19 +156,14 @@ class Stats(MLR_Print):
         state_prms = {'mu':mu,'P':Cov}
 
       # Call assessment
-      with np.errstate(divide='ignore',invalid='ignore'):
-        alias(key,**state_prms)
-
-      # In case of degeneracy, variance might be 0,
-      # causing warnings in computing skew/kurt/MGLS
-      # (which all normalize by variance).
-      # This should and will yield nan's, but we don't want
-      # the diagnostics computations to cause too many warnings,
-      # so we turned them off above. But we'll manually warn ONCE here.
-      if not getattr(self,'_had_0v',False) \
-          and np.allclose(sqrt(self.var[key]),0):
-        self._had_0v = True
-        warnings.warn("Sample variance was 0 at (k,kObs,fau) = " + str(key))
+      if self.config.async_assess and not LP:
+        # Snapshot the state (which the assimilator may modify in-place),
+        # and leave the assessment to the worker thread.
+        state_prms = {name: (val.copy() if isinstance(val,np.ndarray) else val)
+            for name, val in state_prms.items()}
+        self.assess_queue().put((alias,key,state_prms)) # Blocks if full
+      else:
+        self._assess(alias,key,state_prms)
 
 
       # LivePlot
@@ -142,6 +174,92 @@ class Stats(MLR_Print):
           self.lplot.update(k,kObs,**state_prms)
 
 
+  @staticmethod
+  def _key(k,kObs,f_a_u):
+    "The key (k,kObs,f_a_u) of assess(), with the defaults for f_a_u."
+    if f_a_u is None:
+      if kObs is None:
+        f_a_u = 'u'
+      else:
+        f_a_u = 'au'
+    elif f_a_u == 'fau':
+      if kObs is None:
+        f_a_u = 'u'
+    return (k,kObs,f_a_u)
+
+  def _assess(self,alias,key,state_prms):
+    with np.errstate(divide='ignore',invalid='ignore'), self.timed('assess',key[0]):
+      alias(key,**state_prms)
+
+    # In case of degeneracy, variance might be 0,
+    # causing warnings in computing skew/kurt/MGLS
+    # (which all normalize by variance).
+    # This should and will yield nan's, but we don't want
+    # the diagnostics computations to cause too many warnings,
+    # so we turned them off above. But we'll manually warn ONCE here.
+    if not getattr(self,'_had_0v',False) \
+        and np.allclose(sqrt(self.var[key]),0):
+      self._had_0v = True
+      warnings.warn("Sample variance was 0 at (k,kObs,fau) = " + str(key))
+
+
+  ##################################
+  # Asynchronous assessment
+  ##################################
+  # If config.async_assess (=n), assess() only puts a copy of the state
+  # in a queue (of max size n), from which a worker thread does the assessment,
+  # while the assimilator moves on. The results are the same as without.
+  # Use assess_wait() before reading the stats during the assimilation.
+  # The worker is stopped (by pre_fork) before tile_map forks its pool,
+  # and restarted by the next assess().
+
+  def assess_queue(self):
+    "Get the queue, starting the worker (if needed). Re-raise errors from the worker."
+    if not hasattr(self,'_async'):
+      self._async = Bunch(queue=queue.Queue(int(self.config.async_assess)),
+          err=None, thread=None)
+      pre_fork_registry.add(self)
+    if self._async.thread is None:
+      self._async.thread = threading.Thread(target=self._assess_worker,
+          args=(self._async,), daemon=True)
+      self._async.thread.start()
+    if self._async.err is not None:
+      err, self._async.err = self._async.err, None
+      raise err
+    return self._async.queue
+
+  def _assess_worker(self,async_):
+    while True:
+      item = async_.queue.get()
+      try:
+        if item is None:
+          return
+        if async_.err is None: # Skip the rest after an error
+          self._assess(*item)
+      except Exception as err:
+        async_.err = err
+      finally:
+        async_.queue.task_done()
+
+  def pre_fork(self):
+    "Complete the queued assessments, and stop the worker (but keep any error)."
+    async_ = getattr(self,'_async',None)
+    if async_ is not None and async_.thread is not None:
+      async_.queue.put(None)
+      async_.thread.join()
+      async_.thread = None
+
+  def assess_wait(self,reraise=True):
+    "Complete the queued assessments, and stop the worker."
+    self.pre_fork()
+    async_ = self.__dict__.pop('_async',None)
+    pre_fork_registry.discard(self)
+    if async_ is None:
+      return
+    if reraise and async_.err is not None:
+      raise async_.err
+
+
   def assess_ens(self,k,E,w=None):
     """Ensemble and Particle filter (weighted/importance) assessment."""
     # Unpack
@@ -189,6 +307,17 @@ class Stats(MLR_Print):
 
     self.derivative_stats(k,x)
 
+    # Rank of the truth (x) among the ensemble (E), for each state dim,
+    # i.e. the number of members below x (ties: x is ranked below).
+    # With weights: the weighted fraction (i.e. the PIT) mapped to the N+1 bins
+    # by floor((N+1)*PIT), so that uniform PITs give a flat rank histogram.
+    # (Rounding N*PIT would halve the end bins.) Equals the count for w=1/N.
+    below = E < x
+    if self._has_w:
+      self.rh[k] = np.minimum(np.floor((N+1) * (w @ below)), N)
+    else:
+      self.rh[k] = below.sum(axis=0)
+
     if sqrt(m*N) <= Stats.comp_threshold_3:
       if N<=m:
         _,s,UT         = svd( (sqrt(w)*A.T).T, full_matrices=False)
@@ -201,10 +330,10 @@ class Stats(MLR_Print):
         s2            *= ub
         self.svals[k]  = sqrt(s2.clip(0))[::-1]
         self.umisf[k]  = U.T[::-1] @ self.err[k]
-
-      # For each state dim [i], compute rank of truth (x) among the ensemble (E)
-      Ex_sorted     = np.sort(np.vstack((E,x)),axis=0,kind='heapsort')
-      self.rh[k]    = [np.where(Ex_sorted[:,i] == x[i])[0][0] for i in range(m)]
+    elif Stats.comp_trunc_k:
+      n                = min(m,N,Stats.comp_trunc_k)
+      _,s,UT           = leading_svd( (sqrt(w)*A.T).T, n)
+      self.spectral_stats(k, n, s*sqrt(ub), UT)
 
 
   def assess_ext(self,k,mu,P):
@@ -230,6 +359,28 @@ class Stats(MLR_Print):
       s2,U          = nla.eigh(P)
       self.svals[k] = sqrt(np.maximum(s2,0.0))[::-1]
       self.umisf[k] = (U.T @ self.err[k])[::-1]
+    elif Stats.comp_trunc_k:
+      # Avoid forming P.full
+      n = min(m,Stats.comp_trunc_k)
+      if isinstance(P,CovMat):
+        # Uses the structure of P (e.g. diag, sparse, circulant)
+        s2, UT = P.leading_EVD(n)
+        s      = sqrt(s2)
+      else:
+        _,s,UT = leading_svd(P, n) # P is sym. pos. def.
+        s      = sqrt(s)
+      self.spectral_stats(k, n, s, UT)
+
+  def spectral_stats(self,k,n,s,UT):
+    """
+    Assign the leading n svals and umisf, given (possibly fewer) of the
+    singular values (s) and right singular vectors (UT) of the sqrt of the cov.
+    """
+    r             = len(s)
+    self.svals[k] = pad0(s,n)  # Zero beyond rank
+    umisf         = np.full(n, nan)
+    umisf[:r]     = UT @ self.err[k]
+    self.umisf[k] = umisf
 
 
   def derivative_stats(self,k,x):
@@ -248,6 +399,144 @@ class Stats(MLR_Print):
     self.logp_m[k] = logp_m/m
 
 
+  ##################################
+  # Checkpointing
+  ##################################
+  # Usage in an assimilator (with E being the state to checkpoint):
+  #  tckr = chrono.forecast_range
+  #  E    = stats.resume(tckr,E=E)
+  #  for k,kObs,t,dt in progbar(tckr):
+  #    ...
+  #    stats.checkpoint(k,kObs,E=E)
+  # These are no-ops unless config.checkpoint (=n) is set,
+  # in which case the state, the RNG state, and the stats computed so far
+  # are written to file every n-th obs cycle. A later run with the same
+  # config, setup, obs and initial RNG state (e.g. seed) resumes from there.
+  # The file is removed on completion.
+
+  _not_checkpointed = ['config','setup','xx','yy','lplot','_rng0']
+
+  def checkpoint_path(self):
+    """Path of checkpoint file, as determined by the config, setup, yy,
+    and the RNG state at the start of the run."""
+    from tools.convenience import setup_hash, _hash_into
+    # All settings, including the defaults (which are not in repr(config)).
+    settings = {key: val for key, val in vars(self.config).items()
+        if key!='assimilate' and not key.startswith('_')}
+    sha = hashlib.sha1()
+    _hash_into(sha,settings)
+    sha.update(setup_hash(self.setup,rng_state=False).encode())
+    sha.update(np.ascontiguousarray(self.yy).tobytes())
+    sha.update(self._rng0.encode())
+    return os.path.join(CKPT_DIR, sha.hexdigest() + '.pkl')
+
+  def checkpoint(self,k,kObs,**state):
+    """Write state (and stats) to file, if kObs is the n-th obs cycle."""
+    n = self.config.checkpoint
+    if not n or kObs is None or (kObs+1)%n:
+      return
+    self.assess_wait()
+    # Stats computed so far
+    sdict = {}
+    lens  = {} # Full lengths of the truncated time series
+    for key, val in vars(self).items():
+      if key in self._not_checkpointed:
+        continue
+      if isinstance(val,FAU_series):
+        val = val.state(k,kObs)
+      elif isinstance(val,np.ndarray):
+        lens[key] = len(val)
+        if   len(val) == self.setup.t.KObs+1: val = val[:kObs+1]
+        elif len(val) == self.setup.t.K   +1: val = val[:k+1]
+      sdict[key] = val
+    data = {'k':k, 'state':state, 'stats':sdict, 'lens':lens,
+        'rng':np.random.get_state()}
+    # Write to tmp, then rename, to avoid partial files.
+    path = self.checkpoint_path()
+    makedirs(CKPT_DIR, exist_ok=True)
+    with open(path+'.tmp','wb') as F:
+      pickle.dump(data, F, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(path+'.tmp', path)
+
+  def resume(self,tckr,**state):
+    """
+    If a checkpoint exists, load it into self,
+    skip tckr forward, and return the checkpointed state.
+    Otherwise, return the (input) state.
+    """
+    path = self.checkpoint_path() if self.config.checkpoint else None
+    if path and os.path.isfile(path):
+      with open(path,'rb') as F:
+        data = pickle.load(F)
+      for key, val in data['stats'].items():
+        if isinstance(getattr(self,key,None),FAU_series):
+          getattr(self,key).set_state(val)
+        elif isinstance(val,np.ndarray):
+          # Not all arrays exist yet (e.g. those of timed()).
+          if not isinstance(getattr(self,key,None),np.ndarray):
+            setattr(self,key,zeros((data['lens'][key],)+val.shape[1:],val.dtype))
+          getattr(self,key)[:len(val)] = val
+        else:
+          setattr(self,key,val)
+      np.random.set_state(data['rng'])
+      tckr.skip_to(data['k']+1)
+      state = data['state']
+      print("Resuming from checkpoint at k=" + str(data['k']) + ".")
+    vals = tuple(state.values())
+    return vals[0] if len(vals)==1 else vals
+
+  def clear_checkpoint(self):
+    if self.config.checkpoint:
+      path = self.checkpoint_path()
+      if os.path.isfile(path):
+        os.remove(path)
+
+
+  ##################################
+  # Timing
+  ##################################
+  @contextmanager
+  def timed(self,phase,k):
+    """
+    Time the enclosed block, e.g.
+    >>> with stats.timed('forecast',k):
+    >>>   E = f(E,t-dt,dt)
+    The wall time (seconds) and number of calls are accumulated
+    per obs cycle, in stats.t_<phase> and stats._n_<phase> (len: KObs+1).
+    The times are thus included by average_in_time(); the counts are not.
+    The arrays of the timed_phases are allocated (as zeros) by __init__;
+    those of other phases are allocated on first use.
+    Time step k belongs to the cycle ending with the obs at (or after) k.
+    See timed_batch() for batched repetitions.
+    """
+    t0 = perf_counter()
+    try:
+      yield
+    finally:
+      self.add_time(phase, k, perf_counter() - t0)
+
+  def add_time(self,phase,k,elapsed):
+    "Add elapsed (seconds), and one call, to phase at (the cycle of) k. See timed()."
+    self._add_time(phase, self._cycle(k), elapsed)
+
+  def _cycle(self,k):
+    chrono = self.setup.t
+    return min(max(0,(k-1)//chrono.dkObs), chrono.KObs)
+
+  def _add_time(self,phase,kObs,elapsed):
+    if not hasattr(self,'t_'+phase):
+      KObs = self.setup.t.KObs
+      setattr(self, 't_'+phase, zeros(KObs+1))
+      setattr(self, '_n_'+phase, zeros(KObs+1,dtype=int))
+    getattr(self,'t_'+phase)[kObs] += elapsed
+    getattr(self,'_n_'+phase)[kObs] += 1
+
+  def time_totals(self):
+    """Dict of the total time (seconds) spent in each timed phase."""
+    return AlignedDict([(key[2:], val.sum()) for key, val in vars(self).items()
+      if key.startswith('t_') and isinstance(val,np.ndarray)])
+
+
   def average_in_time(self):
     """
     Avarage all univariate (scalar) time series.
@@ -277,7 +566,7 @@ class Stats(MLR_Print):
           # Compute
           avrg[key] = series_mean_with_conf(series[inds])
         # Scalars
-        elif np.isscalar(series):
+        elif np.isscalar(series) and not isinstance(series,str):
           avrg[key] = series
         else:
           raise NotImplementedError
@@ -285,10 +574,52 @@ class Stats(MLR_Print):
         pass
     return avrg
 
-  def new_FAU_series(self,m,**kwargs):
-    "Convenience FAU_series constructor."
+  def restart_series(self,sub,descending=False):
+    "Restart the accumulation (if config.reduce) of the sub series. See FAU_series.restart()."
+    for series in vars(self).values():
+      if isinstance(series,FAU_series):
+        series.restart(sub,descending)
+
+  def new_FAU_series(self,m,name=None,**kwargs):
+    """
+    Convenience FAU_series constructor.
+    If config.store_dir: the series (with a name) are stored as memmaps
+    in <store_dir>/<name>/ (see FAU_series), and can be reopened by load_stats().
+    If config.reduce: the series only store the current item,
+    and the averages (of scalar series) are accumulated online.
+    Thus, memory does not grow with K, but the series are not available
+    for plotting (viz), and the assessment at the non-obs times
+    is only averaged if config.store_u.
+    """
     store_u = self.config.store_u
-    return FAU_series(self.setup.t, m, store_u=store_u, **kwargs)
+    reduce  = self.config.reduce
+    store   = self.config.store_dir
+    if store and name:
+      store = os.path.join(store,name)
+      makedirs(store, exist_ok=True)
+    else:
+      store = None
+    return FAU_series(self.setup.t, m, store_u=store_u, reduce=reduce, store=store, **kwargs)
+
+  def store_meta(self):
+    """
+    If config.store_dir: flush the stored series, and write what else
+    is needed by load_stats() (chrono, config repr, the other stats) to meta.pkl.
+    """
+    store_dir = self.config.store_dir
+    if not store_dir:
+      return
+    meta = {'config':repr(self.config), 'chrono':self.setup.t, 'series':{}, 'other':{}}
+    for key, val in vars(self).items():
+      if key in self._not_checkpointed:
+        continue
+      if isinstance(val,FAU_series) and val.store:
+        val.flush()
+        meta['series'][key] = {'m':val.m, 'store_u':val.store_u}
+      else:
+        meta['other'][key] = val
+    with open(os.path.join(store_dir,'meta.pkl'),'wb') as F:
+      pickle.dump(meta, F, protocol=pickle.HIGHEST_PROTOCOL)
 
   # TODO: Provide frontend initializer 
 
@@ -310,15 +641,128 @@ class Stats(MLR_Print):
 
 
 
+@contextmanager
+def timed_batch(stats,phase,k):
+  "As Stats.timed, for a list of stats (of batched repetitions), sharing the time equally."
+  t0 = perf_counter()
+  try:
+    yield
+  finally:
+    elapsed = (perf_counter() - t0)/len(stats)
+    kObs    = stats[0]._cycle(k)
+    for s in stats: s._add_time(phase, kObs, elapsed)
+
+def assess_ens_batch(stats,k,kObs=None,f_a_u=None,E=None):
+  """
+  Equivalent to stats[r].assess(k,kObs,f_a_u,E=E[r]) for each r,
+  with the computations batched over the (nRepeat,N,m) ensemble array E
+  (unweighted members). Used by assimilate_repeats().
+  Falls back to the individual assessments at k==0, with liveplotting,
+  async_assess, or if the svals are truncated (sqrt(m*N) > comp_threshold_3).
+  """
+  s0    = stats[0]
+  nR,N,m = E.shape
+  if k==0 or s0.config.liveplotting or s0.config.async_assess \
+      or sqrt(m*N) > Stats.comp_threshold_3:
+    for s,Er in zip(stats,E): s.assess(k,kObs,f_a_u,E=Er)
+    return
+
+  key = Stats._key(k,kObs,f_a_u)
+  if not s0.config.store_u and kObs==None:
+    return # Skip assessment
+
+  with np.errstate(divide='ignore',invalid='ignore'), timed_batch(stats,'assess',k):
+    if not np.all(np.isfinite(E)): raise_AFE("Ensemble not finite.",key)
+    if not np.all(np.isreal(E)):   raise_AFE("Ensemble not Real.",key)
+
+    # As in Stats.assess_ens, with w = 1/N.
+    x     = np.array([s.xx[k] for s in stats])
+    ub    = N/(N-1)
+    mu    = mean(E,1)
+    A     = E - mu[:,None]
+    A_pow = A**2
+    var   = mean(A_pow,1)
+    mad   = mean(abs(A),1)
+    var  *= ub
+    A_pow*= A
+    skew  = mean( mean(A_pow,1) / var**(3/2), 1)
+    A_pow*= A
+    kurt  = mean( mean(A_pow,1) / var**2 - 3, 1)
+    rh    = (E < x[:,None]).sum(axis=1)
+
+    # As in Stats.derivative_stats
+    err   = mu - x
+    rmv   = sqrt(mean(var,1))
+    rmse  = sqrt(mean(err**2,1))
+    logp_m= ((err**2/var).sum(1) + log(var).sum(1))/m
+
+    if N<=m:
+      _,sv,UT = nla.svd(A/sqrt(N), full_matrices=False)
+      sv     *= sqrt(ub)
+      umisf   = (UT @ err[:,:,None])[...,0]
+    else:
+      s2,U    = nla.eigh((A.swapaxes(1,2)/N) @ A)
+      s2     *= ub
+      sv      = sqrt(s2.clip(0))[:,::-1]
+      umisf   = (U.swapaxes(1,2)[:,::-1] @ err[:,:,None])[...,0]
+
+    for r,s in enumerate(stats):
+      s._has_w    = False
+      s.w    [key] = ones(N)/N
+      s.mu   [key] = mu[r]
+      s.var  [key] = var[r]
+      s.mad  [key] = mad[r]
+      s.skew [key] = skew[r]
+      s.kurt [key] = kurt[r]
+      s.err  [key] = err[r]
+      s.rmv  [key] = rmv[r]
+      s.rmse [key] = rmse[r]
+      s.logp_m[key]= logp_m[r]
+      s.rh   [key] = rh[r]
+      s.svals[key] = sv[r]
+      s.umisf[key] = umisf[r]
+
+  # As in Stats._assess
+  for r,s in enumerate(stats):
+    if not getattr(s,'_had_0v',False) and np.allclose(sqrt(var[r]),0):
+      s._had_0v = True
+      warnings.warn("Sample variance was 0 at (k,kObs,fau) = " + str(key))
+
+
+
+def load_stats(store_dir,mode='r'):
+  """
+  Reopen the stats stored by a run with config.store_dir,
+  e.g. for plot_time_series() or average_in_time(), without rerunning.
+  The series are memory-mapped (mode: 'r' or 'r+').
+  NB: stats.config is only the repr (str) of the config,
+      and stats.setup only contains the Chronology (.t).
+  """
+  with open(os.path.join(store_dir,'meta.pkl'),'rb') as F:
+    meta = pickle.load(F)
+  chrono       = meta['chrono']
+  stats        = Stats.__new__(Stats)
+  stats.config = meta['config']
+  stats.setup  = Bunch(t=chrono)
+  stats.xx     = np.load(os.path.join(store_dir,'xx.npy'), mmap_mode=mode)
+  for key, prm in meta['series'].items():
+    store = os.path.join(store_dir,key)
+    setattr(stats, key, FAU_series(chrono, prm['m'], prm['store_u'], store=store, mode=mode))
+  for key, val in meta['other'].items():
+    setattr(stats, key, val)
+  return stats
+
+
 def average_each_field(ss,axis=None):
   assert ss.ndim == 2
   if axis == 0:
     ss = np.transpose(ss)
   m,N = ss.shape
   avrg = np.empty(m,dict)
-  keys = ss[0][0].keys()
   for i,row in enumerate(ss):
     avrg[i] = dict()
+    # Only the fields common to all (e.g. methods) in the row
+    keys = [key for key in row[0] if all(key in s_ij for s_ij in row)]
     for key in keys:
       avrg[i][key] = val_with_conf(
           val  = mean([s_ij[key].val  for s_ij in row]),
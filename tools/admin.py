@@ -1,4 +1,6 @@
 from common import *
+import multiprocessing, signal
+import tools.utils
 
 class TwinSetup(MLR_Print):
   """
@@ -49,6 +51,16 @@ class Operator(MLR_Print):
 
 
 
+def print_assim_failure(err):
+  "Print the traceback of err, caught during assimilation."
+  msg  = "Caught exception during assimilation. Printing traceback:"
+  msg += "\n" + "<"*20 + "\n\n"
+  msg += "\n".join(s for s in traceback.format_tb(err.__traceback__))
+  msg += "\n" + str(err)
+  msg += "\n" + ">"*20 + "\n"
+  msg += "Returning stats object in its current (incompleted) state.\n"
+  print(msg)
+
 def DA_Config(da_method):
   """
   Wraps a da_method to an instance of the DAC (DA Configuration) class.
@@ -95,14 +107,12 @@ def DA_Config(da_method):
       # Put assimilator inside try/catch to allow gentle failure
       try:
         assimilator(stats,setup,xx,yy)
+        stats.assess_wait()
+        stats.clear_checkpoint()
       except (AssimFailedError,ValueError) as err:
-        msg  = "Caught exception during assimilation. Printing traceback:"
-        msg += "\n" + "<"*20 + "\n\n"
-        msg += "\n".join(s for s in traceback.format_tb(err.__traceback__))
-        msg += "\n" + str(err)
-        msg += "\n" + ">"*20 + "\n"
-        msg += "Returning stats object in its current (incompleted) state.\n"
-        print(msg)
+        stats.assess_wait(reraise=False)
+        print_assim_failure(err)
+      stats.store_meta()
       return stats
     assim_caller.__doc__ = "Calls assimilator() from " +\
         da_method.__name__ +", passing it the (output) stats object. " +\
@@ -138,6 +148,10 @@ def DA_Config(da_method):
     cfg['da_method']  = da_method
     cfg['assimilate'] = assim_caller
     cfg = DAC(cfg)
+    # Checkpointing requires the assimilator to call stats.resume/checkpoint.
+    if cfg.checkpoint and 'resume' not in assimilator.__code__.co_names:
+      warnings.warn(da_method.__name__ + " does not support checkpointing."
+          " The checkpoint setting is ignored.")
     return cfg
   return wrapr
 
@@ -175,6 +189,10 @@ class DAC(ImmutableAttributes):
   dflts = {
       'liveplotting': False,
       'store_u'     : False,
+      'checkpoint'  : False,
+      'reduce'      : False,
+      'store_dir'   : None,
+      'async_assess': 0,
       }
 
   excluded =  ['assimilate',re.compile('^_')]
@@ -243,7 +261,7 @@ class List_of_Configs(list):
     comn = {}
 
     # Find all keys
-    keys = {}
+    keys = set()
     for config in self:
       keys |= config.__dict__.keys()
     keys = list(keys)
@@ -323,6 +341,8 @@ def print_averages(cfgs,Avrgs,attrkeys=(),statkeys=()):
       - if -1: only print da_method.
       - if  0: print distinct_attrs
   - statkeys: list of statistics to include.
+      E.g. ['rmse_a','t_forecast','t_analysis'] also shows the
+      wall time (per obs cycle) of those phases (see Stats.timed).
   """
 
   # Convert single cfg to list
@@ -395,3 +415,85 @@ def typeset(lst,do_tab):
   return ss
 
 
+
+
+
+#########################################
+# Parallel benchmarking
+#########################################
+
+# Worker-global experiment data. Set once per worker (by _init_worker),
+# so that the truth and obs are not shipped (pickled) with every job.
+_worker_data = None
+
+def _init_worker(cfgs,setup,xx,yy,seeds):
+  global _worker_data
+  _worker_data = (cfgs,setup,xx,yy,seeds)
+  # The parent shows a single (job-level) progbar.
+  tools.utils.disable_progbar = True
+  # Let the parent handle KeyboardInterrupt. stackoverflow.com/a/35134329
+  signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def _assimilate_job(job):
+  """
+  Returns iS, iC, and average_in_time(),
+  or (if the job raised) the formatted traceback instead.
+  """
+  cfgs,setup,xx,yy,seeds = _worker_data
+  iS, iC = job
+  try:
+    if seeds[iS] is not None:
+      seed(seeds[iS])
+    stats = cfgs[iC].assimilate(setup,xx,yy)
+    return iS, iC, stats.average_in_time()
+  except Exception:
+    return iS, iC, traceback.format_exc()
+
+def assimilate_in_parallel(cfgs,setup,xx,yy,seeds=(None,),nproc=None):
+  """
+  Run each config of cfgs (a List_of_Configs) for each of the seeds,
+  spreading the (seed,config) jobs over a local pool of nproc processes.
+
+  Returns avrgs: an array (len(seeds)-by-len(cfgs)) of average_in_time(),
+  i.e. the stats objects are discarded. Jobs that raise an exception
+  (other than those caught by assimilate) get None, and their traceback
+  is printed. Example:
+  >>> avrgs = assimilate_in_parallel(cfgs,setup,xx,yy,seeds=sd0+arange(5))
+  >>> print_averages(cfgs,average_each_field(avrgs,axis=0))
+
+  Notes:
+   - The seed is set before running each job, as in example_2.py.
+   - The workers are forked, so that cfgs, setup, xx, yy
+     are inherited (not pickled) by each worker (once).
+     Thus, this is not supported on Windows.
+   - nproc defaults to the number of CPUs.
+   - The progbars of the workers are disabled. Instead, the parent
+     shows a single progbar (over the jobs).
+  """
+  if isinstance(cfgs,DAC):
+    cfgs = List_of_Configs(cfgs)
+  if nproc is None:
+    nproc = multiprocessing.cpu_count()
+
+  jobs  = [(iS,iC) for iS in range(len(seeds)) for iC in range(len(cfgs))]
+  avrgs = np.empty((len(seeds),len(cfgs)),dict)
+
+  ctx  = multiprocessing.get_context('fork')
+  pool = ctx.Pool(min(nproc,len(jobs)), _init_worker, (cfgs,setup,xx,yy,seeds))
+  try:
+    results = pool.imap_unordered(_assimilate_job, jobs)
+    for _ in progbar(range(len(jobs)),'Assimilating'):
+      iS, iC, avrg  = next(results)
+      if isinstance(avrg,str):
+        print("Job (seed %d, config %d) raised:\n%s" % (iS,iC,avrg), file=sys.stderr)
+        avrg = None
+      avrgs[iS,iC]  = avrg
+  except:
+    # E.g. KeyboardInterrupt. Terminate before join(), which would otherwise raise.
+    pool.terminate()
+    raise
+  else:
+    pool.close()
+  finally:
+    pool.join()
+  return avrgs
@@ -203,6 +203,14 @@ class Ticker:
     self.k   = 0
     self._kO = 0
     self.kO  = None
+  def skip_to(self,k):
+    """Set position such that the next item yielded is that of k."""
+    self.k   = k
+    self._kO = np.searchsorted(self.kkO, k, side='right') # num of kkO <= k
+    if self._kO > 0 and self.kkO[self._kO-1] == k:
+      self.kO = self._kO-1
+    else:
+      self.kO = None
   def __len__(self):
     return len(self.tt) - self.k
   def __iter__(self): return self
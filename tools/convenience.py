@@ -1,7 +1,17 @@
 from common import *
 
-def simulate(setup,desc='Truth & Obs'):
-  """Generate synthetic truth and observations."""
+def simulate(setup,desc='Truth & Obs',cache=False):
+  """
+  Generate synthetic truth and observations.
+
+  If cache: look up (or store) xx,yy in the on-disk cache (see sim_cache),
+  keyed by setup_hash(setup), which includes the state of the random
+  number generator. If cache is a str, it is used as the cache dir.
+  """
+  if cache:
+    cache_dir = cache if isinstance(cache,str) else SIM_CACHE_DIR
+    return sim_cache(setup,desc,cache_dir)
+
   f,h,chrono,X0 = setup.f, setup.h, setup.t, setup.X0
 
   # Init
@@ -20,3 +30,185 @@ def simulate(setup,desc='Truth & Obs'):
 def print_together(*args):
   "Print stacked 1D arrays."
   print(np.vstack(args).T)
+
+
+
+#########################################
+# Caching of simulate()
+#########################################
+import hashlib, shutil, types, pickle
+
+SIM_CACHE_DIR       = 'data' + os.path.sep + 'sim_cache'
+SIM_CACHE_MAX_BYTES = 8*2**30 # Evict least-recently-used entries beyond this.
+
+def _hash_into(sha,x,_seen=None):
+  """
+  Feed a (stable) byte representation of x into sha.
+  Functions are hashed by their code (and any module-level parameters),
+  rather than by their (id-containing) repr.
+  """
+  if _seen is None: _seen = set()
+  upd = lambda s: sha.update(str(s).encode())
+
+  if x is None or isinstance(x,(bool,int,float,complex,str,bytes)):
+    upd(type(x).__name__); upd(repr(x))
+  elif x is Ellipsis:
+    upd('ellipsis')
+  elif isinstance(x,slice):
+    upd('slice'); _hash_into(sha,(x.start,x.stop,x.step),_seen)
+  elif isinstance(x,(set,frozenset)):
+    upd(type(x).__name__)
+    for item in sorted(x, key=repr): _hash_into(sha,item,_seen)
+  elif isinstance(x,np.ndarray):
+    upd(x.dtype); upd(x.shape)
+    sha.update(np.ascontiguousarray(x).tobytes())
+  elif isinstance(x,np.generic):
+    _hash_into(sha,x.item(),_seen)
+  elif isinstance(x,(list,tuple)):
+    upd(type(x).__name__)
+    for item in x: _hash_into(sha,item,_seen)
+  elif isinstance(x,dict):
+    for key in sorted(x, key=str):
+      upd(key); _hash_into(sha,x[key],_seen)
+  elif isinstance(x,types.CodeType):
+    sha.update(x.co_code)
+    upd(x.co_names)
+    for c in x.co_consts: _hash_into(sha,c,_seen)
+  elif isinstance(x,functools.partial):
+    _hash_into(sha,(x.func,x.args,x.keywords),_seen)
+  elif callable(x):
+    if id(x) in _seen: return
+    _seen.add(id(x))
+    if isinstance(x,NamedFunc):
+      x = x._func
+    x = getattr(x,'__wrapped__',x) # undo functools.wraps
+    upd(getattr(x,'__module__','')); upd(getattr(x,'__qualname__',''))
+    if not hasattr(x,'__code__') and not isinstance(x,type) \
+        and hasattr(x,'__dict__'):
+      # Callable instance: hash its class's __call__ and attributes.
+      upd(type(x).__module__); upd(type(x).__qualname__)
+      _hash_into(sha,getattr(type(x),'__call__',None),_seen)
+      _hash_into(sha,vars(x),_seen)
+    elif hasattr(x,'__code__'):
+      _hash_into(sha,x.__code__,_seen)
+      # Include the closure and the module-level (scalar) parameters,
+      # e.g. Force of mods.Lorenz95.core, which is changed by some scripts.
+      for cell in (x.__closure__ or ()):
+        try:               _hash_into(sha,cell.cell_contents,_seen)
+        except ValueError: pass # empty cell
+      # Include the (user-defined) functions it calls, e.g. dxdt.
+      for name in sorted(_code_names(x.__code__)):
+        g = getattr(x,'__globals__',{}).get(name)
+        if isinstance(g,types.FunctionType):
+          _hash_into(sha,g,_seen)
+      module = sys.modules.get(x.__module__)
+      if module is not None:
+        for key, val in sorted(vars(module).items()):
+          if not key.startswith('_') and \
+              isinstance(val,(bool,int,float,str,list,tuple)) and \
+              len(repr(val)) < 10**4:
+            upd(key); _hash_into(sha,val,_seen)
+  elif isinstance(x,CovMat):
+    upd('CovMat'); upd(x.trunc)
+    if '_S' in vars(x):
+      S = x._S
+      upd('_S'); _hash_into(sha,(S.shape,S.data,S.indices,S.indptr),_seen)
+    elif '_d0' in vars(x):
+      upd('_d0'); _hash_into(sha,(x._LR,x._d0),_seen)
+    else:
+      for key in ['_c','_C','_R','diag']:
+        if key in vars(x):
+          upd(key); _hash_into(sha,vars(x)[key],_seen)
+          break
+  elif isinstance(x,RV):
+    upd(type(x).__name__)
+    dct = {k:v for k,v in vars(x).items() if k!='icdf_interp'}
+    if 'file' in dct and os.path.isfile(dct['file']):
+      dct['file_mtime'] = os.path.getmtime(dct['file'])
+    _hash_into(sha,dct,_seen)
+  else:
+    # Fallback for other constants: type and pickle (or repr, if unpicklable).
+    upd(type(x).__module__); upd(type(x).__qualname__)
+    try:
+      sha.update(pickle.dumps(x,protocol=4))
+    except Exception:
+      upd(repr(x))
+
+def _code_names(code):
+  "Global names referenced by code, including by nested code (e.g. lambdas)."
+  names = set(code.co_names)
+  for c in code.co_consts:
+    if isinstance(c,types.CodeType):
+      names |= _code_names(c)
+  return names
+
+def setup_hash(setup,rng_state=True):
+  """
+  Stable hash (hex str) of the TwinSetup properties that determine simulate(),
+  i.e. the models (f,h), Chronology, noises, and X0.
+  If rng_state: also include the state of np.random.
+  """
+  sha = hashlib.sha1()
+  for op in [setup.f, setup.h]:
+    _hash_into(sha,(op.m,op.model,op.noise))
+  _hash_into(sha,(setup.t.dt,setup.t.dkObs,setup.t.K))
+  _hash_into(sha,setup.X0)
+  if rng_state:
+    _hash_into(sha,np.random.get_state())
+  return sha.hexdigest()
+
+def sim_cache(setup,desc,cache_dir):
+  """
+  Return simulate(setup) from cache_dir/<setup_hash>/ if present,
+  otherwise simulate() and store the result there.
+
+  xx,yy are stored as .npy files and loaded as read-only memory-maps.
+  The state of np.random after the simulation is also stored and restored,
+  so that subsequent random draws are the same as without caching.
+  """
+  key     = setup_hash(setup)
+  dirpath = os.path.join(cache_dir,key)
+
+  if not os.path.isdir(dirpath):
+    xx,yy = simulate(setup,desc)
+    # Write to tmp dir, then rename, to avoid partial entries.
+    tmp = dirpath + '.tmp' + str(os.getpid())
+    makedirs(tmp, exist_ok=True)
+    np.save(os.path.join(tmp,'xx.npy'),xx)
+    np.save(os.path.join(tmp,'yy.npy'),yy)
+    with open(os.path.join(tmp,'rng.pkl'),'wb') as F:
+      pickle.dump(np.random.get_state(),F)
+    try:
+      os.rename(tmp,dirpath)
+    except OSError:
+      shutil.rmtree(tmp) # Another process got there first.
+    _evict(cache_dir,keep=key)
+
+  # Load
+  os.utime(dirpath) # Mark as recently used
+  xx  = np.load(os.path.join(dirpath,'xx.npy'), mmap_mode='r')
+  yy  = np.load(os.path.join(dirpath,'yy.npy'), mmap_mode='r')
+  with open(os.path.join(dirpath,'rng.pkl'),'rb') as F:
+    np.random.set_state(pickle.load(F))
+  return xx,yy
+
+def _evict(cache_dir,keep=None,max_bytes=None):
+  "Remove least-recently-used entries until the cache size <= max_bytes."
+  if max_bytes is None:
+    max_bytes = SIM_CACHE_MAX_BYTES
+  entries = []
+  for name in os.listdir(cache_dir):
+    path = os.path.join(cache_dir,name)
+    if name==keep or '.tmp' in name or not os.path.isdir(path):
+      continue
+    size = sum(os.path.getsize(os.path.join(path,f)) for f in os.listdir(path))
+    entries.append((os.path.getmtime(path),size,path))
+  total  = sum(e[1] for e in entries)
+  if keep is not None:
+    path   = os.path.join(cache_dir,keep)
+    total += sum(os.path.getsize(os.path.join(path,f)) for f in os.listdir(path))
+  for _,size,path in sorted(entries):
+    if total <= max_bytes:
+      break
+    shutil.rmtree(path)
+    total -= size
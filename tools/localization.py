@@ -24,7 +24,7 @@ def unravel(inds, shape, order='C'):
   return IJ
 
 
-# TODO: Can replace by from scipy.spatial.distance ?
+# For many centres, use loc_table() (which uses scipy.spatial.cKDTree).
 def distance_nD(centr, domain, shape, periodic=True):
   """
   Euclidian distance between centr and domain,
@@ -90,6 +90,53 @@ def dist2coeff(dists, radius, tag=None):
   return coeffs
 
 
+def support(radius, tag=None, cutoff=None):
+  """
+  Distance beyond which dist2coeff(dists,radius,tag) <= cutoff,
+  i.e. the support of the taper (e.g. 2R for 'GC').
+  """
+  if tag    is None: tag    = TAG
+  if cutoff is None: cutoff = CUTOFF
+  if   tag == 'GC':     return radius * 1.7386 * 2
+  elif tag == 'Cubic':  return radius * 1.8676
+  elif tag == 'Quadro': return radius * 1.7080
+  elif tag == 'Step':   return radius
+  elif cutoff <= 0:     return np.inf
+  elif tag == 'Gauss':  return radius * sqrt(-2*log(cutoff))
+  elif tag == 'Exp':    return radius * (-2*log(cutoff))**(1/3)
+  else: raise KeyError('No such coeff function.')
+
+
+def neighbours(cIJ, dIJ, shape, dmax, periodic=True):
+  """
+  All pairs (of centre cIJ[:,i] and domain pt dIJ[:,j]) within distance dmax,
+  found by a (batched) query of KD-trees, with periodic boxes if periodic.
+  Returns i, j, dists, sorted by i, then j.
+  """
+  from scipy.spatial import cKDTree
+  box   = np.atleast_1d(shape).astype(float) if periodic else None
+  ctree = cKDTree(cIJ.T.astype(float), boxsize=box)
+  dtree = cKDTree(dIJ.T.astype(float), boxsize=box)
+  pairs = ctree.sparse_distance_matrix(dtree, dmax, output_type='ndarray')
+  order = np.lexsort((pairs['j'], pairs['i']))
+  pairs = pairs[order]
+  return pairs['i'], pairs['j'], pairs['v']
+
+
+def _all_pairs(cIJ, dIJ, shape):
+  "As neighbours(), but for dmax=inf (computed in chunks of centres)."
+  nc, nd = cIJ.shape[1], dIJ.shape[1]
+  rows, cols, dists = [], [], []
+  for cc in np.array_split(arange(nc), int(ceil(nc*nd/2**22)) or 1):
+    # As distance_nD, but for multiple centres
+    delta  = abs(cIJ[:,cc,None] - dIJ[:,None,:])
+    delta  = np.where(delta>shape[:,None,None]/2, shape[:,None,None]-delta, delta)
+    rows  += [np.repeat(cc, nd)]
+    cols  += [np.tile(arange(nd), len(cc))]
+    dists += [sqrt(np.sum(delta*delta,axis=0)).ravel()]
+  return np.concatenate(rows), np.concatenate(cols), np.concatenate(dists)
+
+
 def inds_and_coeffs(centr, domain, domain_shape,
     radius, cutoff=None, tag=None):
   """
@@ -112,6 +159,82 @@ def inds_and_coeffs(centr, domain, domain_shape,
   return inds, coeffs
 
 
+class LocTable:
+  """
+  Table (in CSR format) of the local inds and coeffs of each centre,
+  i.e. table(i) == inds_and_coeffs(cIJ[:,i], dIJ, ...), as for locf_at(i).
+  The (read-only) output arrays are views into the table.
+  """
+  def __init__(self,indptr,inds,coeffs):
+    self.indptr = indptr
+    self.inds   = inds
+    self.coeffs = coeffs
+    for a in [indptr,inds,coeffs]: a.setflags(write=False)
+
+  def __call__(self,i):
+    a,b = self.indptr[i], self.indptr[i+1]
+    return self.inds[a:b], self.coeffs[a:b]
+
+  def __len__(self):
+    return len(self.indptr)-1
+
+  @staticmethod
+  def from_locf(locf_at,n):
+    "Tabulate locf_at(i) for i in range(n) (unless it already is a LocTable)."
+    if isinstance(locf_at,LocTable):
+      return locf_at
+    locs   = [locf_at(i) for i in range(n)]
+    indptr = np.concatenate([[0], np.cumsum([len(inds) for inds,_ in locs])])
+    inds   = np.concatenate([asarray(inds,int)     for inds,_ in locs] + [zeros(0,int)])
+    coeffs = np.concatenate([asarray(coeffs,float) for _,coeffs in locs] + [zeros(0)])
+    return LocTable(indptr.astype(int), inds, coeffs)
+
+
+# LRU memo of loc_table()
+TABLES_MAXSIZE = 16
+_tables = OrderedDict()
+
+def loc_table(cIJ, dIJ, shape, radius, cutoff=None, tag=None):
+  """
+  LocTable of inds_and_coeffs() for all centres cIJ (cartesian indices, d-by-nc)
+  in the domain dIJ (d-by-nd). Unless the taper has infinite support,
+  only the pairs within the support are computed (see neighbours()).
+  Otherwise, all distances are computed (vectorized, in chunks of centres).
+
+  Memoized (LRU, max TABLES_MAXSIZE tables) on the values of the input,
+  so that e.g. the table for the obs network is reused across
+  cycles and configs, and only rebuilt if the obs set changes.
+  """
+  if cutoff is None: cutoff = CUTOFF
+  if tag    is None: tag    = TAG
+  cIJ   = np.atleast_2d(cIJ)
+  dIJ   = np.atleast_2d(dIJ)
+  shape = np.atleast_1d(shape)
+
+  key = (cIJ.tobytes(), cIJ.shape, dIJ.tobytes(), dIJ.shape,
+      tuple(shape), radius, cutoff, tag)
+  if key in _tables:
+    _tables.move_to_end(key)
+    return _tables[key]
+
+  dmax = support(radius, tag, cutoff)
+  if np.isfinite(dmax):
+    rows, cols, dists = neighbours(cIJ, dIJ, shape, dmax)
+  else:
+    rows, cols, dists = _all_pairs(cIJ, dIJ, shape)
+  C    = dist2coeff(dists, radius, tag)
+  keep = C > cutoff
+  rows, cols, C = rows[keep], cols[keep], C[keep]
+
+  indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=cIJ.shape[1]))])
+  table  = LocTable(indptr, cols, C)
+
+  _tables[key] = table
+  if len(_tables) > TABLES_MAXSIZE:
+    _tables.popitem(last=False)
+  return table
+
+
 def partial_direct_obs_1d_loc_setup(m,jj):
   "m: state length. jj: indices of direct obs in state."
   ii  = arange(m)      # state inds
@@ -120,13 +243,12 @@ def partial_direct_obs_1d_loc_setup(m,jj):
   def locf(radius,direction,t,tag=None):
     "return function that returns indices_and_coeffs for Lorenz95"
     if direction is 'x2y':
-      def locf_at(i):
-        return inds_and_coeffs(dIJ[:,i], oIJ, m, radius, tag=tag)
+      return loc_table(dIJ, oIJ, m, radius, tag=tag)
     elif direction is 'y2x':
-      def locf_at(j):
-        return inds_and_coeffs(oIJ[:,j], dIJ, m, radius, tag=tag)
+      return loc_table(oIJ, dIJ, m, radius, tag=tag)
+    elif direction is 'y2y':
+      return loc_table(oIJ, oIJ, m, radius, tag=tag)
     else: raise KeyError
-    return locf_at
   return locf
 
 
@@ -138,6 +260,8 @@ def no_localization(m,jj):
     elif direction is 'y2x':
       # TODO: Not tested
       no_localization = lambda j: ( arange(m), ones(m) )
+    elif direction is 'y2y':
+      no_localization = lambda j: ( arange(len(jj)), ones(len(jj)) )
     else: raise KeyError
     return no_localization
   return locf
@@ -143,7 +143,8 @@ class CovMat():
 
   Main tasks:
     - Unifying the covariance representations:
-      full, diagonal, reduced-rank sqrt.
+      full, diagonal, reduced-rank sqrt,
+      and structured (circulant, sparse, low-rank-plus-diagonal).
     - Convenience constructor and printing.
     - Convenience transformations with memoization.
       E.g. replaces:
@@ -152,6 +153,10 @@ class CovMat():
       >  noise.C.sym_sqrt = S
       This (hiding it internally) becomes particularly useful
       if the covariance matrix changes with time (but repeat).
+
+  All of the (dense) fields (full, Left, V, sym_sqrt_inv, ...) are computed
+  lazily, i.e. only if requested. Where possible, use the products
+  (whiten, solve, colour), which are matrix-free for the structured kinds.
   """
 
   ##################################
@@ -160,16 +165,21 @@ class CovMat():
   def __init__(self,data,kind='full_or_diag',trunc=1.0):
     """
     The covariance (say P) can be input (specified in the following ways):
-    kind    : data
+    kind         : data
     ----------------------
-    'full'  : full m-by-m array (P)
-    'diag'  : diagonal of P (assumed diagonal)
-    'E'     : ensemble (N-by-m) with sample cov P
-    'A'     : as 'E', but pre-centred by mean(E,axis=0)
-    'Right' : any R such that P = R.T@R (e.g. weighted form of 'A')
-    'Left'  : any L such that P = L@L.T
+    'full'       : full m-by-m array (P)
+    'diag'       : diagonal of P (assumed diagonal)
+    'E'          : ensemble (N-by-m) with sample cov P
+    'A'          : as 'E', but pre-centred by mean(E,axis=0)
+    'Right'      : any R such that P = R.T@R (e.g. weighted form of 'A')
+    'Left'       : any L such that P = L@L.T
+    'circulant'  : first column (c) of P, which is (symmetric) circulant,
+                   i.e. P[i,j] = c[(i-j)%m]. Uses the FFT.
+    'sparse'     : P as a scipy.sparse matrix (e.g. banded).
+    'Right+diag' : (R, d) such that P = R.T@R + diag(d), with R low-rank.
+    'Left+diag'  : (L, d) such that P = L@L.T + diag(d).
     """
-    
+
     # Cascade if's down to 'Right'
     if kind=='E':
       mu      = mean(data,0)
@@ -182,6 +192,9 @@ class CovMat():
     if kind=='Left':
       data    = data.T
       kind    = 'Right'
+    if kind=='Left+diag':
+      data    = (data[0].T, data[1])
+      kind    = 'Right+diag'
     if kind=='Right':
       # If a cholesky factor has been input, we will not
       # automatically go for the EVD, seeing as e.g. the
@@ -189,46 +202,64 @@ class CovMat():
       R       = exactly_2d(data)
       self._R = R
       self._m = R.shape[1]
+    elif kind=='Right+diag':
+      self._LR = exactly_2d(data[0])
+      self._m  = self._LR.shape[1]
+      self._d0 = data[1]*ones(self._m)
+    elif kind=='sparse':
+      self._S = sp.sparse.csr_matrix(data)
+      self._m = self._S.shape[0]
+    elif kind=='circulant':
+      c         = exactly_1d(data)
+      self._c   = c
+      self._m   = len(c)
+      # The eigenvalues are given by the FFT. Only the rfft half is kept,
+      # so that products (of real arrays) can be done with rfft/irfft.
+      lam       = CovMat._clip(np.fft.rfft(c).real)
+      self._lam = lam
+      # Sorted (and repeated) as they would be by an EVD
+      m         = self._m
+      d         = np.sort(np.concatenate([lam, lam[1:(m+1)//2]]))[::-1]
+      self._rk  = (d>0).sum()
+      self._d   = d[:self._rk]
     else:
       if kind=='full_or_diag':
         data = np.atleast_1d(data)
         if data.ndim==1 and len(data) > 1: kind = 'diag'
         else:                              kind = 'full'
       if kind=='full':
-        # If full has been imput, then we have memory for an EVD,
-        # which will probably be put to use in the DA.
+        # The EVD is done lazily (see _do_EVD)
         C           = exactly_2d(data)
         self._C     = C
         m           = len(C)
-        d,V         = eigh(C)
-        d           = CovMat._clip(d)
-        rk          = (d>0).sum()
-        d           =  d  [-rk:][::-1]
-        V           = (V.T[-rk:][::-1]).T
-        self._assign_EVD(m,rk,d,V)
+        self._m     = m
+        if m>1 and not np.any(C.ravel()[1:].reshape(m-1,m+1)[:,:-1]):
+          # C is diagonal (e.g. 4*eye(p)). Treat as 'diag' (below),
+          # except for the eigenvectors (see _do_EVD).
+          data = diag(C)
+          kind = 'diag'
+          self._diag_of_full = True
+      if kind=='full':
+        pass
       elif kind=='diag':
-        # With diagonal input, it would be great to use a sparse
-        # (or non-existant) representation of V,
-        # but that would require so much other adaption of other code.
+        # The EVD is only represented by the (sorting) indices, idx,
+        # i.e. V[idx[j],j] = 1. The (dense) V is only made if requested.
         d         = exactly_1d(data)
         self.diag = d
         m         = len(d)
         if np.all(d==d[0]):
-          V   = eye(m)
+          idx = arange(m)
           rk  = m
         else:
           d   = CovMat._clip(d)
           rk  = (d>0).sum()
           idx = np.argsort(d)[::-1]
           d   = d[idx][:rk]
-          nn0 = idx<rk
-          V   = zeros((m,rk))
-          V[nn0, idx[nn0]] = 1
-        self._assign_EVD(m,rk,d,V)
+        self._m, self._d, self._rk, self._idx = m, d, rk, idx
       else:
         raise KeyError
 
-    self._kind  = kind
+    self._kind  = 'full' if hasattr(self,'_C') else kind
     self._trunc = trunc
 
 
@@ -250,6 +281,18 @@ class CovMat():
     """Truncation threshold."""
     return self._trunc
 
+  @property
+  def is_diag(self):
+    """Whether the matrix is diagonal (input as 'diag', or as a diagonal 'full').
+    If so, the transformations below are computed elementwise."""
+    return hasattr(self,'_idx')
+
+  @property
+  def is_circulant(self):
+    """Whether the matrix was input as 'circulant'.
+    If so, the transformations below are computed with the FFT."""
+    return hasattr(self,'_c')
+
   ##################################
   # "Non-EVD" stuff
   ##################################
@@ -258,6 +301,14 @@ class CovMat():
     "Full covariance matrix"
     if hasattr(self,'_C'):
       return self._C
+    elif self.is_diag:
+      C = diag(self.diag)
+    elif self.is_circulant:
+      C = sla.circulant(self._c)
+    elif hasattr(self,'_S'):
+      C = self._S.toarray()
+    elif hasattr(self,'_d0'):
+      C = self._LR.T @ self._LR + diag(self._d0)
     else:
       C = self.Left @ self.Left.T
     self._C = C
@@ -268,6 +319,12 @@ class CovMat():
     "Diagonal of covariance matrix"
     if hasattr(self,'_C'):
       return diag(self._C)
+    elif self.is_circulant:
+      return self._c[0]*ones(self.m)
+    elif hasattr(self,'_S'):
+      return self._S.diagonal()
+    elif hasattr(self,'_d0'):
+      return (self._LR**2).sum(axis=0) + self._d0
     else:
       return (self.Left**2).sum(axis=1)
 
@@ -277,6 +334,8 @@ class CovMat():
     and that its width is somewhere betwen the rank and m."""
     if hasattr(self,'_R'):
       return self._R.T
+    elif self._is_structured:
+      return self.Right.T
     else:
       return self.V * sqrt(self.ews)
   @property
@@ -285,9 +344,47 @@ class CovMat():
     and that its height is somewhere betwen the rank and m."""
     if hasattr(self,'_R'):
       return self._R
+    elif self.is_circulant:
+      return self.sym_sqrt
+    elif hasattr(self,'_d0'):
+      return np.vstack([self._LR, diag(sqrt(self._d0))])
+    elif self._banded_chol is not None:
+      return self._banded_chol.toarray()
     else:
       return self.Left.T
 
+  @property
+  def len_Right(self):
+    "len(Right), without forming Right."
+    if   hasattr(self,'_R'):   return len(self._R)
+    elif hasattr(self,'_d0'):  return len(self._LR) + self.m
+    elif self.is_circulant:    return self.m
+    elif self._is_structured:  return self.m
+    else:                      return self.rk
+
+  @property
+  def _is_structured(self):
+    return self.is_circulant or hasattr(self,'_d0') or \
+        (hasattr(self,'_S') and self._banded_chol is not None)
+
+  @lazy_property
+  def _banded_chol(self):
+    "Upper (banded) Cholesky factor U (sparse) s.t. C = U.T@U, or None."
+    if not hasattr(self,'_S'):
+      return None
+    S  = self._S.tocoo()
+    bw = np.abs(S.row-S.col).max(initial=0)
+    if bw > self.m//4:
+      return None # Not banded
+    ab = zeros((bw+1,self.m))
+    for k in range(bw+1):
+      ab[bw-k,k:] = self._S.diagonal(k)
+    try:
+      U = sla.cholesky_banded(ab, lower=False)
+    except nla.LinAlgError:
+      return None # Not pos-def
+    return sp.sparse.dia_matrix((U, arange(bw,-1,-1)), shape=(self.m,self.m)).tocsr()
+
   ##################################
   # EVD stuff
   ##################################
@@ -302,14 +399,35 @@ class CovMat():
     return np.where(d<1e-8*d.max(),0,d)
 
   def _do_EVD(self):
-    if not self.has_done_EVD():
-      V,s,UT = svd0(self._R)
-      m      = UT.shape[1]
-      d      = s**2
-      d      = CovMat._clip(d)
-      rk     = (d>0).sum()
-      d      = d [:rk]
-      V      = UT[:rk].T
+    if self.is_diag:
+      if '_V' not in vars(self) and hasattr(self,'_diag_of_full'):
+        # Use the basis (order and signs) of eigh, as for any 'full',
+        # so that the sampling (colour) is unchanged by the diag treatment.
+        d,V     = eigh(self._C)
+        rk      = self._rk
+        self._d = CovMat._clip(d)[-rk:][::-1]
+        self._V = (V.T[-rk:][::-1]).T
+      elif '_V' not in vars(self):
+        self._V = zeros((self.m,self.rk))
+        self._V[self._idx[:self.rk], arange(self.rk)] = 1
+    elif not self.has_done_EVD():
+      if hasattr(self,'_R'):
+        V,s,UT = svd0(self._R)
+        m      = UT.shape[1]
+        d      = s**2
+        d      = CovMat._clip(d)
+        rk     = (d>0).sum()
+        d      = d [:rk]
+        V      = UT[:rk].T
+      else:
+        # Dense EVD. For 'full', which then also has the memory for it.
+        C      = self.full
+        m      = len(C)
+        d,V    = eigh(C)
+        d      = CovMat._clip(d)
+        rk     = (d>0).sum()
+        d      =  d  [-rk:][::-1]
+        V      = (V.T[-rk:][::-1]).T
       self._assign_EVD(m,rk,d,V)
 
   def has_done_EVD(self):
@@ -320,7 +438,7 @@ class CovMat():
   @property
   def ews(self):
     """Eigenvalues. Only outputs the positive values (i.e. len(ews)==rk)."""
-    self._do_EVD()
+    if not (self.is_diag or self.is_circulant): self._do_EVD()
     return self._d
   @property
   def V(self):
@@ -330,10 +448,29 @@ class CovMat():
   @property
   def rk(self):
     """Rank, i.e. the number of positive eigenvalues."""
+    if self.is_diag or self.is_circulant or self.has_done_EVD():
+      return self._rk
+    if self._is_full_rank:
+      return self.m
     self._do_EVD()
     return self._rk
 
-  
+  @lazy_property
+  def _is_full_rank(self):
+    "Whether full rank is known from the structure (i.e. without the EVD)."
+    if hasattr(self,'_d0'):
+      return bool(np.all(self._d0>0))
+    if hasattr(self,'_S'):
+      if self._banded_chol is not None:
+        return True # Pos-def
+      try:
+        self._splu
+        return True # Non-singular
+      except RuntimeError:
+        return False
+    return False
+
+
   ##################################
   # transform_by properties
   ##################################
@@ -343,12 +480,50 @@ class CovMat():
     (via Taylor expansion).
     """
 
+    if self.is_diag:
+      return diag(self._diag_transform(fun))
+    if self.is_circulant and self.trunc==1.0:
+      return sla.circulant(np.fft.irfft(self._spectral_transform(fun), self.m))
+
     r = truncate_rank(self.ews,self.trunc,True)
     V = self.V[:,:r]
     w = self.ews[:r]
 
     return (V * fun(w)) @ V.T
-  
+
+  def _diag_transform(self,fun):
+    "Diagonal of transform_by(fun), for is_diag."
+    r = truncate_rank(self.ews,self.trunc,True)
+    t = zeros(self.m)
+    t[self._idx[:r]] = fun(self.ews[:r])
+    return t
+
+  def _spectral_transform(self,fun):
+    "rfft (eigenvalues) of transform_by(fun), for is_circulant (without trunc)."
+    lam = self._lam
+    t   = zeros(len(lam))
+    t[lam>0] = fun(lam[lam>0])
+    return t
+
+  def _circ_mult(self,A,fun):
+    "A @ transform_by(fun), for is_circulant, using the FFT."
+    return np.fft.irfft(np.fft.rfft(A)*self._spectral_transform(fun), self.m)
+
+  @lazy_property
+  def _diag_sqrt_inv(self): return self._diag_transform(lambda x: 1/sqrt(x))
+  @lazy_property
+  def _diag_inv(self):
+    self._check_full_rank()
+    return 1/self.diag
+  @lazy_property
+  def _splu(self):
+    return ssl.splu(self._S.tocsc())
+  @lazy_property
+  def _woodbury(self):
+    "For solve(), with 'Right+diag': R/d0 and inv(I + R/d0@R.T)."
+    Rd = self._LR / self._d0
+    return Rd, inv(eye(len(Rd)) + Rd @ self._LR.T)
+
   @lazy_property
   def sym_sqrt(self):
     "S such that C = S@S (and i.e. S is square). Uses trunc-level."
@@ -364,11 +539,14 @@ class CovMat():
     "Pseudo-inverse. Uses trunc-level."
     return self.transform_by(lambda x: 1/x)
 
-  @lazy_property
-  def inv(self):
+  def _check_full_rank(self):
     if self.m != self.rk:
       raise RuntimeError("Matrix is rank deficient, "+
           "and cannot be inverted. Use .tinv() instead?")
+
+  @lazy_property
+  def inv(self):
+    self._check_full_rank()
     # Temporarily remove any truncation
     tmp = self.trunc
     self._trunc = 1.0
@@ -377,6 +555,101 @@ class CovMat():
     self._trunc = tmp
     return Inv
 
+  ##################################
+  # Products (matrix-free where possible)
+  ##################################
+  def whiten(self,A):
+    "A @ sym_sqrt_inv, e.g. for A: ensemble anomalies (N-by-m) or a vector."
+    if self.is_diag:
+      return A * self._diag_sqrt_inv
+    elif self.is_circulant and self.trunc==1.0:
+      return self._circ_mult(A, lambda x: 1/sqrt(x))
+    else:
+      return A @ self.sym_sqrt_inv
+
+  def solve(self,A):
+    "A @ inv (i.e. A @ C^{-1})."
+    if self.is_diag:
+      return A * self._diag_inv
+    elif self.is_circulant:
+      self._check_full_rank()
+      return self._circ_mult(A, lambda x: 1/x)
+    elif hasattr(self,'_S'):
+      # C is symmetric, so A @ C^{-1} = (C^{-1} @ A.T).T
+      A = asarray(A)
+      return self._splu.solve(A.reshape((-1,self.m)).T).T.reshape(A.shape)
+    elif hasattr(self,'_d0') and np.all(self._d0>0):
+      # Woodbury
+      Rd, G = self._woodbury
+      Ad    = A / self._d0
+      return Ad - ((Ad @ self._LR.T) @ G) @ Rd
+    else:
+      return A @ self.inv
+
+  def colour(self,D):
+    "D @ Right, e.g. for D = randn((N,len(Right)))."
+    if self.is_diag and not hasattr(self,'_diag_of_full'):
+      X = zeros(D.shape[:-1]+(self.m,))
+      X[...,self._idx[:self.rk]] = D * sqrt(self.ews)
+      return X
+    elif self.is_circulant:
+      return self._circ_mult(D, sqrt)
+    elif hasattr(self,'_d0'):
+      k = len(self._LR)
+      return D[...,:k] @ self._LR + D[...,k:] * sqrt(self._d0)
+    elif self._banded_chol is not None:
+      D = asarray(D)
+      return (self._banded_chol.T @ D.reshape((-1,self.m)).T).T.reshape(D.shape)
+    else:
+      return D @ self.Right
+
+  def _matvec(self,x):
+    "C @ x, without forming C (for the structured kinds)."
+    if self.is_circulant:
+      return self._circ_mult(x, lambda x: x)
+    elif hasattr(self,'_S'):
+      return self._S @ x
+    elif hasattr(self,'_d0'):
+      return self._LR.T @ (self._LR @ x) + self._d0 * x
+    else:
+      raise KeyError
+
+  def leading_EVD(self,n):
+    """
+    The (up to) n leading (positive) eigenvalues, and the corresponding
+    eigenvectors (as rows: a sparse matrix for is_diag),
+    computed without forming full or Right, if the structure allows.
+    """
+    if self.has_done_EVD():
+      return self.ews[:n], self.V[:,:n].T
+    elif self.is_diag:
+      r = min(n,self.rk)
+      VT = sp.sparse.csr_matrix((ones(r),(arange(r),self._idx[:r])), shape=(r,self.m))
+      return self.ews[:r], VT
+    elif (self.is_circulant or hasattr(self,'_S') or hasattr(self,'_d0')) and n < self.m-1:
+      op  = ssl.LinearOperator((self.m,self.m), matvec=self._matvec, dtype=float)
+      v0  = np.random.RandomState(0).rand(self.m)
+      d,V = ssl.eigsh(op, n, which='LA', v0=v0)
+      idx = np.argsort(d)[::-1]
+      d   = d[idx]
+      d   = d[d>1e-8*max(d[0],0)] if d[0]>0 else d[:0]
+      return d, V[:,idx[:len(d)]].T
+    else:
+      _,s,UT = leading_svd(self.Right, n)
+      return s**2, UT
+
+  def _block(self,ii,jj):
+    "C[ii][:,jj], without forming C (for the structured kinds)."
+    if self.is_circulant:
+      return self._c[(ii[:,None]-jj[None,:]) % self.m]
+    elif hasattr(self,'_S'):
+      return self._S[ii][:,jj].toarray()
+    elif hasattr(self,'_d0'):
+      B = self._LR[:,ii].T @ self._LR[:,jj]
+      return B + (ii[:,None]==jj[None,:]) * self._d0[ii][:,None]
+    else:
+      raise KeyError
+
   ##################################
   # __repr__
   ##################################
@@ -387,8 +660,10 @@ class CovMat():
 
     # Rank
     s += "\n   rk: "
-    if self.has_done_EVD():
+    if self.has_done_EVD() or self.is_circulant:
       s += str(self.rk)
+    elif self.is_diag or hasattr(self,'_S') or hasattr(self,'_d0'):
+      s += "<=" + str(self.m)
     else:
       s += "<=" + str(self.Right.shape[0])
 
@@ -401,19 +676,24 @@ class CovMat():
       # Only compute corners of full matrix
       K  = np.get_printoptions()['edgeitems']
       s += " (only computing corners)"
-      if hasattr(self,'_R'):
-        U = self.Left[:K ,:] # Upper
-        L = self.Left[-K:,:] # Lower
+      if self.is_circulant or hasattr(self,'_S') or hasattr(self,'_d0'):
+        ii, jj = arange(K), arange(self.m-K,self.m)
+        NW, NE = self._block(ii,ii), self._block(ii,jj)
+        SW, SE = self._block(jj,ii), self._block(jj,jj)
       else:
-        U = self.V[:K ,:] * sqrt(self.ews)
-        L = self.V[-K:,:] * sqrt(self.ews)
-
-      # Corners
-      NW = U@U.T
-      NE = U@L.T
-      SW = L@U.T
-      SE = L@L.T
-      
+        if hasattr(self,'_R'):
+          U = self.Left[:K ,:] # Upper
+          L = self.Left[-K:,:] # Lower
+        else:
+          U = self.V[:K ,:] * sqrt(self.ews)
+          L = self.V[-K:,:] * sqrt(self.ews)
+
+        # Corners
+        NW = U@U.T
+        NE = U@L.T
+        SW = L@U.T
+        SE = L@L.T
+
       # Concatenate corners. Fill "cross" between them with nan's
       N  = np.hstack([NW,nan*ones((K,1)),NE])
       S  = np.hstack([SW,nan*ones((K,1)),SE])
@@ -432,26 +712,6 @@ class CovMat():
     s = repr_type_and_name(self) + s.replace("\n","\n  ")
     return s
 
-# TODO? The diagonal representation is NOT memory-efficient.
-#
-# But there's no simple way of making so, especially since the sparse class
-# (which would hold the eigenvectors) is a subclass of the matrix class,
-# which interprets * as @, and so, when using this class,
-# one would have to be always careful about it
-# 
-# One could try to overload +-@/ (for CovMat),
-# but unfortunately there's no right/post-application version of @ and /
-# (indeed, how could there be for binary operators?)
-# which makes this less interesting.
-# Hopefully this restriction is not an issue,
-# as diagonal matrices are mainly used for observation error covariance,
-# which are usually not infeasibly large.
-#
-# Another potential solution is to subclass the sparse matrix,
-# and revert its operator definitions to that of ndarray. 
-# and use it for the V (eigenvector) matrix that gets output
-# by various fields of CovMat.
-
 
 
 
@@ -1,6 +1,7 @@
 # Misc math
 
 from common import *
+import threading
 
 def is1d(a):
   """ Works for list and row/column arrays and matrices"""
@@ -106,6 +107,41 @@ def rk4(f, x0, t, dt):
   k4 = dt * f(t+dt   , x0+k3)
   return x0 + (k1 + 2.*(k2 + k3) + k4)/6.0
 
+@functools.lru_cache(maxsize=8)
+def _rk4_workspace(shape, dtype, thread):
+  "Stage buffers of rk4_inplace(), per (shape, dtype) and thread."
+  return np.empty((5,)+shape, dtype)
+
+def rk4_inplace(f, x0, t, dt, out=None, ws=None):
+  """
+  As rk4(), but for f(t,x,out) that writes into out (not aliasing x),
+  using stage buffers, and writing the result into out.
+  Performs the same floating point operations as rk4() (bit-compatible).
+
+  The stage buffers are ws (shape: (5,)+x0.shape), if provided,
+  e.g. for reentrant use (f calling rk4_inplace with the same x0 shape),
+  or else a (bounded) cache of them, kept per thread.
+  """
+  x0    = asarray(x0)
+  dtype = np.result_type(x0, 1.0)
+  if ws is None:
+    ws  = _rk4_workspace(x0.shape, dtype, threading.get_ident())
+  k1, k2, k3, k4, xs = ws
+  if out is None:
+    out = np.empty(x0.shape, dtype)
+
+  f(t      , x0, k1); k1 *= dt
+  np.divide(k1, 2., out=xs); xs += x0
+  f(t+dt/2., xs, k2); k2 *= dt
+  np.divide(k2, 2., out=xs); xs += x0
+  f(t+dt/2., xs, k3); k3 *= dt
+  np.add   (x0, k3, out=xs)
+  f(t+dt   , xs, k4); k4 *= dt
+
+  k2 += k3; k2 *= 2.
+  k1 += k2; k1 += k4; k1 /= 6.0
+  return np.add(x0, k1, out=out)
+
 def make_recursive(func):
   """
   Return a version of func() whose 2nd argument (k)
@@ -135,7 +171,15 @@ def integrate_TLM(M,dt,method='approx'):
    - 'approx'  : derived from the forward-euler scheme.
    - 'rk4'     : higher-precision approx.
   NB: 'analytic' typically requries higher inflation in the ExtKF.
+
+  If M is a scipy.sparse matrix, so is the resolvent ('approx' or 'rk4'),
+  except for 'analytic', which returns a (matrix-free) LinearOperator
+  that applies the resolvent with scipy.sparse.linalg.expm_multiply
+  (thus avoiding the O(m^3) eig/inv, and the dense resolvent).
+  Use FPFT/PFT for the products with (symmetric) covariances.
   """
+  if sp.sparse.issparse(M):
+    return _integrate_sparse_TLM(M,dt,method)
   if method == 'analytic':
     Lambda,V  = np.linalg.eig(M)
     resolvent = (V * exp(dt*Lambda)) @ np.linalg.inv(V)
@@ -149,6 +193,41 @@ def integrate_TLM(M,dt,method='approx'):
     else:
       raise ValueError
   return resolvent
+
+def FPFT(F,P):
+  """
+  F @ P @ F.T, for symmetric P.
+  F may also be sparse, or a LinearOperator (e.g. from integrate_TLM),
+  for which F.T cannot be the right operand (of ndarray @) in older scipy.
+  """
+  if isinstance(F,np.ndarray):
+    return F@P@F.T
+  return F @ PFT(P,F)
+
+def PFT(P,F):
+  "P @ F.T, for symmetric P. See FPFT."
+  if isinstance(F,np.ndarray):
+    return P@F.T
+  return asarray(F@P).T
+
+def _integrate_sparse_TLM(M,dt,method):
+  "integrate_TLM() for sparse M."
+  if method == 'analytic':
+    A  = (dt*M).tocsr()
+    AT = A.T.tocsr()
+    expm_A  = lambda B: ssl.expm_multiply(A ,B)
+    expm_AT = lambda B: ssl.expm_multiply(AT,B)
+    resolvent = ssl.LinearOperator(M.shape, dtype=A.dtype,
+        matvec=expm_A, rmatvec=expm_AT, matmat=expm_A, rmatmat=expm_AT)
+  else:
+    I = sp.sparse.identity(M.shape[0], format='csr')
+    if method == 'rk4':
+      resolvent = rk4(lambda t,U: M@U, I, np.nan, dt).tocsr()
+    elif method.lower().startswith('approx'):
+      resolvent = (I + dt*M).tocsr()
+    else:
+      raise ValueError
+  return resolvent
     
 
 
@@ -263,6 +342,34 @@ def tsvd(A, threshold=0.99999, avoid_pathological=True):
   s  = s [  :r]
   return U,s,VT
 
+def leading_svd(A,k):
+  """
+  The k leading singular values/vectors of A, as tsvd(A,k), but faster:
+   - If one of the dims of A is small (<=400): via the EVD of the Gram matrix,
+     which only costs a (BLAS) matrix product in the large dim.
+     The (relative) accuracy of the trailing svals is thus reduced.
+   - Otherwise: by Lanczos iterations (scipy's svds), i.e. using only
+     products with A and A.T. Thus, A may also be a (scipy) LinearOperator.
+  Does not affect the (global) random number generator.
+  """
+  m,n = A.shape
+  k   = min(k,m,n)
+  if isinstance(A,np.ndarray) and min(m,n) <= max(400,2*k):
+    if m > n:
+      V,s,UT = leading_svd(A.T,k)
+      return UT.T, s, V.T
+    d,U    = eigh(A @ A.T)
+    U      = U[:,::-1][:,:k]
+    s      = sqrt(d[::-1][:k].clip(0))
+    VT     = U.T @ A
+    nrm    = sqrt((VT**2).sum(axis=1))
+    VT[nrm>0] /= nrm[nrm>0,None]
+    return U, s, VT
+  v0     = np.random.RandomState(0).rand(min(m,n))
+  U,s,VT = ssl.svds(A, k, v0=v0)
+  idx    = np.argsort(s)[::-1]
+  return U[:,idx], s[idx], VT[idx]
+
 def svd0(A):
   """
   Compute the 
@@ -154,9 +154,9 @@ class RV_with_mean_and_cov(RV):
 class GaussRV(RV_with_mean_and_cov):
   """Gaussian (Normal) multivariate random variable."""
   def _sample(self,N):
-    R = self.C.Right
-    D = randn((N,len(R))) @ R
-    return D
+    C = self.C
+    D = randn((N, C.len_Right))
+    return C.colour(D)
 
 class LaplaceRV(RV_with_mean_and_cov):
   """
@@ -95,6 +95,10 @@ def series_mean_with_conf(xx):
   if (not np.isfinite(mu)) or N<5:
     return val_with_conf(mu, np.nan)
   acovf = auto_cov(xx,5)
+  return _mean_with_conf_from_acovf(mu,N,acovf)
+
+def _mean_with_conf_from_acovf(mu,N,acovf):
+  "Final part of series_mean_with_conf (shared with SeriesAccumulator)."
   v     = acovf[0]
   v    /= N
   # Estimate (fit) ACF
@@ -114,6 +118,81 @@ def series_mean_with_conf(xx):
   return vc
 
 
+class SeriesAccumulator():
+  """
+  Online version of series_mean_with_conf():
+  the items of xx are fed one-by-one with push(x),
+  and result() returns (up to round-off) series_mean_with_conf(xx).
+  Memory is O(L), i.e. independent of len(xx).
+
+  The mean and variance are accumulated by Welford's algorithm.
+  For the lagged auto-covariances, the lag products are accumulated,
+  along with the first and last L-1 items (needed to correct for the
+  final mean). To reduce cancellation, these are relative to the first item.
+  """
+  def __init__(self,L=5):
+    self.L     = L
+    self.N     = 0
+    self.mu    = 0.0           # Welford mean
+    self.M2    = 0.0           # Welford sum of sq. deviations
+    self.total = 0.0           # Plain sum (to propagate inf/nan as mean())
+    self.lo    = np.inf
+    self.hi    = -np.inf
+    self.c     = None          # Reference (first) item
+    self.sum_d = 0.0           # sum of (x-c)
+    self.S     = zeros(L)      # S[i] = sum of (x[j]-c)*(x[j+i]-c)
+    self.head  = []            # first L-1 of (x-c)
+    self.tail  = []            # last  L-1 of (x-c)
+
+  def push(self,x):
+    x = float(x)
+    self.N     += 1
+    self.total += x
+    self.lo     = min(self.lo,x) if x==x else x # x!=x <=> isnan(x)
+    self.hi     = max(self.hi,x) if x==x else x
+    # Welford
+    delta       = x - self.mu
+    self.mu    += delta/self.N
+    self.M2    += delta*(x - self.mu)
+    # Lag products
+    if self.c is None:
+      self.c    = x
+    d           = x - self.c
+    self.sum_d += d
+    for i in range(1,min(self.L,len(self.tail)+1)):
+      self.S[i] += self.tail[-i]*d
+    if len(self.head) < self.L-1:
+      self.head.append(d)
+    self.tail   = (self.tail + [d])[-(self.L-1):]
+
+  def acovf(self):
+    "Equals auto_cov(xx,L)."
+    N, mu = self.N, self.mu
+    acovf = zeros(self.L)
+    acovf[0] = self.M2/(N-1)
+    d = mu - self.c
+    for i in range(1,self.L):
+      P = self.sum_d - sum(self.tail[len(self.tail)-i:]) # sum of xx[:N-i]
+      Q = self.sum_d - sum(self.head[:i])                # sum of xx[i:]
+      acovf[i] = (self.S[i] - d*(P+Q) + (N-i)*d**2)/(N-1-i)
+    return acovf
+
+  def result(self):
+    "Equals series_mean_with_conf(xx)."
+    N  = self.N
+    if N==0:
+      # As for a series that was never set (i.e. all nan)
+      return val_with_conf(nan, nan)
+    mu = self.mu if np.isfinite(self.total) else self.total/N
+    # Equivalent to np.allclose(xx,mu)
+    if self.lo==self.hi or \
+        max(self.hi-mu, mu-self.lo) <= 1e-8 + 1e-5*abs(mu):
+      return val_with_conf(mu, 0)
+    if (not np.isfinite(mu)) or N<5 or N<=self.L:
+      return val_with_conf(mu, np.nan)
+    return _mean_with_conf_from_acovf(mu,N,self.acovf())
+
+
 class FAU_series(MLR_Print):
   """
   Container for time series of a statistic from filtering.
@@ -128,6 +207,16 @@ class FAU_series(MLR_Print):
   Data may also be accessed through raw attributes [.a, .f, .u].
   NB: if time series is only from analysis instances (len KObs+1),
       then you should use a simple np.array instead.
+
+  If reduce: the series are not stored, only the current items,
+  so that memory is O(m) rather than O(K*m).
+  For scalar series, the averages (see average()) past the BurnIn
+  are instead accumulated online (see SeriesAccumulator).
+  This requires that the items are set in chronological order.
+
+  If store (a dir): the series are instead stored in <store>/[f,a,u].npy,
+  which are memory-mapped (np.memmap) so that they need not fit in RAM.
+  The layout is time-major, i.e. each item is contiguous on disk.
   """
 
   # Used by MLR_Print
@@ -138,16 +227,21 @@ class FAU_series(MLR_Print):
       'u':'All      (.u)'}
   aliases  = {**MLR_Print.aliases, **aliases}
 
-  def __init__(self,chrono,m,store_u=True,**kwargs):
+  def __init__(self,chrono,m,store_u=True,reduce=False,store=None,mode='w+',**kwargs):
     """
     Constructor.
      - chrono  : a Chronology object.
      - m       : len (or shape) of items in series. 
      - store_u : if False: only the current value is stored.
+     - reduce  : if True: only the current values (and online averages) are stored.
+     - store   : if not None: dir in which to store the series as memmaps.
+     - mode    : memmap mode. 'w+': create (overwrite), 'r' or 'r+': reopen.
      - kwargs  : passed on to ndarrays.
     """
 
     self.store_u = store_u
+    self.reduce  = reduce
+    self.store   = store
     self.chrono  = chrono
 
     # Convert int-len to shape-tuple
@@ -156,13 +250,45 @@ class FAU_series(MLR_Print):
       if m==1: m = ()
       else:    m = (m,)
 
-    self.a   = np.full((chrono.KObs+1,)+m, nan, **kwargs)
-    self.f   = np.full((chrono.KObs+1,)+m, nan, **kwargs)
+    if self.reduce:
+      self.cur   = {sub: np.full(m, nan, **kwargs) for sub in 'fa'}
+      self.k_cur = {sub: None for sub in 'fa'}
+      self.tmp   = np.full(m, nan, **kwargs)
+      self.k_tmp = None
+      if m==():
+        subs       = 'fau' if store_u else 'fa'
+        self.accs  = {sub: SeriesAccumulator() for sub in subs}
+        self.i_acc = {sub: -1 for sub in subs} # last index pushed
+        self.i_dir = {sub: +1 for sub in subs} # order of the indices
+      return
+
+    new = lambda sub, K: self.new_array(sub, (K+1,)+m, mode, **kwargs)
+    self.a   = new('a', chrono.KObs)
+    self.f   = new('f', chrono.KObs)
     if self.store_u:
-      self.u = np.full((chrono.K   +1,)+m, nan, **kwargs)
+      self.u = new('u', chrono.K)
     else:
       self.tmp   = np.full(m, nan, **kwargs)
       self.k_tmp = None
+
+  def new_array(self,sub,shape,mode,**kwargs):
+    "Allocate (or reopen) the array of the sub series."
+    if self.store is None:
+      return np.full(shape, nan, **kwargs)
+    path = os.path.join(self.store, sub+'.npy')
+    if mode != 'w+':
+      return np.load(path, mmap_mode=mode)
+    # Use .npy (rather than raw np.memmap) files, so that dtype/shape are kept.
+    arr = np.lib.format.open_memmap(path, mode='w+', shape=shape,
+        dtype=kwargs.get('dtype',float))
+    arr[...] = np.full((), nan, **kwargs)
+    return arr
+
+  def flush(self):
+    "Write the (memmap) series to disk."
+    for sub in 'afu':
+      if isinstance(getattr(self,sub,None),np.memmap):
+        getattr(self,sub).flush()
   
   def validate_key(self,key):
     try:
@@ -176,7 +302,7 @@ class FAU_series(MLR_Print):
         for ltr in 'af':
           if ltr in fau:
             raise KeyError("Accessing ."+ltr+" series, but kObs is None.")
-      elif k != self.chrono.kkObs[kObs]:
+      elif k != (kObs+1)*self.chrono.dkObs: # i.e. kkObs[kObs], w/o computing kkObs
         raise KeyError("kObs indicated, but k!=kkObs[kObs]")
     except ValueError:
       # Assume key = k
@@ -196,6 +322,18 @@ class FAU_series(MLR_Print):
 
   def __setitem__(self,key,item):
     k,kObs,fau = self.validate_key(key)
+    if self.reduce:
+      for sub in 'fa':
+        if sub in fau:
+          self.cur[sub][...] = item
+          self.k_cur[sub]    = kObs
+          self.accumulate(sub,kObs,item)
+      if 'u' in fau:
+        k0, k1       = self.split_dims(k)
+        self.k_tmp   = k0
+        self.tmp[k1] = item
+        self.accumulate('u',k0,item)
+      return
     if 'f' in fau:
       self.f[kObs]   = item
     if 'a' in fau:
@@ -208,6 +346,32 @@ class FAU_series(MLR_Print):
         self.k_tmp   = k0
         self.tmp[k1] = item
 
+  def accumulate(self,sub,i,item):
+    "Push item (with index i in the sub series) to its accumulator, if past BurnIn."
+    if sub not in getattr(self,'accs',{}):
+      return
+    t = self.chrono
+    if self.i_dir[sub]*(i - self.i_acc[sub]) <= 0:
+      raise KeyError("With reduce=True, the items must be set "+\
+          "in chronological order (or reverse, see restart), and only once.")
+    self.i_acc[sub] = i
+    # Same as inds in the non-reduced average()
+    k = i if sub=='u' else (i+1)*t.dkObs
+    if k*t.dt > t.BurnIn:
+      self.accs[sub].push(item)
+
+  def restart(self,sub,descending=False):
+    """
+    Restart the accumulation (if reduce) of the sub series,
+    e.g. for the 'u' assessment during the backward pass of smoothers.
+    The average (and conf) do not depend on whether the order is descending.
+    """
+    if sub not in getattr(self,'accs',{}):
+      return
+    self.accs [sub] = SeriesAccumulator()
+    self.i_acc[sub] = np.inf if descending else -1
+    self.i_dir[sub] = -1  if descending else +1
+
   def __getitem__(self,key):
     k,kObs,fau = self.validate_key(key)
 
@@ -220,12 +384,18 @@ class FAU_series(MLR_Print):
           raise RuntimeError(
             "Requested item from multiple ('."+fau+"') series, " +\
             "But the items are not equal.")
+    if self.reduce and ('f' in fau or 'a' in fau):
+      sub = 'f' if 'f' in fau else 'a'
+      if self.k_cur[sub] != kObs:
+        raise KeyError("Only item [" + str(self.k_cur[sub]) + "] is available "+\
+            "from the ."+sub+" series, because reduce=True.")
+      return self.cur[sub]
     if 'f' in fau:
       return self.f[kObs]
     elif 'a' in fau:
       return self.a[kObs]
     else:
-      if self.store_u:
+      if self.store_u and not self.reduce:
         return self.u[k]
       else:
         k0, k1 = self.split_dims(k)
@@ -246,6 +416,8 @@ class FAU_series(MLR_Print):
     """
     if self.m > 1:
       raise NotImplementedError
+    if self.reduce:
+      return {sub: acc.result() for sub, acc in self.accs.items()}
     avrg = {}
     t = self.chrono
     for sub in 'afu':
@@ -258,8 +430,29 @@ class FAU_series(MLR_Print):
         avrg[sub] = series_mean_with_conf(series)
     return avrg
 
-  def __repr__(self):
+  def state(self,k,kObs):
+    """Dict of the data up to (and including) k, kObs. Used for checkpointing."""
+    if self.reduce:
+      return {key: val for key, val in vars(self).items() if key!='chrono'}
+    dct = {'a':self.a[:kObs+1], 'f':self.f[:kObs+1]}
     if self.store_u:
+      dct['u'] = self.u[:k+1]
+    else:
+      dct['tmp'], dct['k_tmp'] = self.tmp, self.k_tmp
+    return dct
+
+  def set_state(self,dct):
+    """Inverse of state()."""
+    for key, val in dct.items():
+      if key in 'afu':
+        getattr(self,key)[:len(val)] = val
+      else:
+        setattr(self,key,val)
+
+  def __repr__(self):
+    if self.reduce:
+      self.included = ['cur','store_u','reduce'] + (['accs'] if hasattr(self,'accs') else [])
+    elif self.store_u:
       # Create instance version of 'included'
       self.included = self.included + ['u']
     return super().__repr__()
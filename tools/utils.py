@@ -29,19 +29,26 @@ def pdesc(desc):
     DAC_name  = inspect.stack()[2].function
   return DAC_name 
 
+# Set to True to disable progbar (e.g. in the workers of assimilate_in_parallel).
+# NB: set it as tools.utils.disable_progbar (not via import *).
+disable_progbar = False
+
 # Define progbar as tqdm or noobar
 try:
   import tqdm
   if is_notebook:
     def progbar(inds, desc=None, leave=1):
+      if disable_progbar: return inds
       return tqdm.tqdm_notebook(inds,desc=pdesc(desc),leave=leave)
   else:
     def progbar(inds, desc=None, leave=1):
+      if disable_progbar: return inds
       return tqdm.tqdm(inds,desc=pdesc(desc),leave=leave,
           smoothing=0.3,dynamic_ncols=True)
 except ImportError as err:
   install_warn(err)
   def progbar(inds, desc=None, leave=1):
+    if disable_progbar: return inds
     return noobar(inds,desc=pdesc(desc))
 
 
@@ -357,8 +364,8 @@ def save_data(path,inds,**kwargs):
 #########################################
 # Multiprocessing
 #########################################
-NPROC = 4
 import multiprocessing, signal
+NPROC = 4
 def multiproc_map(func,xx,**kwargs):
   """
   Multiprocessing.
@@ -392,6 +399,87 @@ def multiproc_map(func,xx,**kwargs):
   return res
 
 
+# Persistent pool of (forked) workers, sharing a workspace (an anonymous mmap).
+# Re-created only if nproc changes, or if the workspace is too small.
+# NB: the workers are forked at first use, and so they keep the module state
+# (e.g. the model parameters, such as mods.QG.core.prms) as of then.
+# Call close_tile_pool() after changing such state.
+import mmap, atexit, weakref
+TILE_NPROC = multiprocessing.cpu_count() # Default pool size of tile_map
+_tile_pool = None
+_tile_buf  = None # The workspace, as seen by the workers
+
+# Objects whose pre_fork() is called before tile_map forks its workers,
+# to stop their threads, which could otherwise be holding locks (e.g. in BLAS)
+# that would then never be released in the workers (see Stats.assess_queue).
+pre_fork_registry = weakref.WeakSet()
+
+def _init_tile_worker(buf):
+  global _tile_buf
+  _tile_buf = buf
+  signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def _tile_views(buf,layout):
+  return Bunch(**{key: np.ndarray(shape,dtype,buffer=buf,offset=offset)
+    for key,(offset,shape,dtype) in layout.items()})
+
+def _tile_job(job):
+  fun, layout, i0, i1, kwargs = job
+  return fun(_tile_views(_tile_buf,layout), i0, i1, **kwargs)
+
+def close_tile_pool():
+  "Terminate the pool of tile_map. It is re-created (forked) at the next use."
+  global _tile_pool
+  if _tile_pool is not None:
+    _tile_pool.pool.terminate()
+    _tile_pool.pool.join()
+    _tile_pool = None
+atexit.register(close_tile_pool)
+
+def tile_map(fun,arrays,tiles,nproc,**kwargs):
+  """
+  Compute fun(ws,i0,i1,**kwargs) for each (i0,i1) in tiles,
+  on a persistent pool of nproc worker processes,
+  where ws is a Bunch of views of (copies of) the arrays (a dict),
+  placed in a workspace of shared memory.
+  Thus, only the tile ranges (and the results) are pickled.
+  The workers may also write (their tile of) the output into ws.
+  If nproc is None, the existing pool is used (whatever its size),
+  or else one of TILE_NPROC workers is created.
+  See close_tile_pool() regarding changes of the module state.
+
+  Returns the list of results, and ws (as seen by this process).
+
+  The workers are forked, so this is not supported on Windows.
+  Before forking, the objects in pre_fork_registry stop their threads.
+  """
+  global _tile_pool
+  layout, nbytes = {}, 0
+  for key,a in arrays.items():
+    a = asarray(a)
+    layout[key] = (nbytes, a.shape, a.dtype)
+    nbytes     += -(-a.nbytes//64)*64 # Align
+  nbytes = max(nbytes,1)
+
+  if nproc is None:
+    nproc = TILE_NPROC if _tile_pool is None else _tile_pool.nproc
+
+  if _tile_pool is None or _tile_pool.nproc != nproc or len(_tile_pool.buf) < nbytes:
+    close_tile_pool()
+    for obj in list(pre_fork_registry):
+      obj.pre_fork()
+    buf  = mmap.mmap(-1, nbytes)
+    ctx  = multiprocessing.get_context('fork')
+    pool = ctx.Pool(nproc, _init_tile_worker, (buf,))
+    _tile_pool = Bunch(pool=pool, nproc=nproc, buf=buf)
+
+  ws = _tile_views(_tile_pool.buf,layout)
+  for key,a in arrays.items():
+    ws[key][...] = a
+  jobs = [(fun,layout,i0,i1,kwargs) for i0,i1 in tiles]
+  return _tile_pool.pool.map(_tile_job, jobs, chunksize=1), ws
+
+
 
 #########################################
 # Tic-toc
@@ -1105,10 +1105,6 @@ def plot_rank_histogram(stats):
       hasattr(stats,'rh') and \
       not all(stats.rh.a[-1]==array(np.nan).astype(int))
 
-  def are_uniform(w):
-    """Test inital & final weights, not intermediate (for speed)."""
-    (w[0]==1/N).all() and (w[-1]==1/N).all()
-
   fg = plt.figure(13,figsize=(8,4)).clf()
   set_figpos('3331 mac')
   #
@@ -1118,26 +1114,11 @@ def plot_rank_histogram(stats):
   ax_H.set_xlabel('ensemble member index (n)')
   ax_H.set_position([0.125,0.15, 0.78, 0.75])
   if has_been_computed:
-    w     = stats.w.a [chrono.maskObs_BI]
     ranks = stats.rh.a[chrono.maskObs_BI]
-    m     = ranks.shape[1]
-    N     = w.shape[1]
-    if are_uniform(w):
-      # Ensemble rank histogram
-      integer_hist(ranks.ravel(),N)
-    else:
-      # Experimental: weighted rank histogram.
-      # Weight ranks by inverse of particle weight. Why? Coz, with correct
-      # importance weights, the "expected value" histogram is then flat.
-      # Potential improvement: interpolate weights between particles.
-      w  = w
-      K  = len(w)
-      w  = np.hstack([w, ones((K,1))/N]) # define weights for rank N+1
-      w  = array([ w[arange(K),ranks[arange(K),i]] for i in range(m)])
-      w  = w.T.ravel()
-      w  = np.maximum(w, 1/N/100) # Artificial cap. Reduces variance, but introduces bias.
-      w  = 1/w
-      integer_hist(ranks.ravel(),N,weights=w)
+    N     = stats.w.a.shape[1]
+    # NB: for weighted ensembles, the ranks already account for the weights
+    # (see Stats.assess_ens), so no weighting is needed here.
+    integer_hist(ranks.ravel(),N)
   else:
     not_available_text(ax_H)
   